@@ -1,23 +1,33 @@
 # backend/ai_logic.py
-import google.generativeai as genai
-import os
+import asyncio
+import random
+from contextlib import aclosing
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
 from fastapi import UploadFile
 
+from services import email_templates, llm_gateway, metrics, scoring_cache
+from services.json_stream import JsonObjectStream
+import config
+
 load_dotenv() # Loads environment variables from a .env file
 
-# Configure the Gemini API
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Gemini is configured and called through services.llm_gateway.
 
 # --- Pydantic Schemas (like Zod in TypeScript) ---
+class CandidateProfile(BaseModel):
+    skills: List[str] = Field(default_factory=list, description="Up to 40 short lowercase skill names, e.g. 'python', 'kubernetes'.")
+    yearsExperience: Optional[float] = Field(default=None, description="Total years of professional experience, if stated or inferable.")
+    titles: List[str] = Field(default_factory=list, description="Up to 10 job titles the candidate has held.")
+
 class CandidateRanking(BaseModel):
     candidateIndex: int = Field(description="The index of the candidate in the input resumes array.")
     candidateName: str = Field(description="The full name of the candidate, extracted from the resume. If the document is not a resume, return 'N/A'.")
     candidateEmail: Optional[str] = Field(default=None, description="The email address of the candidate, extracted from the resume.")
     suitabilityScore: float = Field(description="A score between 0 and 1 representing the candidate’s suitability for the role, with 1 being the most suitable. If the document is not a resume, the score must be 0.")
     summary: str = Field(description="A brief summary of the candidate’s qualifications and experience, highlighting their suitability for the role. If the document is not a resume, explain why it is not suitable.")
+    profile: Optional[CandidateProfile] = Field(default=None, description="The candidate's skills, years of experience and job titles, extracted from the resume. Omit if the document is not a resume.")
 
 class RankCandidatesOutput(BaseModel):
     rankings: List[CandidateRanking] = Field(description="The rankings of the candidates.")
@@ -31,22 +41,117 @@ class DraftEmailOutput(BaseModel):
 
 # --- AI Functions ---
 
-async def rank_candidates_from_files(job_description: str, resume_files: List[UploadFile]) -> RankCandidatesOutput:
-    model = genai.GenerativeModel(
-        model_name='gemini-1.5-flash',
-        generation_config={"response_mime_type": "application/json", "temperature": 0.0},
-        system_instruction="""You are an expert HR assistant. You will rank candidates based on their resumes against a job description.
-From each resume, you MUST extract the candidate's full name and email address.
+RANKING_MODEL_NAME = 'gemini-1.5-flash'
+# Bump whenever the ranking prompt or schema changes so stale cached rankings are not reused.
+RANKING_PROMPT_VERSION = '2'
+
+_RANKING_SYSTEM_INSTRUCTION = """You are an expert HR assistant. You will rank candidates based on their resumes against a job description.
+From each resume, you MUST extract the candidate's full name and email address, and a short profile of their skills, years of experience and job titles.
 
 If a provided document is not a resume (e.g., it is a code file, an invoice, or other irrelevant document), you must still process it. In such cases:
 1.  Set the candidate's name to 'N/A'.
 2.  Set the suitability score to 0.
 3.  Provide a summary explaining that the document is not a valid resume.
-4.  Omit the email address field.
+4.  Omit the email address and profile fields.
 
 You must output a valid JSON object that conforms to the provided schema.
 """
+
+# Rough prompt overhead per shard and per candidate label, in tokens.
+_SHARD_BASE_TOKENS = 600
+_CANDIDATE_OVERHEAD_TOKENS = 20
+
+# A resume is either an uploaded file or text that has already been extracted.
+Resume = Union[UploadFile, str]
+
+def _read_upload(file: Resume) -> bytes:
+    """Reads a resume's full content without disturbing an upload's position for later readers."""
+    if isinstance(file, str):
+        return file.encode('utf-8')
+    file.file.seek(0)
+    content = file.file.read()
+    file.file.seek(0)
+    return content
+
+def _prompt_part(file: Resume):
+    if isinstance(file, str):
+        return file
+    # Ensure we are at the beginning of the file
+    file.file.seek(0)
+    # The genai library can take file objects directly
+    return file
+
+def estimate_tokens(content: bytes) -> int:
+    """Cheap token estimate (~4 bytes per token) used to size ranking shards."""
+    return len(content) // 4 + _CANDIDATE_OVERHEAD_TOKENS
+
+def plan_shards(token_counts: List[int], token_budget: int, max_candidates: int, base_tokens: int = 0) -> List[List[int]]:
+    """
+    Greedily groups candidate indices, in upload order, into shards whose estimated
+    prompt size stays within `token_budget`. A resume that alone exceeds the budget
+    gets a shard of its own.
+    """
+    shards, current, current_tokens = [], [], base_tokens
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_candidates):
+            shards.append(current)
+            current, current_tokens = [], base_tokens
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        shards.append(current)
+    return shards
+
+def _failed_shard_rankings(indices: List[int]) -> List[CandidateRanking]:
+    return [
+        CandidateRanking(
+            candidateIndex=index,
+            candidateName='N/A',
+            suitabilityScore=0,
+            summary="This resume could not be ranked because the ranking request failed. Please try again."
+        )
+        for index in indices
+    ]
+
+_RANKING_GENERATION_CONFIG = {"response_mime_type": "application/json", "temperature": 0.0}
+
+async def _response_rankings(prompt_parts, stream: bool) -> AsyncIterator[dict]:
+    """Yields raw ranking objects from the model, as they stream in when `stream` is set."""
+    model_kwargs = {
+        "generation_config": _RANKING_GENERATION_CONFIG,
+        "system_instruction": _RANKING_SYSTEM_INSTRUCTION,
+    }
+    request_config = {"response_schema": RankCandidatesOutput}
+    if stream:
+        parser = JsonObjectStream(emit_depth=2)
+        async with aclosing(llm_gateway.stream(RANKING_MODEL_NAME, prompt_parts, **model_kwargs,
+                                               request_generation_config=request_config)) as chunks:
+            async for text in chunks:
+                for ranking in parser.feed(text):
+                    yield ranking
+    else:
+        response = await llm_gateway.generate(RANKING_MODEL_NAME, prompt_parts, **model_kwargs,
+                                              request_generation_config=request_config)
+        # The model response text should be a JSON string matching the schema
+        for ranking in RankCandidatesOutput.parse_raw(response.text).rankings:
+            yield ranking.model_dump()
+
+async def _rank_shard(job_description: str, resume_files: List[Resume], indices: List[int],
+                      contents: List[bytes], emit: Callable[[CandidateRanking], Awaitable[None]], stream: bool):
+    """
+    Ranks one shard and passes each ranking to `emit` with its global index. The shard is
+    retried on its own when the call fails or the answer does not cover every candidate;
+    candidates already emitted by an earlier attempt are not emitted twice.
+    """
+    cache = scoring_cache.get_cache()
+    cache_key = scoring_cache.make_batch_key(
+        job_description, [contents[i] for i in indices], RANKING_MODEL_NAME, RANKING_PROMPT_VERSION
     )
+    cached = cache.get(cache_key)
+    if cached is not None:
+        for ranking in RankCandidatesOutput(**cached).rankings:
+            await emit(ranking.model_copy(update={"candidateIndex": indices[ranking.candidateIndex]}))
+        return
 
     # Prepare files for the prompt
     prompt_parts = [
@@ -54,43 +159,129 @@ You must output a valid JSON object that conforms to the provided schema.
         job_description,
         "\nResumes:"
     ]
-    for index, file in enumerate(resume_files):
-        # Ensure we are at the beginning of the file
-        file.file.seek(0)
-        # The genai library can take file objects directly
-        prompt_parts.append(f"Candidate {index}:")
-        prompt_parts.append(file)
-
-    response = await model.generate_content_async(
-        prompt_parts,
-        generation_config=genai.GenerationConfig(
-            response_schema=RankCandidatesOutput
-        )
+    for local_index, global_index in enumerate(indices):
+        prompt_parts.append(f"Candidate {local_index}:")
+        prompt_parts.append(_prompt_part(resume_files[global_index]))
+
+    emitted: Dict[int, CandidateRanking] = {}
+    for attempt in range(1, config.RANK_SHARD_MAX_ATTEMPTS + 1):
+        try:
+            async for raw_ranking in _response_rankings(prompt_parts, stream):
+                ranking = CandidateRanking(**raw_ranking)
+                local_index = ranking.candidateIndex
+                if local_index in emitted or not 0 <= local_index < len(indices):
+                    continue
+                emitted[local_index] = ranking
+                await emit(ranking.model_copy(update={"candidateIndex": indices[local_index]}))
+            if len(emitted) != len(indices):
+                raise ValueError(f"expected {len(indices)} rankings, got indices {sorted(emitted)}")
+            cache.set(cache_key, RankCandidatesOutput(rankings=list(emitted.values())).model_dump())
+            return
+        except Exception as e:
+            print(f"Ranking shard {indices[0]}-{indices[-1]} failed (attempt {attempt}): {e}")
+            if attempt < config.RANK_SHARD_MAX_ATTEMPTS:
+                await asyncio.sleep(config.RANK_SHARD_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    missing = [indices[i] for i in range(len(indices)) if i not in emitted]
+    for ranking in _failed_shard_rankings(missing):
+        await emit(ranking)
+
+async def _rank_in_shards(job_description: str, resume_files: List[Resume],
+                          emit: Callable[[CandidateRanking], Awaitable[None]], stream: bool):
+    contents = [_read_upload(file) for file in resume_files]
+    shards = plan_shards(
+        [estimate_tokens(content) for content in contents],
+        config.RANK_SHARD_TOKEN_BUDGET,
+        config.RANK_SHARD_MAX_CANDIDATES,
+        base_tokens=_SHARD_BASE_TOKENS + len(job_description) // 4,
     )
 
-    # The model response text should be a JSON string matching the schema
-    return RankCandidatesOutput.parse_raw(response.text)
+    semaphore = asyncio.Semaphore(config.RANK_SHARD_CONCURRENCY)
 
-async def draft_personalized_email(candidate_name: str, job_title: str) -> DraftEmailOutput:
-    model = genai.GenerativeModel(
-        model_name='gemini-1.5-flash',
-        generation_config={"response_mime_type": "application/json", "temperature": 0.5},
-        system_instruction="""You are an expert HR assistant. Your task is to draft a personalized confirmation email to a job candidate who has been selected for the next round.
+    async def run(indices: List[int]):
+        async with semaphore:
+            with metrics.stage("rank_shard", candidates=len(indices)):
+                await _rank_shard(job_description, resume_files, indices, contents, emit, stream)
+
+    await asyncio.gather(*(run(indices) for indices in shards))
+
+async def rank_candidates_from_files(job_description: str, resume_files: List[Resume]) -> RankCandidatesOutput:
+    """
+    Ranks resumes against a job description. Uploads are split into shards that fit
+    RANK_SHARD_TOKEN_BUDGET and ranked concurrently; the merged result keeps each
+    resume's original `candidateIndex` and is ordered by suitability.
+    """
+    rankings: List[CandidateRanking] = []
+
+    async def collect(ranking: CandidateRanking):
+        rankings.append(ranking)
+
+    await _rank_in_shards(job_description, resume_files, collect, stream=False)
+    rankings.sort(key=lambda r: r.suitabilityScore, reverse=True)
+    return RankCandidatesOutput(rankings=rankings)
+
+async def stream_rank_candidates(job_description: str, resume_files: List[Resume]) -> AsyncIterator[CandidateRanking]:
+    """
+    Streaming variant of `rank_candidates_from_files`: yields each CandidateRanking
+    (with its original `candidateIndex`) as soon as the model has finished writing it.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def produce():
+        try:
+            await _rank_in_shards(job_description, resume_files, queue.put, stream=True)
+        finally:
+            await queue.put(finished)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            ranking = await queue.get()
+            if ranking is finished:
+                break
+            yield ranking
+        await producer
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+EMAIL_MODEL_NAME = 'gemini-1.5-flash'
+_EMAIL_SYSTEM_INSTRUCTION = """You are an expert HR assistant. Your task is to draft a personalized confirmation email to a job candidate who has been selected for the next round.
 The email should be warm, professional, and encouraging.
 It must include the candidate's name and the job title they applied for.
 You must output a valid JSON object that conforms to the provided schema.
 """
+
+async def _generate_email_text(prompt: str) -> str:
+    response = await llm_gateway.generate(EMAIL_MODEL_NAME, prompt, generation_config={"temperature": 0.5})
+    return response.text
+
+async def draft_personalized_emails(candidates: List[Dict], job_title: str) -> List[DraftEmailOutput]:
+    """
+    Next-round confirmation emails for many candidates, rendered from one cached template.
+    Each candidate dict needs "candidateName" and may carry a "summary" for its personal note.
+    """
+    drafts = await email_templates.draft_from_template(
+        _generate_email_text, EMAIL_MODEL_NAME, job_title,
+        [(candidate, "") for candidate in candidates], interview_type=email_templates.NEXT_ROUND
     )
+    return [DraftEmailOutput(email=EmailContent(**email)) for email, _ in drafts]
+
+async def draft_personalized_email(candidate_name: str, job_title: str) -> DraftEmailOutput:
+    if config.EMAIL_DRAFT_MODE == "template":
+        return (await draft_personalized_emails([{"candidateName": candidate_name}], job_title))[0]
 
     prompt = f"""Draft an email for a candidate named {candidate_name} who has been selected for the next round for the position of {job_title}.
     
     The next step will be scheduling an interview, but do not include scheduling details in this email. Just confirm their selection for the next stage.
     """
 
-    response = await model.generate_content_async(
+    response = await llm_gateway.generate(
+        EMAIL_MODEL_NAME,
         prompt,
-        generation_config=genai.GenerationConfig(
-            response_schema=DraftEmailOutput
-        )
+        generation_config={"response_mime_type": "application/json", "temperature": 0.5},
+        system_instruction=_EMAIL_SYSTEM_INSTRUCTION,
+        request_generation_config={"response_schema": DraftEmailOutput}
     )
     return DraftEmailOutput.parse_raw(response.text)
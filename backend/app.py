@@ -1,29 +1,70 @@
 
-from datetime import datetime, timedelta
-from typing import List
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import List, Optional
 
 from fastapi import (FastAPI, File, Form, UploadFile, HTTPException, 
-                     BackgroundTasks, Request, Response, Depends)
+                     Request, Response, Depends)
 from fastapi.middleware.cors import CORSMiddleware
 from google_auth_oauthlib.flow import Flow
-from starlette.responses import RedirectResponse
+from pydantic import ValidationError
+from starlette.responses import JSONResponse, RedirectResponse
 
 # Import services
-from services import resume_processing, email_agent, calendar
-import services.firestore_client as db
+from services import clients, credential_manager, dedup, email_drafts, email_outbox, email_providers, email_templates, llm_gateway, calendar, metrics, profiles, slot_allocator, scoring_cache, job_queue, staging, text_extraction, tracing, write_batcher
+from services.tasks import PROCESS_RESUMES, DELETE_JOB, RESCORE_CANDIDATES, TASK_HANDLERS
+from services.worker import WorkerPool, get_pool, set_pool
+import services.firestore_async as db
 
 # Import Pydantic models and config
 from models import (JobUpdate, EmailDraftRequest, EmailSendRequest, 
-                    DraftedEmail, AuthURL, Candidate, JobCreate)
+                    DraftedEmail, AuthURL, Candidate, DeletionTask, JobCreate, SelectionRequest)
 import config
 
+# --- Lifespan: embedded worker pool and email dispatcher ---
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await clients.start()
+    pool = None
+    if config.EMBEDDED_WORKERS > 0:
+        pool = WorkerPool(
+            job_queue.get_queue(), TASK_HANDLERS, concurrency=config.EMBEDDED_WORKERS,
+            lease_seconds=config.WORKER_LEASE_SECONDS,
+            poll_interval=config.WORKER_POLL_INTERVAL_SECONDS,
+        )
+        set_pool(pool)
+        await pool.start()
+    dispatcher = None
+    if config.EMAIL_DISPATCHER_EMBEDDED:
+        dispatcher = email_outbox.OutboxDispatcher(email_outbox.get_outbox(), email_providers.get_provider())
+        email_outbox.set_dispatcher(dispatcher)
+        await dispatcher.start()
+    credentials = credential_manager.get_manager()
+    await credentials.start()
+    yield
+    await credentials.stop()
+    if dispatcher:
+        await dispatcher.stop()
+        email_outbox.set_dispatcher(None)
+    if pool:
+        await pool.stop()
+        set_pool(None)
+    text_extraction.shutdown_pool()
+    await clients.stop()
+    db.shutdown()
+
 # --- FastAPI App Initialization ---
 app = FastAPI(
     title="ResumeRank API",
     description="Backend for the ResumeRank application.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# --- Upload size limit (inside CORS, so 413 responses still carry CORS headers) ---
+app.add_middleware(staging.UploadSizeLimitMiddleware)
+
 # --- CORS Middleware ---
 app.add_middleware(
     CORSMiddleware,
@@ -33,36 +74,64 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --- Background Task Definition ---
-async def process_resumes_task(job_id: str, job_description: str, resumes: List[UploadFile]):
-    """Background task to read, process, and store resume data."""
-    try:
-        for resume in resumes:
-            content_bytes = await resume.read()
-            try:
-                content = content_bytes.decode('utf-8')
-            except UnicodeDecodeError:
-                content = content_bytes.decode('latin-1')
-
-            candidate_data = resume_processing.process_resume(job_description, content)
-            db.add_candidate(job_id, candidate_data)
-
-        db.update_job_status(job_id, 'completed')
-    except Exception as e:
-        print(f"Error during background resume processing for job {job_id}: {e}")
-        db.update_job_status(job_id, 'failed')
-
-
 # --- API Endpoints ---
 
 @app.get("/api")
 def root():
     return {"message": "ResumeRank API is running"}
 
+@app.get("/api/stats")
+def get_stats():
+    """Operational counters for the processing pipeline."""
+    pool = get_pool()
+    dispatcher = email_outbox.get_dispatcher()
+    return {
+        "clients": clients.stats(),
+        "llm": llm_gateway.stats(),
+        "credentials": credential_manager.get_manager().stats(),
+        "scoringCache": scoring_cache.get_cache().stats(),
+        "dedup": dedup.get_index().stats() if config.DEDUP_ENABLED else None,
+        "emailDrafts": email_drafts.stats(),
+        "emailTemplates": email_templates.stats(),
+        "jobQueue": job_queue.get_queue().stats(),
+        "textExtraction": text_extraction.stats(),
+        "firestoreWrites": write_batcher.stats(),
+        "workers": pool.stats() if pool else None,
+        "emailOutbox": email_outbox.get_outbox().stats(),
+        "emailDispatcher": dispatcher.stats() if dispatcher else None,
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint: stage latencies, LLM usage and in-flight gauges."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+async def enqueue_resume_processing(job_id: str, job_description: str, resumes: List[UploadFile]) -> str:
+    """Stages uploads to disk and queues them for the worker pool."""
+    staged = await asyncio.to_thread(staging.stage_uploads, resumes)
+    payload = {"jobId": job_id, "jobDescription": job_description, **staged}
+    return await asyncio.to_thread(job_queue.get_queue().enqueue, PROCESS_RESUMES, payload)
+
+@app.get("/api/tasks/{task_id}")
+def get_task_status(task_id: str):
+    task = job_queue.get_queue().get_task(task_id)
+    if not task:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return task
+
+@app.get("/api/jobs/{job_id}/trace")
+def get_job_trace(job_id: str):
+    """Recorded spans for a job's processing and email runs in this process, with time per stage."""
+    if not tracing.enabled():
+        raise HTTPException(status_code=404, detail="Tracing is disabled; set TRACING_ENABLED=true.")
+    traces = tracing.job_traces(job_id)
+    if not traces:
+        raise HTTPException(status_code=404, detail="No traces recorded for this job.")
+    return {"jobId": job_id, "traces": traces}
+
 # === Job Management ===
 @app.post("/api/jobs", status_code=201)
 async def create_job_and_process_resumes(
-    background_tasks: BackgroundTasks,
     title: str = Form(...),
     jobDescription: str = Form(...),
     resumes: List[UploadFile] = File(...)
@@ -70,108 +139,278 @@ async def create_job_and_process_resumes(
     if not resumes:
         raise HTTPException(status_code=400, detail="No resume files provided.")
     
-    job_id = db.create_job(title, jobDescription)
-    background_tasks.add_task(process_resumes_task, job_id, jobDescription, resumes)
-    return {"jobId": job_id}
+    job_id = await db.create_job(title, jobDescription)
+    task_id = await enqueue_resume_processing(job_id, jobDescription, resumes)
+    return {"jobId": job_id, "taskId": task_id}
 
 @app.put("/api/jobs/{job_id}", status_code=200)
 async def update_job_details(job_id: str, job_update: JobUpdate):
     update_data = job_update.model_dump(exclude_unset=True)
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update.")
-    db.update_job(job_id, update_data)
-    return {"message": f"Job {job_id} updated."}
+    job = await db.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    previous_description = job.get('jobDescription', "")
+    if not config.RESCORE_ON_EDIT or update_data.get('jobDescription', previous_description) == previous_description:
+        await db.update_job(job_id, update_data)
+        return {"message": f"Job {job_id} updated."}
+
+    # Existing candidates are rescored in the background. The task carries the new description's
+    # hash, so a task overtaken by a later edit skips itself; `scoredDescription` records what the
+    # stored scores were given for until a rescore catches up.
+    if 'scoredDescription' not in job:
+        update_data['scoredDescription'] = previous_description
+    await db.update_job(job_id, update_data)
+    task_id = await asyncio.to_thread(
+        job_queue.get_queue().enqueue, RESCORE_CANDIDATES,
+        {"jobId": job_id, "previousDescription": previous_description,
+         "descriptionHash": profiles.description_hash(update_data['jobDescription'])}
+    )
+    await db.update_job(job_id, {'rescoreTaskId': task_id})
+    return {"message": f"Job {job_id} updated; candidates are being rescored.", "taskId": task_id}
 
 @app.post("/api/jobs/{job_id}/resumes", status_code=200)
 async def add_resumes_to_job(
     job_id: str,
-    background_tasks: BackgroundTasks,
     resumes: List[UploadFile] = File(...)
 ):
-    job = db.get_job(job_id)
+    job = await db.get_job(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
     if not resumes:
         raise HTTPException(status_code=400, detail="No resume files provided.")
     
-    db.update_job_status(job_id, 'processing')
-    background_tasks.add_task(process_resumes_task, job_id, job['jobDescription'], resumes)
-    return {"message": "Resumes are being processed and added to the job."}
-
-@app.delete("/api/jobs/{job_id}", status_code=204)
+    await db.update_job_status(job_id, 'processing')
+    task_id = await enqueue_resume_processing(job_id, job['jobDescription'], resumes)
+    return {"message": "Resumes are being processed and added to the job.", "taskId": task_id}
+
+@app.delete("/api/jobs/{job_id}", status_code=204, responses={
+    204: {"description": "The job and its candidates were deleted."},
+    202: {"model": DeletionTask, "description": "The job is marked 'deleting' and removed by a background task."},
+})
 async def delete_job(job_id: str):
-    db.delete_job_and_candidates(job_id)
+    """
+    Deletes a job and its candidates. Jobs with more than BULK_DELETE_ASYNC_THRESHOLD
+    candidates are marked 'deleting' and removed by a background task; the response is
+    then 202 with the task ID and candidate count.
+    """
+    candidate_count = await db.count_candidates(job_id)
+    if candidate_count > config.BULK_DELETE_ASYNC_THRESHOLD:
+        await db.update_job(job_id, {'status': 'deleting', 'deletedCandidates': 0})
+        task_id = await asyncio.to_thread(job_queue.get_queue().enqueue, DELETE_JOB, {"jobId": job_id})
+        return JSONResponse(status_code=202, content={"taskId": task_id, "candidateCount": candidate_count})
+    await db.delete_job_and_candidates(job_id)
+    await asyncio.to_thread(dedup.get_index().drop_job, job_id)
     return Response(status_code=204)
 
 
 # === Candidate Management ===
+@app.get("/api/jobs/{job_id}/candidates")
+async def list_job_candidates(job_id: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+    """Candidates in score order, one page at a time; pass `nextCursor` back as `cursor` for the next page."""
+    try:
+        candidates, next_cursor = await db.list_candidates_page(job_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"candidates": candidates, "nextCursor": next_cursor}
+
+@app.post("/api/jobs/{job_id}/candidates/top")
+async def select_top_candidates(job_id: str, request: SelectionRequest):
+    """The `count` best-scored candidates, read directly from the score index."""
+    if request.count > config.CANDIDATE_PAGE_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"count must be at most {config.CANDIDATE_PAGE_MAX_SIZE}.")
+    return {"candidates": await db.get_top_candidates(job_id, request.count)}
+
 @app.delete("/api/jobs/{job_id}/candidates/{candidate_id}", status_code=204)
 async def delete_single_candidate(job_id: str, candidate_id: str):
-    db.delete_candidate(job_id, candidate_id)
+    await db.delete_candidate(job_id, candidate_id)
+    await asyncio.to_thread(dedup.get_index().remove, job_id, [candidate_id])
     return Response(status_code=204)
 
 @app.delete("/api/jobs/{job_id}/candidates", status_code=204)
 async def delete_all_job_candidates(job_id: str):
-    db.delete_all_candidates(job_id)
+    await db.delete_all_candidates(job_id)
+    await asyncio.to_thread(dedup.get_index().drop_job, job_id)
     return Response(status_code=204)
 
 
 # === Email & Scheduling ===
+async def _google_credentials(user_id: str):
+    """The user's Google credentials, or None if not connected; 503 if a token refresh failed transiently."""
+    try:
+        return await credential_manager.get_manager().get_async(user_id)
+    except credential_manager.CredentialsUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"{e}. Please try again shortly.")
+
+def _split_reachable(candidates):
+    """
+    Splits candidates into those with a valid email address and the skipped rest, e.g. resumes
+    stored unscored (filtered, duplicate, extraction_failed) or ones the model marked 'N/A'.
+    """
+    reachable, skipped = [], []
+    for candidate_data in candidates:
+        try:
+            Candidate(**candidate_data)
+        except ValidationError:
+            skipped.append({"candidateId": candidate_data["id"], "reason": "No valid email address."})
+            continue
+        reachable.append(candidate_data)
+    if not reachable:
+        raise HTTPException(status_code=422, detail="None of the specified candidates has a valid email address.")
+    return reachable, skipped
+
+async def _allocate_interview_slots(user_credentials, count: int, earliest_start: datetime):
+    # One free/busy query, then every candidate gets their own non-overlapping slot.
+    try:
+        policy = slot_allocator.SlotPolicy.from_config()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=f"Interview scheduling is misconfigured: {e}")
+    with metrics.stage("allocate_slots", candidates=count):
+        slots = await asyncio.to_thread(
+            slot_allocator.find_interview_slots, user_credentials, count, earliest_start, calendar.query_busy, policy
+        )
+    if len(slots) < count:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Only {len(slots)} free interview slots were found for {count} candidates."
+        )
+    return slots
+
 @app.post("/api/emails/draft", response_model=List[DraftedEmail])
-async def draft_emails_for_candidates(request: EmailDraftRequest):
-    job = db.get_job(request.jobId)
+async def draft_emails_for_candidates(request: EmailDraftRequest, response: Response):
+    with tracing.span("draft_emails_request", jobId=request.jobId, candidates=len(request.candidateIds)):
+        return await _draft_emails_for_candidates(request, response)
+
+async def _draft_emails_for_candidates(request: EmailDraftRequest, response: Response):
+    with metrics.stage("load_candidates"):
+        job = await db.get_job(request.jobId)
+        candidates = await db.get_candidates(request.jobId, request.candidateIds) if job else None
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
-    
-    candidates = db.get_candidates(request.jobId, request.candidateIds)
     if not candidates:
         raise HTTPException(status_code=404, detail="No specified candidates found.")
+    # Candidates without an email address get no draft; their IDs are listed in a header.
+    candidates, skipped = _split_reachable(candidates)
+    if skipped:
+        response.headers["X-Skipped-Candidates"] = ",".join(s["candidateId"] for s in skipped)
 
-    drafts = []
-    for candidate_data in candidates:
-        candidate = Candidate(**candidate_data)
-        email_content = email_agent.draft_email(job, candidate.model_dump(), request.interviewDatetime)
-        drafts.append(DraftedEmail(
-            candidateName=candidate.candidateName,
-            candidateEmail=candidate.candidateEmail,
-            **email_content
-        ))
-    return drafts
+    # Preview with the slots the send step will book, so it can reuse these drafts.
+    # Without a connected calendar every draft uses the requested time.
+    user_id = "placeholder_user_id" 
+    user_credentials = await _google_credentials(user_id)
+    if user_credentials:
+        slots = await _allocate_interview_slots(user_credentials, len(candidates), datetime.fromisoformat(request.interviewDatetime))
+        interview_times = [start_time.isoformat() for start_time, _ in slots]
+    else:
+        interview_times = [request.interviewDatetime] * len(candidates)
+
+    with metrics.stage("draft_emails", candidates=len(candidates)):
+        drafts = await email_drafts.get_or_draft(
+            request.jobId, job, list(zip(candidates, interview_times)), interview_type=request.interviewType, tone=request.tone
+        )
+    return [
+        DraftedEmail(
+            candidateName=candidate_data["candidateName"],
+            candidateEmail=candidate_data["candidateEmail"],
+            subject=draft["subject"],
+            body=draft["body"],
+            candidateId=candidate_data["id"],
+            draftId=draft["draftId"],
+            interviewTime=interview_time,
+        )
+        for candidate_data, interview_time, draft in zip(candidates, interview_times, drafts)
+    ]
 
 @app.post("/api/emails/send", status_code=200)
 async def send_emails_and_create_events(request: EmailSendRequest):
-    job = db.get_job(request.jobId)
+    with tracing.span("send_emails_request", jobId=request.jobId, candidates=len(request.candidateIds)):
+        return await _send_emails_and_create_events(request)
+
+async def _send_emails_and_create_events(request: EmailSendRequest):
+    with metrics.stage("load_candidates"):
+        job = await db.get_job(request.jobId)
+        candidates = await db.get_candidates(request.jobId, request.candidateIds) if job else None
     if not job:
         raise HTTPException(status_code=404, detail="Job not found.")
-    
-    candidates = db.get_candidates(request.jobId, request.candidateIds)
     if not candidates:
         raise HTTPException(status_code=404, detail="No specified candidates found.")
+    candidates, skipped = _split_reachable(candidates)
 
-    start_time = datetime.fromisoformat(request.interviewDatetime)
-    end_time = start_time + timedelta(minutes=30)
+    earliest_start = datetime.fromisoformat(request.interviewDatetime)
 
     user_id = "placeholder_user_id" 
-    user_tokens = db.get_user_tokens(user_id)
-    if not user_tokens:
+    user_credentials = await _google_credentials(user_id)
+    if not user_credentials:
         raise HTTPException(status_code=401, detail="User not authenticated with Google.")
 
-    for candidate_data in candidates:
-        candidate = Candidate(**candidate_data)
-        email_content = email_agent.draft_email(job, candidate.model_dump(), request.interviewDatetime)
-        
-        # email_agent.send_email(candidate.candidateEmail, email_content['subject'], email_content['body'])
+    slots = await _allocate_interview_slots(user_credentials, len(candidates), earliest_start)
+
+    # Drafts previewed for the same candidate and slot are reused; only the rest are generated.
+    with metrics.stage("draft_emails", candidates=len(candidates)):
+        drafts = await email_drafts.get_or_draft(
+            request.jobId, job, [(candidate_data, start_time.isoformat()) for candidate_data, (start_time, _) in zip(candidates, slots)],
+            interview_type=request.interviewType, tone=request.tone
+        )
 
-        event_details = {
+    events = []
+    messages = []
+    for candidate_data, (start_time, end_time), email_content in zip(candidates, slots, drafts):
+        candidate = Candidate(**candidate_data)
+        messages.append({
+            "idempotencyKey": email_outbox.idempotency_key(request.jobId, candidate_data["id"], email_content["draftId"]),
+            "jobId": request.jobId,
+            "candidateId": candidate_data["id"],
+            "to": candidate.candidateEmail,
+            "subject": email_content["subject"],
+            "body": email_content["body"],
+        })
+        events.append({
             "summary": f"Interview: {job['title']} with {candidate.candidateName}",
             "description": f"Interview for the {job['title']} position.",
             "start_time": start_time.isoformat(),
             "end_time": end_time.isoformat(),
             "attendees": [candidate.candidateEmail],
-        }
-        calendar.create_calendar_event(user_tokens, event_details)
+        })
+
+    # All events are inserted through batched Calendar requests; failures are reported per candidate.
+    with metrics.stage("calendar_insert", events=len(events)):
+        results = await asyncio.to_thread(calendar.create_calendar_events, user_credentials, events)
+    event_results = [
+        {"candidateId": candidate_data["id"], "start": event["start_time"], "eventId": result["event"].get("id")} if result["ok"]
+        else {"candidateId": candidate_data["id"], "start": event["start_time"], "error": result["error"]}
+        for candidate_data, event, result in zip(candidates, events, results)
+    ]
+    failed = [r for r in event_results if "error" in r]
+
+    # Only candidates whose interview is on the calendar are emailed. Delivery happens in the
+    # outbox dispatcher; the tracking ID reports its progress.
+    to_send = [message for message, result in zip(messages, results) if result["ok"]]
+    with metrics.stage("outbox_enqueue", messages=len(to_send)):
+        outbox_result = await asyncio.to_thread(email_outbox.get_outbox().enqueue, to_send)
+
+    message = ("Emails queued and calendar events created successfully." if not failed
+               else f"Emails queued for {len(to_send)} candidates; {len(failed)} of {len(event_results)} calendar events could not be created.")
+    if skipped:
+        message += f" {len(skipped)} candidates without a valid email address were skipped."
+    return {
+        "message": message,
+        "trackingId": outbox_result["trackingId"],
+        "emailsQueued": outbox_result["queued"],
+        "duplicateEmails": outbox_result["duplicates"],
+        "events": event_results,
+        "reusedDrafts": sum(draft["reused"] for draft in drafts),
+        "skippedCandidates": skipped,
+    }
 
-    return {"message": "Emails sent and calendar events created successfully."}
+@app.get("/api/emails/outbox/{tracking_id}")
+async def get_outbox_status(tracking_id: str):
+    """Delivery status of the emails queued under one tracking ID."""
+    status = await asyncio.to_thread(email_outbox.get_outbox().tracking_status, tracking_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Tracking ID not found.")
+    return status
 
 
 # === Google Authentication ===
@@ -197,16 +436,7 @@ async def google_auth_callback(request: Request):
         print(f"Error fetching token: {e}")
         raise HTTPException(status_code=400, detail="Error fetching token")
 
-    creds = flow.credentials
-    tokens = {
-        'token': creds.token,
-        'refresh_token': creds.refresh_token,
-        'token_uri': creds.token_uri,
-        'client_id': creds.client_id,
-        'client_secret': creds.client_secret,
-        'scopes': creds.scopes
-    }
-    
-    db.store_user_tokens("placeholder_user_id", tokens)
+    # Stored with the token's expiry and kept in memory, ready for calendar requests.
+    await asyncio.to_thread(credential_manager.get_manager().put, "placeholder_user_id", flow.credentials)
     
     return RedirectResponse(url=f"{config.FRONTEND_URL}?calendar=connected")
@@ -0,0 +1,80 @@
+# backend/benchmarks/async_firestore_bench.py
+"""
+Concurrent request throughput of the API with Firestore calls made inline on the
+event loop ("blocking", the old behaviour) versus through services.firestore_async.
+
+Firestore is replaced by an in-memory stand-in that sleeps for a fixed latency per
+round-trip, so no Google credentials are needed. Requires `httpx`.
+
+    python -m benchmarks.async_firestore_bench --requests 400 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import sys
+import time
+import types
+
+
+def _install_fake_firestore(latency_seconds: float):
+    """Registers a latency-simulating stand-in for services.firestore_client."""
+    jobs = {"job-1": {"title": "Engineer", "jobDescription": "Python", "status": "completed"}}
+
+    def blocking(result=None):
+        time.sleep(latency_seconds)
+        return result
+
+    fake = types.ModuleType("services.firestore_client")
+    fake.get_job = lambda job_id: blocking({"id": job_id, **jobs[job_id]} if job_id in jobs else None)
+    fake.update_job = lambda job_id, data: blocking(jobs[job_id].update(data))
+    fake.update_job_status = lambda job_id, status: blocking(jobs[job_id].update(status=status))
+    fake.delete_candidate = lambda job_id, candidate_id: blocking()
+    for name in ("create_job", "count_candidates", "delete_job_and_candidates", "add_candidate",
+                 "new_candidate_id", "commit_candidate_batch", "get_candidates", "delete_all_candidates",
+                 "store_user_tokens", "get_user_tokens", "invalidate_job"):
+        setattr(fake, name, lambda *args, **kwargs: blocking())
+    sys.modules["services.firestore_client"] = fake
+
+
+async def _drive(app, total: int, concurrency: int) -> float:
+    import httpx
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i: int):
+            async with semaphore:
+                if i % 2:
+                    response = await client.put("/api/jobs/job-1", json={"title": f"Engineer {i}"})
+                else:
+                    response = await client.delete(f"/api/jobs/job-1/candidates/c{i}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        return time.perf_counter() - started
+
+
+async def main(total: int, concurrency: int, latency_ms: float):
+    _install_fake_firestore(latency_ms / 1000)
+    import app as api
+    import services.firestore_async as adb
+
+    async def inline(func, *args, **kwargs):
+        return func(*args, **kwargs)
+
+    offloaded = adb.run
+    for mode, runner in (("blocking", inline), ("async", offloaded)):
+        adb.run = runner
+        elapsed = await _drive(api.app, total, concurrency)
+        print(f"{mode:>9}: {total} requests in {elapsed:6.2f}s -> {total / elapsed:8.1f} req/s")
+    adb.run = offloaded
+    adb.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency_ms))
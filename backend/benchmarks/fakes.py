@@ -0,0 +1,603 @@
+# backend/benchmarks/fakes.py
+"""
+In-process stand-ins for Gemini, Firestore and Google Calendar, so the real app can be
+benchmarked offline. Each takes a `Faults` profile that adds latency per round-trip,
+fails a fraction of calls and throttles calls above a rate, the way the live services
+do. `install` wires all three into the app's modules.
+"""
+import asyncio
+import copy
+import functools
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from google.api_core import exceptions as google_exceptions
+from google.cloud.firestore_v1 import transforms
+
+
+class Faults:
+    """
+    Latency, random failures and throttling for one fake backend. Every call waits
+    `latency_ms` plus up to `jitter_ms`; `error_rate` of calls then fail with a
+    transient error, and calls beyond `max_per_second` (over a sliding second) are
+    rejected as throttled right away, like a 429.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 max_per_second: Optional[float] = None, seed: Optional[int] = None,
+                 error: Callable[[str], Exception] = google_exceptions.ServiceUnavailable,
+                 throttle_error: Callable[[str], Exception] = google_exceptions.ResourceExhausted):
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.max_per_second = max_per_second
+        self.error = error
+        self.throttle_error = throttle_error
+        self.calls = 0
+        self.errors = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._recent: deque = deque()
+        self._lock = threading.Lock()
+
+    def _decide(self) -> Tuple[float, Optional[Exception]]:
+        with self._lock:
+            self.calls += 1
+            if self.max_per_second:
+                now = time.monotonic()
+                while self._recent and now - self._recent[0] >= 1.0:
+                    self._recent.popleft()
+                if len(self._recent) >= self.max_per_second:
+                    self.throttled += 1
+                    return 0.0, self.throttle_error("Quota exceeded (fake).")
+                self._recent.append(now)
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return delay, self.error("Backend unavailable (fake).")
+            return delay, None
+
+    def before_call(self):
+        delay, error = self._decide()
+        if delay:
+            time.sleep(delay)
+        if error is not None:
+            raise error
+
+    async def before_call_async(self):
+        delay, error = self._decide()
+        if delay:
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "errors": self.errors, "throttled": self.throttled}
+
+
+# --- Gemini ---
+
+def _score(text: str) -> float:
+    """Deterministic pseudo-score in [0, 1] for a piece of text."""
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+def _resume_fields(text: str) -> Dict[str, Any]:
+    """What the model would extract from a resume generated by `benchmarks.suite.make_resume`."""
+    name = re.search(r"Name:\s*(.+)", text)
+    email = re.search(r"Email:\s*(\S+)", text)
+    skills = re.search(r"Skills:\s*(.+)", text)
+    years = re.search(r"(\d+) years", text)
+    return {
+        "candidateName": name.group(1).strip() if name else "N/A",
+        "candidateEmail": email.group(1) if email else None,
+        "suitabilityScore": round(_score(text), 3),
+        "summary": f"Candidate with {years.group(1) if years else 'some'} years of experience.",
+        "profile": {
+            "skills": [s.strip() for s in skills.group(1).split(",")] if skills else [],
+            "yearsExperience": int(years.group(1)) if years else None,
+            "titles": ["Software Engineer"],
+        },
+    }
+
+def respond(contents: Any) -> str:
+    """
+    Plausible JSON answers for the app's prompts, recognized by their wording: resume
+    scoring, shard ranking, email drafting, templates, personal notes and rescoring.
+    """
+    parts = contents if isinstance(contents, list) else [contents]
+    prompt = "\n".join(p if isinstance(p, str) else "" for p in parts)
+
+    if "\nResumes:" in parts:
+        rankings = []
+        for i, part in enumerate(parts):
+            match = re.fullmatch(r"Candidate (\d+):", part) if isinstance(part, str) else None
+            if match and i + 1 < len(parts):
+                resume = parts[i + 1] if isinstance(parts[i + 1], str) else ""
+                rankings.append({"candidateIndex": int(match.group(1)), **_resume_fields(resume)})
+        return json.dumps({"rankings": rankings})
+    if "Analyze the following resume" in prompt:
+        return json.dumps(_resume_fields(prompt.split("Resume:", 1)[-1]))
+    if "reusable" in prompt and "template" in prompt:
+        return json.dumps({
+            "subject": "Interview for {job_title}",
+            "body": "Dear {candidate_name},\n\nThank you for applying for the {job_title} position.\n"
+                    "{personal_note}\nWe would like to invite you to an interview at {interview_time}.\n\n"
+                    "The Hiring Team, ResumeRank",
+        })
+    if "For each candidate below" in prompt:
+        indices = re.findall(r"^\s*\[(\d+)\]", prompt, flags=re.MULTILINE)
+        return json.dumps([{"index": int(i), "note": "Your background stood out to the team."} for i in indices])
+    if "Draft" in prompt and "email" in prompt:
+        name = re.search(r"named (.+?) (?:inviting|who)", prompt)
+        return json.dumps({
+            "subject": "Interview invitation",
+            "body": f"Dear {name.group(1) if name else 'candidate'},\n\nThank you for your application.\n\n"
+                    "The Hiring Team, ResumeRank",
+        })
+    if "has been updated" in prompt:
+        count = len(re.findall(r"^\s*Candidate \d+:", prompt, flags=re.MULTILINE))
+        return json.dumps({"scores": [{"index": i, "suitabilityScore": round(_score(f"{prompt}{i}"), 3)}
+                                      for i in range(count)]})
+    return "{}"
+
+
+class _Response:
+    def __init__(self, text: str, prompt_tokens: int):
+        self.text = text
+        self.usage_metadata = SimpleNamespace(prompt_token_count=prompt_tokens,
+                                              candidates_token_count=len(text) // 4)
+
+
+class _StreamResponse(_Response):
+    """Async iterator over chunks of the answer, like a streamed generate_content_async."""
+
+    def __init__(self, text: str, prompt_tokens: int, chunk_chars: int = 200):
+        super().__init__(text, prompt_tokens)
+        self._chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+
+    async def __aiter__(self):
+        for chunk in self._chunks:
+            await asyncio.sleep(0)
+            yield SimpleNamespace(text=chunk)
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel: answers with `respond` after the profile's delay."""
+
+    def __init__(self, faults: Faults, responder: Callable[[Any], str] = respond):
+        self.faults = faults
+        self.responder = responder
+
+    @staticmethod
+    def _prompt_tokens(contents: Any) -> int:
+        parts = contents if isinstance(contents, list) else [contents]
+        return sum(len(p) for p in parts if isinstance(p, str)) // 4
+
+    async def generate_content_async(self, contents: Any, stream: bool = False, **kwargs):
+        await self.faults.before_call_async()
+        text = self.responder(contents)
+        return (_StreamResponse if stream else _Response)(text, self._prompt_tokens(contents))
+
+    def generate_content(self, contents: Any, **kwargs):
+        self.faults.before_call()
+        return _Response(self.responder(contents), self._prompt_tokens(contents))
+
+
+def fake_gateway(faults: Faults, responder: Callable[[Any], str] = respond):
+    """The real LLM gateway (rate limits, adaptive concurrency, retries) over fake models."""
+    from services import llm_gateway
+
+    class FakeGateway(llm_gateway.LLMGateway):
+        def get_model(self, model_name, generation_config=None, system_instruction=None):
+            return FakeModel(faults, responder)
+
+    return FakeGateway(api_key="fake")
+
+
+# --- Firestore ---
+
+_ASCENDING, _DESCENDING = "ASCENDING", "DESCENDING"
+
+
+def _type_rank(value: Any) -> int:
+    # Firestore orders values of different types: null, booleans, numbers, timestamps, strings, others.
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    return 5
+
+def _compare(a: Any, b: Any) -> int:
+    ra, rb = _type_rank(a), _type_rank(b)
+    if ra != rb:
+        return -1 if ra < rb else 1
+    if ra == 5:
+        a, b = repr(a), repr(b)
+    return (a > b) - (a < b)
+
+def _get_field(data: Dict[str, Any], path: str) -> Tuple[bool, Any]:
+    value: Any = data
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return False, None
+        value = value[key]
+    return True, value
+
+def _apply(data: Dict[str, Any], updates: Dict[str, Any], dotted: bool) -> Dict[str, Any]:
+    """Applies field values to a document, resolving SERVER_TIMESTAMP and DELETE_FIELD."""
+    for key, value in updates.items():
+        path = key.split(".") if dotted else [key]
+        target = data
+        for part in path[:-1]:
+            target = target.setdefault(part, {})
+        if value is transforms.DELETE_FIELD:
+            target.pop(path[-1], None)
+        elif value is transforms.SERVER_TIMESTAMP:
+            target[path[-1]] = datetime.now(timezone.utc)
+        else:
+            target[path[-1]] = copy.deepcopy(value)
+    return data
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocument", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        return _get_field(self._data or {}, field_path)[1]
+
+
+class FakeDocument:
+    def __init__(self, client: "FakeFirestore", collection_path: str, document_id: str):
+        self._client = client
+        self._collection_path = collection_path
+        self.id = document_id
+        self.path = f"{collection_path}/{document_id}"
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None) -> FakeSnapshot:
+        self._client.faults.before_call()
+        return self._client._snapshot(self)
+
+    def set(self, data: Dict[str, Any], merge: bool = False):
+        self._client.faults.before_call()
+        self._client._write([("set", self, data, merge)])
+
+    def update(self, data: Dict[str, Any]):
+        self._client.faults.before_call()
+        self._client._write([("update", self, data, False)])
+
+    def delete(self):
+        self._client.faults.before_call()
+        self._client._write([("delete", self, None, False)])
+
+
+class _Count:
+    def __init__(self, query: "FakeQuery"):
+        self._query = query
+
+    def get(self):
+        self._query._client.faults.before_call()
+        return [[SimpleNamespace(alias="count", value=len(self._query._matching()))]]
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeFirestore", collection_path: str, filters=(), orders=(),
+                 limit: Optional[int] = None, start_after: Optional[Any] = None, projection=None):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes) -> "FakeQuery":
+        fields = {"filters": self._filters, "orders": self._orders, "limit": self._limit,
+                  "start_after": self._start_after, "projection": self._projection, **changes}
+        return FakeQuery(self._client, self._collection_path, **fields)
+
+    def where(self, field_path: Optional[str] = None, op_string: Optional[str] = None, value: Any = None,
+              filter: Any = None) -> "FakeQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = _ASCENDING) -> "FakeQuery":
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy(limit=count)
+
+    def start_after(self, cursor: Any) -> "FakeQuery":
+        return self._copy(start_after=cursor)
+
+    def select(self, field_paths: Iterable[str]) -> "FakeQuery":
+        return self._copy(projection=[f for f in field_paths if f != "__name__"])
+
+    def count(self) -> _Count:
+        return _Count(self)
+
+    # --- Evaluation ---
+    def _orderings(self) -> List[Tuple[str, str]]:
+        orders = list(self._orders)
+        if not any(field == "__name__" for field, _ in orders):
+            orders.append(("__name__", orders[-1][1] if orders else _ASCENDING))
+        return orders
+
+    @staticmethod
+    def _value(document_id: str, data: Dict[str, Any], field_path: str) -> Tuple[bool, Any]:
+        return (True, document_id) if field_path == "__name__" else _get_field(data, field_path)
+
+    def _matches(self, document_id: str, data: Dict[str, Any]) -> bool:
+        for field_path, op, expected in self._filters:
+            present, value = self._value(document_id, data, field_path)
+            if not present:
+                return False
+            if op == "==" and _compare(value, expected) != 0:
+                return False
+            if op == "!=" and _compare(value, expected) == 0:
+                return False
+            if op in ("<", "<=", ">", ">="):
+                c = _compare(value, expected)
+                if not {"<": c < 0, "<=": c <= 0, ">": c > 0, ">=": c >= 0}[op]:
+                    return False
+            if op == "in" and value not in expected:
+                return False
+            if op == "array_contains" and (not isinstance(value, list) or expected not in value):
+                return False
+        return True
+
+    def _cursor_values(self, orders: List[Tuple[str, str]]) -> List[Any]:
+        cursor = self._start_after
+        if isinstance(cursor, FakeSnapshot):
+            data, document_id = cursor._data or {}, cursor.id
+        else:
+            data, document_id = cursor, None
+        values = []
+        for field_path, _ in orders:
+            if field_path == "__name__":
+                name = document_id if document_id is not None else data.get("__name__")
+                values.append(getattr(name, "id", name))
+            else:
+                values.append(_get_field(data, field_path)[1])
+        return values
+
+    def _matching(self) -> List[Tuple[str, Dict[str, Any]]]:
+        orders = self._orderings()
+        rows = []
+        for document_id, data in self._client._collection(self._collection_path).items():
+            if not self._matches(document_id, data):
+                continue
+            keys = [self._value(document_id, data, field) for field, _ in orders]
+            # Documents without an ordered field are left out, as in Firestore.
+            if all(present for present, _ in keys):
+                rows.append(([value for _, value in keys], document_id, data))
+
+        def order(a, b):
+            for (va, vb, (_, direction)) in zip(a[0], b[0], orders):
+                c = _compare(va, vb)
+                if c:
+                    return -c if direction == _DESCENDING else c
+            return 0
+
+        rows.sort(key=functools.cmp_to_key(order))
+        if self._start_after is not None:
+            cursor = (self._cursor_values(orders), None, None)
+            rows = [row for row in rows if order(row, cursor) > 0]
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return [(document_id, data) for _, document_id, data in rows]
+
+    def stream(self, transaction=None):
+        self._client.faults.before_call()
+        with self._client._lock:
+            rows = self._matching()
+            snapshots = []
+            for document_id, data in rows:
+                if self._projection is not None:
+                    data = {k: v for k, v in data.items() if k in self._projection}
+                snapshots.append(FakeSnapshot(FakeDocument(self._client, self._collection_path, document_id),
+                                              copy.deepcopy(data)))
+        return iter(snapshots)
+
+    def get(self, transaction=None) -> List[FakeSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, client: "FakeFirestore", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocument:
+        return FakeDocument(self._client, self._collection_path, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.set(data)
+        return datetime.now(timezone.utc), reference
+
+    def list_documents(self, page_size: Optional[int] = None) -> List[FakeDocument]:
+        with self._client._lock:
+            return [self.document(document_id) for document_id in self._client._collection(self._collection_path)]
+
+
+class FakeBatch:
+    """Collects writes and applies them atomically on `commit`, in one round-trip."""
+
+    MAX_OPERATIONS = 500
+
+    def __init__(self, client: "FakeFirestore"):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference: FakeDocument, data: Dict[str, Any], merge: bool = False):
+        self._writes.append(("set", reference, data, merge))
+
+    def update(self, reference: FakeDocument, data: Dict[str, Any]):
+        self._writes.append(("update", reference, data, False))
+
+    def delete(self, reference: FakeDocument):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        if len(self._writes) > self.MAX_OPERATIONS:
+            raise google_exceptions.InvalidArgument(f"maximum {self.MAX_OPERATIONS} writes allowed per request")
+        self._client.faults.before_call()
+        self._client._write(self._writes)
+        self._client.commits += 1
+        writes, self._writes = self._writes, []
+        return [SimpleNamespace(update_time=datetime.now(timezone.utc)) for _ in writes]
+
+
+class FakeFirestore:
+    """
+    Thread-safe in-memory Firestore client covering what services.firestore_client,
+    bulk_delete and candidate_queries use: documents and subcollections, batched
+    writes, multi-gets, filtered/ordered/limited queries with cursors, projections
+    and count aggregations. Every round-trip goes through `faults`.
+    """
+
+    def __init__(self, faults: Optional[Faults] = None):
+        self.faults = faults or Faults()
+        self.commits = 0
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+
+    def collection(self, path: str) -> FakeCollection:
+        return FakeCollection(self, path)
+
+    def document(self, path: str) -> FakeDocument:
+        collection_path, document_id = path.rsplit("/", 1)
+        return FakeDocument(self, collection_path, document_id)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def get_all(self, references: Iterable[FakeDocument], field_paths=None, transaction=None):
+        self.faults.before_call()
+        with self._lock:
+            return [self._snapshot(reference) for reference in references]
+
+    def close(self):
+        pass
+
+    def document_count(self) -> int:
+        with self._lock:
+            return sum(len(documents) for documents in self._collections.values())
+
+    def _collection(self, path: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.get(path, {})
+
+    def _snapshot(self, reference: FakeDocument) -> FakeSnapshot:
+        with self._lock:
+            data = self._collection(reference._collection_path).get(reference.id)
+            return FakeSnapshot(reference, copy.deepcopy(data) if data is not None else None)
+
+    def _write(self, writes):
+        with self._lock:
+            # Check every update first so a batch applies all of its writes or none.
+            for kind, reference, _, _ in writes:
+                if kind == "update" and reference.id not in self._collection(reference._collection_path):
+                    raise google_exceptions.NotFound(f"No document to update: {reference.path}")
+            for kind, reference, data, merge in writes:
+                documents = self._collections.setdefault(reference._collection_path, {})
+                if kind == "delete":
+                    documents.pop(reference.id, None)
+                elif kind == "update":
+                    _apply(documents[reference.id], data, dotted=True)
+                else:
+                    base = documents.get(reference.id, {}) if merge else {}
+                    documents[reference.id] = _apply(base, data, dotted=False)
+
+
+# --- Calendar ---
+
+class FakeCalendar:
+    """
+    Replaces services.calendar's `query_busy` and `insert_events`. The interviewer has
+    `meetings_per_day` one-hour meetings each day; inserted events are kept in `events`
+    but not reported as busy, so repeated benchmark runs see the same calendar. A failed
+    or throttled insert fails that event only, like one part of a batch request.
+    """
+
+    def __init__(self, faults: Optional[Faults] = None, meetings_per_day: int = 2):
+        self.faults = faults or Faults()
+        self.meetings_per_day = meetings_per_day
+        self.events: List[Dict[str, Any]] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def query_busy(self, user_credentials, time_min: datetime, time_max: datetime,
+                   calendar_id: str = "primary") -> List[Tuple[datetime, datetime]]:
+        self.faults.before_call()
+        busy = []
+        day = time_min.astimezone(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        while day < time_max:
+            for i in range(self.meetings_per_day):
+                start = day + timedelta(hours=10 + 3 * i)
+                busy.append((start, start + timedelta(hours=1)))
+            day += timedelta(days=1)
+        return busy
+
+    def insert_events(self, user_credentials, event_bodies: List[Dict],
+                      conference_data_version: Optional[int] = None) -> List[Dict[str, Any]]:
+        from services.calendar import MAX_BATCH_SIZE
+
+        results = []
+        for start in range(0, len(event_bodies), MAX_BATCH_SIZE):
+            batch = event_bodies[start:start + MAX_BATCH_SIZE]
+            try:
+                # One round-trip per batch request.
+                self.faults.before_call()
+            except Exception as e:
+                results.extend({"ok": False, "error": str(e)} for _ in batch)
+                continue
+            for body in batch:
+                event = {**body, "id": f"event{next(self._ids)}", "hangoutLink": "https://meet.example/fake"}
+                with self._lock:
+                    self.events.append(event)
+                results.append({"ok": True, "event": event})
+        return results
+
+
+def install(llm: Faults, firestore: Faults, calendar_faults: Faults) -> SimpleNamespace:
+    """
+    Points the app's Gemini gateway, Firestore client and Calendar calls at fakes and
+    returns them. Call before the app's lifespan starts.
+    """
+    from services import calendar, llm_gateway
+    import services.firestore_client as firestore_client
+
+    fakes = SimpleNamespace(firestore=FakeFirestore(firestore), calendar=FakeCalendar(calendar_faults),
+                            gateway=fake_gateway(llm), llm_faults=llm)
+    firestore_client.set_client(fakes.firestore)
+    llm_gateway.set_gateway(fakes.gateway)
+    calendar.query_busy = fakes.calendar.query_busy
+    calendar.insert_events = fakes.calendar.insert_events
+    return fakes
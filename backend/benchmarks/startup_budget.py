@@ -0,0 +1,163 @@
+# backend/benchmarks/startup_budget.py
+"""
+Cold-start budget check: how long a fresh process takes to import the API and to
+answer its first request, and which modules the import time goes to.
+
+Each measurement runs in a new interpreter. Import time comes from `python -X
+importtime`, attributed to our own modules (self time) and to the third-party
+packages each of them imports directly (cumulative time). Startup is measured
+from process start through `import app`, the lifespan's startup and a first
+`GET /api`. Client warm-up (services.clients) is off unless --warm-up is given,
+so no Google credentials or network are needed. Exits with status 1 when a
+budget is exceeded, so it can run in CI. Requires `httpx`.
+
+    python -m benchmarks.startup_budget --import-budget-ms 1500 --startup-budget-ms 2500
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Top-level names of this project's own modules and packages.
+FIRST_PARTY = {os.path.splitext(name)[0] for name in os.listdir(BACKEND_DIR)
+               if name.endswith(".py") or os.path.isdir(os.path.join(BACKEND_DIR, name, "__pycache__"))}
+
+
+def _child_env(warm_up: bool) -> Dict[str, str]:
+    """Environment for measured processes: local state goes to a scratch directory."""
+    scratch = tempfile.mkdtemp(prefix="startup-budget-")
+    return {
+        **os.environ,
+        "WARM_UP_CLIENTS": "true" if warm_up else "false",
+        "JOB_QUEUE_PATH": os.path.join(scratch, "job_queue.sqlite3"),
+        "EMAIL_OUTBOX_PATH": os.path.join(scratch, "email_outbox.sqlite3"),
+        "DEDUP_INDEX_PATH": os.path.join(scratch, "dedup_index.sqlite3"),
+        "STAGING_DIR": os.path.join(scratch, "staging"),
+        "PYTHONWARNINGS": "ignore",
+    }
+
+
+def _is_first_party(module: str) -> bool:
+    return module.split(".")[0] in FIRST_PARTY
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """
+    Turns `-X importtime` output into a tree of {"module", "self", "cumulative",
+    "children"} (times in ms). The output lists each module after its imports, one
+    indentation level deeper than the importer.
+    """
+    pending: List[Dict] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        node = {"module": name.strip(), "self": int(self_us) / 1000, "cumulative": int(cumulative_us) / 1000,
+                "depth": depth, "children": []}
+        while pending and pending[-1]["depth"] > depth:
+            node["children"].insert(0, pending.pop())
+        pending.append(node)
+    return pending
+
+def attribute(roots: List[Dict], top: int = 3) -> List[Dict]:
+    """Per first-party module: its own time and its heaviest direct third-party imports."""
+    report = []
+
+    def visit(node: Dict):
+        if _is_first_party(node["module"]):
+            external = sorted((c for c in node["children"] if not _is_first_party(c["module"])),
+                              key=lambda c: c["cumulative"], reverse=True)
+            report.append({
+                "module": node["module"],
+                "selfMs": round(node["self"], 1),
+                "thirdPartyMs": round(sum(c["cumulative"] for c in external), 1),
+                "heaviestImports": [{"module": c["module"], "ms": round(c["cumulative"], 1)} for c in external[:top]],
+            })
+        for child in node["children"]:
+            visit(child)
+
+    for root in roots:
+        visit(root)
+    return sorted(report, key=lambda r: r["selfMs"] + r["thirdPartyMs"], reverse=True)
+
+
+def measure_imports(module: str, env: Dict[str, str]) -> Dict:
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    roots = parse_importtime(result.stderr)
+    total = next(r["cumulative"] for r in reversed(roots) if r["module"] == module)
+    return {"totalMs": round(total, 1), "modules": attribute(roots)}
+
+def measure_startup(env: Dict[str, str]) -> Dict:
+    result = subprocess.run([sys.executable, "-m", "benchmarks.startup_budget", "--child"],
+                            cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Starting the app failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+async def _child():
+    """Runs in the measured process: import, lifespan startup, first request, shutdown."""
+    started = time.perf_counter()
+    import httpx
+    import app as api
+
+    timings = {"importMs": (time.perf_counter() - started) * 1000}
+    async with api.app.router.lifespan_context(api.app):
+        timings["lifespanStartupMs"] = (time.perf_counter() - started) * 1000 - timings["importMs"]
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+            response = await client.get("/api")
+            response.raise_for_status()
+        timings["firstResponseMs"] = (time.perf_counter() - started) * 1000
+        shutdown_started = time.perf_counter()
+    timings["shutdownMs"] = (time.perf_counter() - shutdown_started) * 1000
+    print(json.dumps({name: round(ms, 1) for name, ms in timings.items()}))
+
+
+def main(module: str, import_budget_ms: float, startup_budget_ms: float, warm_up: bool, as_json: bool) -> int:
+    env = _child_env(warm_up)
+    imports = measure_imports(module, env)
+    startup = measure_startup(env)
+    over_budget = []
+    if imports["totalMs"] > import_budget_ms:
+        over_budget.append(f"import of {module} took {imports['totalMs']:.0f} ms (budget {import_budget_ms:.0f} ms)")
+    if startup["firstResponseMs"] > startup_budget_ms:
+        over_budget.append(f"first response took {startup['firstResponseMs']:.0f} ms (budget {startup_budget_ms:.0f} ms)")
+
+    if as_json:
+        print(json.dumps({"imports": imports, "startup": startup, "overBudget": over_budget}, indent=2))
+    else:
+        print(f"import {module}: {imports['totalMs']:.0f} ms (budget {import_budget_ms:.0f} ms)")
+        print(f"{'module':<32}{'self ms':>9}{'3rd-party ms':>14}  heaviest direct imports")
+        for row in imports["modules"]:
+            heaviest = ", ".join(f"{i['module']} {i['ms']:.0f}" for i in row["heaviestImports"])
+            print(f"{row['module']:<32}{row['selfMs']:>9.1f}{row['thirdPartyMs']:>14.1f}  {heaviest}")
+        print("startup: " + ", ".join(f"{name} {ms:.0f}" for name, ms in startup.items())
+              + f" (first response budget {startup_budget_ms:.0f} ms)")
+        for problem in over_budget:
+            print(f"OVER BUDGET: {problem}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app", help="Module whose import is profiled.")
+    parser.add_argument("--import-budget-ms", type=float, default=1500.0)
+    parser.add_argument("--startup-budget-ms", type=float, default=2500.0)
+    parser.add_argument("--warm-up", action="store_true", help="Create Firestore and Gemini clients during startup.")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(_child())
+        sys.exit(0)
+    sys.exit(main(args.module, args.import_budget_ms, args.startup_budget_ms, args.warm_up, args.json))
@@ -0,0 +1,427 @@
+# backend/benchmarks/suite.py
+"""
+Offline benchmark suite for the API's hot paths, run against the real app with
+Gemini, Firestore and Calendar replaced by the fakes in benchmarks/fakes.py.
+
+For every corpus size (resumes per job) and concurrency level (simultaneous
+clients) it runs, in order:
+
+    ingest       `concurrency` clients each POST /api/jobs with a corpus and wait
+                 for the processing task (staging, extraction, dedup, scoring, writes)
+    rank         `concurrency` concurrent ai_logic.rank_candidates_from_files calls
+    draft        POST /api/emails/draft for the first job's candidates, in batches
+    send         POST /api/emails/send for the same batches (slots, events, outbox)
+    delete       DELETE /api/jobs/{id}/candidates/{id} for every candidate of one job
+    delete_job   DELETE /api/jobs/{id} for the other jobs
+
+Each scenario reports throughput, p50/p99 latency per operation, errors and the
+peak resident memory of this process (text extraction runs in child processes and
+is not included). Results are written as JSON, by default to
+var/benchmarks/<commit>.json; pass an earlier file to --compare to see the change.
+The app's own settings apply and are recorded with the results. That includes the
+LLM gateway's request budget (LLM_REQUESTS_PER_MINUTE), so set it to 0 in the
+environment to measure the code rather than the quota. Requires `httpx`.
+
+    python -m benchmarks.suite --sizes 20,100 --concurrency 1,4 --llm-latency-ms 300
+    python -m benchmarks.suite --compare var/benchmarks/abc1234.json --max-regression 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["ingest", "rank", "draft", "send", "delete", "delete_job"]
+
+SKILLS = ["python", "java", "go", "rust", "typescript", "react", "django", "fastapi", "kubernetes", "docker",
+          "terraform", "aws", "gcp", "postgresql", "redis", "kafka", "spark", "airflow", "pytorch", "sql"]
+FIRST_NAMES = ["Ada", "Grace", "Alan", "Edsger", "Barbara", "Donald", "Frances", "Ken", "Margaret", "Linus"]
+LAST_NAMES = ["Lovelace", "Hopper", "Turing", "Dijkstra", "Liskov", "Knuth", "Allen", "Thompson", "Hamilton", "Torvalds"]
+
+
+def make_resume(index: int, rng: random.Random, tag: str) -> str:
+    """
+    A synthetic plain-text resume. The filler words are random, so resumes are far
+    apart for the dedup index; the labelled lines are what the fake model extracts.
+    """
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {index}"
+    words = " ".join(f"w{rng.randrange(50_000)}" for _ in range(rng.randint(250, 450)))
+    return (f"Name: {name}\nEmail: candidate{index}.{tag}@example.com\n"
+            f"Skills: {', '.join(rng.sample(SKILLS, 6))}\n"
+            f"Experience: {rng.randint(1, 20)} years as a software engineer.\n\n{words}\n")
+
+def job_description(tag: str) -> str:
+    # Unique per job, so scores are never served from a previous run's cache.
+    return (f"Senior backend engineer ({tag}). Requires 5+ years of experience with python, "
+            "postgresql, kubernetes and aws. Experience with kafka is a plus.")
+
+
+class PeakMemory:
+    """Samples this process's resident set size in a background thread while active."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def rss_bytes() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except OSError:
+            # No procfs: fall back to the lifetime peak (kilobytes on Linux, bytes on macOS).
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == "darwin" else peak * 1024
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, self.rss_bytes())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_bytes = self.rss_bytes()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, self.rss_bytes())
+
+    @property
+    def peak_mb(self) -> float:
+        return round(self.peak_bytes / (1 << 20), 1)
+
+
+async def _bounded(concurrency: int, operations: List[Callable[[], Awaitable[Any]]]) -> List[Any]:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(operation):
+        async with semaphore:
+            return await operation()
+
+    return await asyncio.gather(*(run(op) for op in operations))
+
+async def measure(name: str, size: int, concurrency: int, unit: str,
+                  operations: List[Callable[[], Awaitable[int]]]) -> Dict[str, Any]:
+    """
+    Runs the operations `concurrency` at a time. Each returns how many items it handled
+    (0 when it failed); its wall time is one latency sample.
+    """
+    from services.job_queue import summarize_latencies
+
+    latencies: List[float] = []
+    errors = 0
+
+    def timed(operation):
+        async def run():
+            nonlocal errors
+            started = time.perf_counter()
+            try:
+                items = await operation()
+            except Exception as e:
+                print(f"  {name}: {type(e).__name__}: {e}")
+                items = 0
+            if not items:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+            return items
+        return run
+
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        items = sum(await _bounded(concurrency, [timed(op) for op in operations]))
+        elapsed = time.perf_counter() - started
+    return {
+        "scenario": name,
+        "corpusSize": size,
+        "concurrency": concurrency,
+        "operations": len(operations),
+        "items": items,
+        "unit": unit,
+        "seconds": round(elapsed, 3),
+        "throughput": round(items / elapsed, 2) if elapsed else None,
+        "latencySeconds": {k: round(v, 4) if isinstance(v, float) else v for k, v in summarize_latencies(latencies).items()},
+        "errors": errors,
+        "peakRssMb": memory.peak_mb,
+    }
+
+
+class Driver:
+    """Drives the app over ASGI the way the frontend does."""
+
+    def __init__(self, client, poll_interval: float = 0.02):
+        self.client = client
+        self.poll_interval = poll_interval
+
+    async def wait_for_task(self, task_id: str) -> Dict[str, Any]:
+        while True:
+            response = await self.client.get(f"/api/tasks/{task_id}")
+            response.raise_for_status()
+            task = response.json()
+            if task["status"] in ("done", "failed"):
+                return task
+            await asyncio.sleep(self.poll_interval)
+
+    async def ingest(self, resumes: List[str], tag: str) -> str:
+        files = [("resumes", (f"resume_{i}.txt", text.encode("utf-8"), "text/plain")) for i, text in enumerate(resumes)]
+        response = await self.client.post("/api/jobs", data={"title": f"Backend engineer {tag}",
+                                                             "jobDescription": job_description(tag)}, files=files)
+        response.raise_for_status()
+        created = response.json()
+        task = await self.wait_for_task(created["taskId"])
+        if task["status"] != "done":
+            raise RuntimeError(f"processing task failed: {task.get('lastError')}")
+        return created["jobId"]
+
+    async def candidate_ids(self, job_id: str) -> List[str]:
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+            response = await self.client.get(f"/api/jobs/{job_id}/candidates", params=params)
+            response.raise_for_status()
+            page = response.json()
+            ids.extend(c["id"] for c in page["candidates"])
+            cursor = page["nextCursor"]
+            if not cursor:
+                return ids
+
+    async def email(self, path: str, job_id: str, candidate_ids: List[str], interview_start: str) -> int:
+        response = await self.client.post(path, json={"jobId": job_id, "candidateIds": candidate_ids,
+                                                      "interviewDatetime": interview_start})
+        response.raise_for_status()
+        return len(candidate_ids)
+
+    async def delete_candidate(self, job_id: str, candidate_id: str) -> int:
+        response = await self.client.delete(f"/api/jobs/{job_id}/candidates/{candidate_id}")
+        response.raise_for_status()
+        return 1
+
+    async def delete_job(self, job_id: str) -> int:
+        response = await self.client.delete(f"/api/jobs/{job_id}")
+        response.raise_for_status()
+        if response.status_code == 202:
+            await self.wait_for_task(response.json()["taskId"])
+        return 1
+
+
+async def run_cell(driver: Driver, size: int, concurrency: int, scenarios: List[str], batch_size: int,
+                   seed: int) -> List[Dict[str, Any]]:
+    """All scenarios for one corpus size and concurrency level; later ones reuse the jobs ingested first."""
+    import ai_logic
+
+    rng = random.Random(seed)
+    tags = [uuid.uuid4().hex[:8] for _ in range(concurrency)]
+    corpora = [[make_resume(i, rng, tag) for i in range(size)] for tag in tags]
+    results = []
+    job_ids: List[Optional[str]] = [None] * concurrency
+
+    def ingest(k):
+        async def run():
+            job_ids[k] = await driver.ingest(corpora[k], tags[k])
+            return size
+        return run
+
+    def rank(k):
+        async def run():
+            output = await ai_logic.rank_candidates_from_files(job_description(f"rank-{tags[k]}"), corpora[k])
+            return len(output.rankings)
+        return run
+
+    if "ingest" in scenarios or any(s in scenarios for s in ("draft", "send", "delete", "delete_job")):
+        results.append(await measure("ingest", size, concurrency, "resumes/s",
+                                     [ingest(k) for k in range(concurrency)]))
+    if "rank" in scenarios:
+        results.append(await measure("rank", size, concurrency, "resumes/s",
+                                     [rank(k) for k in range(concurrency)]))
+
+    first_job = job_ids[0]
+    candidate_ids = await driver.candidate_ids(first_job) if first_job else []
+    batches = [candidate_ids[i:i + batch_size] for i in range(0, len(candidate_ids), batch_size)]
+    # A Monday a week out, so the whole search window has working days.
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    interview_start = (today + timedelta(days=7 - today.weekday() + 7)).isoformat()
+    for name, path in (("draft", "/api/emails/draft"), ("send", "/api/emails/send")):
+        if name in scenarios:
+            results.append(await measure(name, size, concurrency, "candidates/s", [
+                (lambda batch=batch, path=path: driver.email(path, first_job, batch, interview_start))
+                for batch in batches
+            ]))
+    if "delete" in scenarios:
+        results.append(await measure("delete", size, concurrency, "requests/s", [
+            (lambda cid=cid: driver.delete_candidate(first_job, cid)) for cid in candidate_ids
+        ]))
+    if "delete_job" in scenarios:
+        results.append(await measure("delete_job", size, concurrency, "jobs/s", [
+            (lambda job_id=job_id: driver.delete_job(job_id)) for job_id in job_ids if job_id
+        ]))
+    return [r for r in results if r["scenario"] in scenarios]
+
+
+def _configure_environment(scratch: str):
+    """Settings for an isolated run; explicit environment variables still take precedence."""
+    defaults = {
+        "JOB_QUEUE_PATH": os.path.join(scratch, "job_queue.sqlite3"),
+        "EMAIL_OUTBOX_PATH": os.path.join(scratch, "email_outbox.sqlite3"),
+        "DEDUP_INDEX_PATH": os.path.join(scratch, "dedup_index.sqlite3"),
+        "STAGING_DIR": os.path.join(scratch, "staging"),
+        "WARM_UP_CLIENTS": "false",
+        # Pick queued tasks up promptly, so polling does not dominate ingest latency.
+        "WORKER_POLL_INTERVAL_SECONDS": "0.05",
+        # Room for every send batch's slots, however many candidates are scheduled.
+        "INTERVIEW_SEARCH_DAYS": "120",
+    }
+    for name, value in defaults.items():
+        os.environ.setdefault(name, value)
+    # Never deliver real email from a benchmark.
+    os.environ["EMAIL_PROVIDER"] = "fake"
+
+def _settings() -> Dict[str, Any]:
+    import config
+
+    names = ["EMBEDDED_WORKERS", "RESUME_PROCESSING_CONCURRENCY", "RESUME_RANKING_MODE", "LLM_STREAMING",
+             "LLM_REQUESTS_PER_MINUTE", "LLM_MAX_CONCURRENCY", "DEDUP_ENABLED", "PREFILTER_ENABLED",
+             "EXTRACTION_PROCESSES", "FIRESTORE_WRITE_BATCH_SIZE", "EMAIL_DRAFT_MODE", "WORKER_POLL_INTERVAL_SECONDS"]
+    return {name: getattr(config, name) for name in names}
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR,
+                               capture_output=True, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_results(results: List[Dict[str, Any]]):
+    print(f"{'scenario':<11}{'size':>6}{'conc':>5}{'ops':>6}{'throughput':>20}{'p50 ms':>9}{'p99 ms':>9}"
+          f"{'errors':>7}{'peak MB':>9}")
+    for r in results:
+        latency = r["latencySeconds"]
+        p50 = f"{latency['p50'] * 1000:.0f}" if "p50" in latency else "-"
+        p99 = f"{latency['p99'] * 1000:.0f}" if "p99" in latency else "-"
+        print(f"{r['scenario']:<11}{r['corpusSize']:>6}{r['concurrency']:>5}{r['operations']:>6}"
+              f"{r['throughput']:>10.1f} {r['unit']:<9}{p50:>9}{p99:>9}{r['errors']:>7}{r['peakRssMb']:>9.1f}")
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], max_regression: Optional[float] = None) -> List[str]:
+    """Prints throughput and p99 changes per scenario; returns those worse than `max_regression` percent."""
+    def key(r):
+        return r["scenario"], r["corpusSize"], r["concurrency"]
+
+    before = {key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nCompared with {baseline.get('commit', '?')} ({baseline.get('startedAt', '?')}):")
+    for r in current["results"]:
+        old = before.get(key(r))
+        if old is None or not old.get("throughput") or not r.get("throughput"):
+            continue
+        throughput_change = (r["throughput"] / old["throughput"] - 1) * 100
+        old_p99, new_p99 = old["latencySeconds"].get("p99"), r["latencySeconds"].get("p99")
+        p99_change = (new_p99 / old_p99 - 1) * 100 if old_p99 and new_p99 else 0.0
+        print(f"  {r['scenario']:<11} size {r['corpusSize']:<5} conc {r['concurrency']:<3} "
+              f"throughput {throughput_change:+6.1f}%   p99 {p99_change:+6.1f}%")
+        if max_regression is not None and (throughput_change < -max_regression or p99_change > max_regression):
+            regressions.append(f"{r['scenario']} (size {r['corpusSize']}, concurrency {r['concurrency']})")
+    return regressions
+
+
+async def main(args) -> int:
+    scratch = tempfile.mkdtemp(prefix="resumerank-bench-")
+    _configure_environment(scratch)
+    sys.path.insert(0, BACKEND_DIR)
+
+    import httpx
+    from benchmarks import fakes
+
+    installed = fakes.install(
+        llm=fakes.Faults(args.llm_latency_ms, args.llm_jitter_ms, args.llm_error_rate, args.llm_max_per_second, args.seed),
+        firestore=fakes.Faults(args.firestore_latency_ms, args.firestore_latency_ms / 2, args.firestore_error_rate,
+                               seed=args.seed),
+        calendar_faults=fakes.Faults(args.calendar_latency_ms, args.calendar_latency_ms / 2, args.calendar_error_rate,
+                                     args.calendar_max_per_second, args.seed),
+    )
+    # A connected calendar whose access token does not expire during the run.
+    installed.firestore.collection("users").document("placeholder_user_id").set({"google_tokens": {
+        "token": "fake", "refresh_token": "fake", "client_id": "fake", "client_secret": "fake",
+        "token_uri": "https://oauth2.googleapis.com/token", "expiry": "2999-01-01T00:00:00Z",
+    }})
+
+    import app as api
+
+    report = {"commit": _commit(), "startedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "python": platform.python_version(), "settings": _settings(),
+              "fakes": {k: v for k, v in vars(args).items() if k.split("_")[0] in ("llm", "firestore", "calendar")},
+              "results": []}
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            driver = Driver(client)
+            for size in args.sizes:
+                for concurrency in args.concurrency:
+                    print(f"corpus size {size}, concurrency {concurrency}...")
+                    report["results"] += await run_cell(driver, size, concurrency, args.scenarios,
+                                                        args.batch_size, args.seed)
+    report["backendCalls"] = {"llm": installed.llm_faults.stats(), "firestore": installed.firestore.faults.stats(),
+                              "calendar": installed.calendar.faults.stats()}
+
+    print()
+    _print_results(report["results"])
+    output = args.output or os.path.join(BACKEND_DIR, "var", "benchmarks", f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(json.load(f), report, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=_int_list, default=[20, 100], help="Resumes per job, comma-separated.")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4], help="Simultaneous clients, comma-separated.")
+    parser.add_argument("--scenarios", type=lambda v: v.split(","), default=SCENARIOS,
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}.")
+    parser.add_argument("--batch-size", type=int, default=10, help="Candidates per draft/send request.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=100.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-max-per-second", type=float, default=None, help="Throttle (429) above this call rate.")
+    parser.add_argument("--firestore-latency-ms", type=float, default=10.0)
+    parser.add_argument("--firestore-error-rate", type=float, default=0.0)
+    parser.add_argument("--calendar-latency-ms", type=float, default=100.0)
+    parser.add_argument("--calendar-error-rate", type=float, default=0.0)
+    parser.add_argument("--calendar-max-per-second", type=float, default=None)
+    parser.add_argument("--output", help="Where to write the JSON results (default var/benchmarks/<commit>.json).")
+    parser.add_argument("--compare", help="Earlier results file to compare against.")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="With --compare, exit 1 if throughput drops or p99 grows by more than this percent.")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -10,6 +10,9 @@ load_dotenv()
 # Ensure the GOOGLE_APPLICATION_CREDENTIALS environment variable is set to the path
 # of your Firebase service account key JSON file. This is used by the Firebase Admin SDK.
 # e.g., export GOOGLE_APPLICATION_CREDENTIALS="/path/to/your/serviceAccountKey.json"
+# Firestore and Gemini clients are created on first use (services.clients). With this set,
+# the API and workers create them in the background right after startup instead.
+WARM_UP_CLIENTS = os.getenv("WARM_UP_CLIENTS", "true").lower() == "true"
 
 # --- Google OAuth Configuration ---
 # Get these credentials from your Google Cloud Console for the OAuth 2.0 Client ID
@@ -26,6 +29,177 @@ GOOGLE_API_SCOPES = [
     "openid"
 ]
 
+# --- LLM Gateway (services.llm_gateway) ---
+# Every Gemini call goes through one gateway. GOOGLE_API_KEY is accepted as a fallback name for the key.
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+# Request and token budgets per minute; 0 disables the limit.
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", "600"))
+LLM_REQUEST_BURST = float(os.getenv("LLM_REQUEST_BURST", "10"))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+# Calls in flight start at LLM_INITIAL_CONCURRENCY, grow while calls succeed and halve when throttled.
+LLM_INITIAL_CONCURRENCY = int(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "5"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "30"))
+
+# --- Resume Processing ---
+# Maximum number of resumes scored concurrently by a single processing task.
+RESUME_PROCESSING_CONCURRENCY = int(os.getenv("RESUME_PROCESSING_CONCURRENCY", "8"))
+# Worker processes used to extract text from PDF/DOCX/RTF/HTML resumes.
+EXTRACTION_PROCESSES = int(os.getenv("EXTRACTION_PROCESSES", str(os.cpu_count() or 2)))
+EXTRACTION_CACHE_MAX_ENTRIES = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "1024"))
+# How uploads are scored: "per_resume" makes one scoring call per resume, while
+# "batch_stream" ranks them in shards via ai_logic and stores each candidate as it streams in.
+RESUME_RANKING_MODE = os.getenv("RESUME_RANKING_MODE", "per_resume")
+# Use streamed generation and incremental JSON parsing for scoring calls.
+LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+# Two-stage ranking: a local BM25 pass over the extracted text scores every resume and only
+# the PREFILTER_TOP_K best, plus any whose score (relative to the best, 0-1) reaches
+# PREFILTER_MIN_SCORE, are scored by the model. Set either to 0 to disable that criterion.
+PREFILTER_ENABLED = os.getenv("PREFILTER_ENABLED", "false").lower() == "true"
+PREFILTER_TOP_K = int(os.getenv("PREFILTER_TOP_K", "200"))
+PREFILTER_MIN_SCORE = float(os.getenv("PREFILTER_MIN_SCORE", "0"))
+# Near-duplicate detection: resumes at least DEDUP_THRESHOLD similar (estimated Jaccard over
+# word shingles) to one already in the same job are linked to it instead of being scored.
+# Signatures live in a SQLite LSH index; DEDUP_NUM_PERM must be a multiple of DEDUP_BANDS.
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() == "true"
+DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "var/dedup_index.sqlite3")
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", "16"))
+
+# --- Rescoring ---
+# Editing a job's description rescores its candidates from the profiles (skills, years, titles)
+# stored at ingest. Only candidates whose profile contains an added or removed description term,
+# or whose fit to a changed experience requirement moves, are touched, and of those only the ones
+# whose local match score (0-1) moves by at least RESCORE_MIN_DELTA. "llm" rescores them with the
+# model, RESCORE_BATCH_SIZE per call; "local" shifts their stored score by the local change.
+RESCORE_ON_EDIT = os.getenv("RESCORE_ON_EDIT", "true").lower() == "true"
+RESCORE_MODE = os.getenv("RESCORE_MODE", "llm")
+RESCORE_MIN_DELTA = float(os.getenv("RESCORE_MIN_DELTA", "0"))
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "25"))
+# Characters of each candidate's stored summary sent along with their profile.
+RESCORE_SUMMARY_CHARS = int(os.getenv("RESCORE_SUMMARY_CHARS", "300"))
+
+# --- Firestore ---
+# Size of the thread pool the async data layer (services.firestore_async) runs Firestore calls on.
+FIRESTORE_ASYNC_THREADS = int(os.getenv("FIRESTORE_ASYNC_THREADS", "32"))
+
+# --- Firestore Writes ---
+# Candidate documents are buffered and committed in batches (Firestore allows at most 500 writes per batch).
+FIRESTORE_WRITE_BATCH_SIZE = int(os.getenv("FIRESTORE_WRITE_BATCH_SIZE", "200"))
+FIRESTORE_WRITE_FLUSH_INTERVAL_SECONDS = float(os.getenv("FIRESTORE_WRITE_FLUSH_INTERVAL_SECONDS", "0.5"))
+FIRESTORE_WRITE_MAX_ATTEMPTS = int(os.getenv("FIRESTORE_WRITE_MAX_ATTEMPTS", "3"))
+# Bulk deletes page through document names and delete them in parallel batches.
+BULK_DELETE_PAGE_SIZE = int(os.getenv("BULK_DELETE_PAGE_SIZE", "500"))
+BULK_DELETE_PARALLELISM = int(os.getenv("BULK_DELETE_PARALLELISM", "4"))
+# Jobs with more candidates than this are deleted by a background task (status 'deleting').
+BULK_DELETE_ASYNC_THRESHOLD = int(os.getenv("BULK_DELETE_ASYNC_THRESHOLD", "1000"))
+# Job documents are cached this long between reads; local writes invalidate them immediately.
+JOB_CACHE_TTL_SECONDS = float(os.getenv("JOB_CACHE_TTL_SECONDS", "2"))
+# Candidate listings are paginated in score order; clients may ask for up to the maximum per page.
+CANDIDATE_PAGE_SIZE = int(os.getenv("CANDIDATE_PAGE_SIZE", "50"))
+CANDIDATE_PAGE_MAX_SIZE = int(os.getenv("CANDIDATE_PAGE_MAX_SIZE", "500"))
+
+# --- Batch Ranking (ai_logic.rank_candidates_from_files) ---
+# Uploads are split into shards that fit this estimated prompt size and ranked concurrently.
+RANK_SHARD_TOKEN_BUDGET = int(os.getenv("RANK_SHARD_TOKEN_BUDGET", "120000"))
+RANK_SHARD_MAX_CANDIDATES = int(os.getenv("RANK_SHARD_MAX_CANDIDATES", "25"))
+RANK_SHARD_CONCURRENCY = int(os.getenv("RANK_SHARD_CONCURRENCY", "4"))
+RANK_SHARD_MAX_ATTEMPTS = int(os.getenv("RANK_SHARD_MAX_ATTEMPTS", "3"))
+RANK_SHARD_RETRY_BACKOFF_SECONDS = float(os.getenv("RANK_SHARD_RETRY_BACKOFF_SECONDS", "1"))
+
+# --- Scoring Cache ---
+# Scoring results are cached by a hash of (job description, resume, model, prompt version).
+# Set SCORING_CACHE_PATH to a SQLite file to also keep results on disk across restarts.
+SCORING_CACHE_MAX_ENTRIES = int(os.getenv("SCORING_CACHE_MAX_ENTRIES", "2048"))
+SCORING_CACHE_TTL_SECONDS = float(os.getenv("SCORING_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+SCORING_CACHE_PATH = os.getenv("SCORING_CACHE_PATH")
+SCORING_CACHE_MAX_DISK_ENTRIES = int(os.getenv("SCORING_CACHE_MAX_DISK_ENTRIES", "100000"))
+
+# --- Job Queue & Workers ---
+# Uploads are staged to disk and processed by a worker pool that claims tasks from a durable queue.
+# Run extra workers with `python worker.py`; set EMBEDDED_WORKERS=0 to keep them out of the API process.
+JOB_QUEUE_BACKEND = os.getenv("JOB_QUEUE_BACKEND", "sqlite")
+JOB_QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", "var/job_queue.sqlite3")
+JOB_QUEUE_MAX_ATTEMPTS = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3"))
+JOB_QUEUE_RETRY_BACKOFF_SECONDS = float(os.getenv("JOB_QUEUE_RETRY_BACKOFF_SECONDS", "5"))
+WORKER_LEASE_SECONDS = float(os.getenv("WORKER_LEASE_SECONDS", "300"))
+WORKER_POLL_INTERVAL_SECONDS = float(os.getenv("WORKER_POLL_INTERVAL_SECONDS", "1"))
+EMBEDDED_WORKERS = int(os.getenv("EMBEDDED_WORKERS", "2"))
+STAGING_DIR = os.getenv("STAGING_DIR", "var/staging")
+# Uploads are streamed to the staging directory in chunks of this size and hashed on the way.
+STAGING_CHUNK_BYTES = int(os.getenv("STAGING_CHUNK_BYTES", str(1 << 20)))
+# Larger uploads are rejected with 413; the per-request cap is also enforced while the body arrives.
+UPLOAD_MAX_FILE_BYTES = int(os.getenv("UPLOAD_MAX_FILE_BYTES", str(10 << 20)))
+UPLOAD_MAX_REQUEST_BYTES = int(os.getenv("UPLOAD_MAX_REQUEST_BYTES", str(200 << 20)))
+
+# --- Google Credentials ---
+# Users' OAuth credentials are cached in memory and refreshed in the background when they
+# expire within CREDENTIALS_REFRESH_AHEAD_SECONDS, checked every CREDENTIALS_REFRESH_CHECK_SECONDS.
+CREDENTIALS_REFRESH_AHEAD_SECONDS = float(os.getenv("CREDENTIALS_REFRESH_AHEAD_SECONDS", "300"))
+CREDENTIALS_REFRESH_CHECK_SECONDS = float(os.getenv("CREDENTIALS_REFRESH_CHECK_SECONDS", "60"))
+
+# --- Interview Scheduling ---
+# Interviews are placed in free time on the interviewer's calendar, within working hours.
+INTERVIEW_DURATION_MINUTES = int(os.getenv("INTERVIEW_DURATION_MINUTES", "30"))
+INTERVIEW_BUFFER_MINUTES = int(os.getenv("INTERVIEW_BUFFER_MINUTES", "10"))
+INTERVIEW_WORKDAY_START = os.getenv("INTERVIEW_WORKDAY_START", "09:00")
+INTERVIEW_WORKDAY_END = os.getenv("INTERVIEW_WORKDAY_END", "17:00")
+INTERVIEW_TIME_ZONE = os.getenv("INTERVIEW_TIME_ZONE", "UTC")
+# Comma-separated weekday numbers, Monday=0.
+INTERVIEW_WORKDAYS = os.getenv("INTERVIEW_WORKDAYS", "0,1,2,3,4")
+INTERVIEW_SLOT_GRANULARITY_MINUTES = int(os.getenv("INTERVIEW_SLOT_GRANULARITY_MINUTES", "15"))
+INTERVIEW_SEARCH_DAYS = int(os.getenv("INTERVIEW_SEARCH_DAYS", "14"))
+
+# --- Email Drafting ---
+# Maximum number of emails drafted concurrently for one request.
+EMAIL_DRAFT_CONCURRENCY = int(os.getenv("EMAIL_DRAFT_CONCURRENCY", "8"))
+# Drafts are stored by a content key so the send step reuses the previewed email.
+# Set EMAIL_DRAFT_STORE_PATH to a SQLite file to keep drafts across restarts.
+EMAIL_DRAFT_MAX_ENTRIES = int(os.getenv("EMAIL_DRAFT_MAX_ENTRIES", "4096"))
+EMAIL_DRAFT_TTL_SECONDS = float(os.getenv("EMAIL_DRAFT_TTL_SECONDS", str(7 * 24 * 3600)))
+EMAIL_DRAFT_STORE_PATH = os.getenv("EMAIL_DRAFT_STORE_PATH")
+# "per_candidate" writes every email with its own model call. "template" renders emails
+# from one cached template per (job title, interview type, tone) and only asks the model
+# for short personal notes, EMAIL_PERSONALIZATION_BATCH_SIZE candidates per call.
+EMAIL_DRAFT_MODE = os.getenv("EMAIL_DRAFT_MODE", "per_candidate")
+EMAIL_INTERVIEW_TYPE = os.getenv("EMAIL_INTERVIEW_TYPE", "interview")
+EMAIL_TONE = os.getenv("EMAIL_TONE", "friendly")
+EMAIL_PERSONALIZATION = os.getenv("EMAIL_PERSONALIZATION", "true").lower() == "true"
+EMAIL_PERSONALIZATION_BATCH_SIZE = int(os.getenv("EMAIL_PERSONALIZATION_BATCH_SIZE", "25"))
+# Characters of each candidate's summary sent to the model for their personal note.
+EMAIL_PERSONALIZATION_SUMMARY_CHARS = int(os.getenv("EMAIL_PERSONALIZATION_SUMMARY_CHARS", "600"))
+EMAIL_TEMPLATE_MAX_ENTRIES = int(os.getenv("EMAIL_TEMPLATE_MAX_ENTRIES", "256"))
+
+# --- Email Outbox ---
+# Outgoing email is written to a SQLite outbox and delivered in batches by a background dispatcher.
+# "resend" needs RESEND_API_KEY; "fake" keeps messages in memory for tests and local development.
+EMAIL_PROVIDER = os.getenv("EMAIL_PROVIDER", "resend" if os.getenv("RESEND_API_KEY") else "fake")
+EMAIL_FROM = os.getenv("EMAIL_FROM", "ResumeRank <onboarding@resend.dev>")
+EMAIL_OUTBOX_PATH = os.getenv("EMAIL_OUTBOX_PATH", "var/email_outbox.sqlite3")
+EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "5"))
+EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS", "10"))
+# Messages per provider call (capped by the provider's own limit) and provider calls per second.
+EMAIL_SEND_BATCH_SIZE = int(os.getenv("EMAIL_SEND_BATCH_SIZE", "100"))
+EMAIL_SEND_RATE_PER_SECOND = float(os.getenv("EMAIL_SEND_RATE_PER_SECOND", "2"))
+# Run the dispatcher inside the API process; disable when `worker.py --dispatch-email` runs it instead.
+EMAIL_DISPATCHER_EMBEDDED = os.getenv("EMAIL_DISPATCHER_EMBEDDED", "true").lower() == "true"
+EMAIL_DISPATCHER_POLL_INTERVAL_SECONDS = float(os.getenv("EMAIL_DISPATCHER_POLL_INTERVAL_SECONDS", "1"))
+EMAIL_DISPATCHER_LEASE_SECONDS = float(os.getenv("EMAIL_DISPATCHER_LEASE_SECONDS", "60"))
+
+# --- Metrics & Tracing ---
+# Stage latencies, LLM usage and in-flight gauges are always collected and served on
+# GET /metrics (Prometheus text format). `worker.py --metrics-port` serves a worker's.
+# Trace spans per job and per candidate are only recorded when tracing is enabled.
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "false").lower() == "true"
+# Most recent finished spans kept in memory for GET /api/jobs/{job_id}/trace.
+TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "20000"))
+# Optional JSON-lines file every finished span is appended to (e.g. to collect spans from workers).
+TRACE_LOG_PATH = os.getenv("TRACE_LOG_PATH", "")
+
 # --- Application URLs ---
 # The URL where your Next.js frontend is running
 FRONTEND_URL = "http://localhost:9002"
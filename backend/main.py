@@ -2,39 +2,58 @@
 from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
 from fastapi.responses import RedirectResponse
 from typing import List
+import asyncio
 import uvicorn
 import os
 import resend
 import json
 import datetime
+import threading
+from contextlib import asynccontextmanager
 
 # Google Calendar
 from google_auth_oauthlib.flow import Flow
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request as GoogleAuthRequest
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 
 # Correctly import from the ai_logic module
 from ai_logic import rank_candidates_from_files, RankCandidatesOutput, CandidateRanking, draft_personalized_email
-from pydantic import BaseModel, Field
 import firebase_admin
 from firebase_admin import credentials, firestore
-
-app = FastAPI()
-
-# --- Pydantic Models ---
-class SelectionRequest(BaseModel):
-    count: int = Field(..., gt=0, description="The number of top candidates to select.")
+from models import SelectionRequest
+import config
+from services import bulk_delete, calendar, candidate_queries, credential_manager, slot_allocator
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Firebase is initialized in the background so the app serves requests right away.
+    warm_up = asyncio.create_task(asyncio.to_thread(get_db))
+    # Keeps the calendar token fresh in the background so requests never wait on a refresh.
+    await _credentials.start()
+    yield
+    await _credentials.stop()
+    await asyncio.gather(warm_up, return_exceptions=True)
+
+app = FastAPI(lifespan=lifespan)
 
 # --- Client Initialization ---
-if os.path.exists("serviceAccountKey.json"):
-    cred = credentials.Certificate("serviceAccountKey.json")
-    firebase_admin.initialize_app(cred)
-    db = firestore.client()
-else:
-    print("WARNING: serviceAccountKey.json not found. Firebase integration will be disabled.")
-    db = None
+# The Firestore client is created on first use rather than at import time.
+_db = None
+_db_initialized = False
+_db_lock = threading.Lock()
+
+def get_db():
+    """Returns the Firestore client, or None when serviceAccountKey.json is missing."""
+    global _db, _db_initialized
+    if not _db_initialized:
+        with _db_lock:
+            if not _db_initialized:
+                if os.path.exists("serviceAccountKey.json"):
+                    cred = credentials.Certificate("serviceAccountKey.json")
+                    firebase_admin.initialize_app(cred)
+                    _db = firestore.client()
+                else:
+                    print("WARNING: serviceAccountKey.json not found. Firebase integration will be disabled.")
+                _db_initialized = True
+    return _db
 
 if os.getenv("RESEND_API_KEY"):
     resend.api_key = os.getenv("RESEND_API_KEY")
@@ -44,6 +63,9 @@ else:
 # --- Google Calendar Integration ---
 CLIENT_SECRETS_FILE = "client_secret.json"
 SCOPES = ["https://www.googleapis.com/auth/calendar.events"]
+# This app has a single local user whose tokens live in token.json.
+LOCAL_USER = "local"
+_credentials = credential_manager.CredentialManager(credential_manager.FileTokenStore('token.json'))
 
 @app.get("/authorize")
 async def authorize():
@@ -65,11 +87,9 @@ async def oauth2callback(request: Request, state: str, code: str):
         CLIENT_SECRETS_FILE, scopes=SCOPES, state=state, redirect_uri=f"{os.getenv('BASE_URL', 'http://localhost:8000')}/oauth2callback"
     )
     flow.fetch_token(code=code)
-    credentials = flow.credentials
 
     # DANGER: For demonstration only. In a real app, securely store credentials per user.
-    with open('token.json', 'w') as token_file:
-        token_file.write(credentials.to_json())
+    await asyncio.to_thread(_credentials.put, LOCAL_USER, flow.credentials)
 
     return {"message": "Authorization successful! You can now close this window."}
 
@@ -79,28 +99,61 @@ async def oauth2callback(request: Request, state: str, code: str):
 def read_root():
     return {"message": "ResumeRank Python Backend is running!"}
 
+@app.post("/jobs/{job_id}/select-candidates", response_model=dict)
+async def select_candidates_endpoint(job_id: str, request: SelectionRequest):
+    """
+    Marks the scored candidates among the job's `count` best as 'contacted', ready for
+    interview scheduling. Candidates already contacted or scheduled, and unscored ones
+    (filtered, duplicate, extraction failed), are left as they are.
+    """
+    if request.count > config.CANDIDATE_PAGE_MAX_SIZE:
+        raise HTTPException(status_code=400, detail=f"count must be at most {config.CANDIDATE_PAGE_MAX_SIZE}.")
+    db = await asyncio.to_thread(get_db)
+    if not db:
+        raise HTTPException(status_code=503, detail="Firebase is not configured.")
+
+    candidates_ref = db.collection("jobs").document(job_id).collection("candidates")
+    # A score-ordered limit query reads only the selected documents, however large the job is.
+    top = await asyncio.to_thread(candidate_queries.top, candidates_ref, request.count)
+    selected = [c for c in top if candidate_queries.selectable(c)]
+    for start in range(0, len(selected), bulk_delete.MAX_BATCH_SIZE):
+        batch = db.batch()
+        for candidate in selected[start:start + bulk_delete.MAX_BATCH_SIZE]:
+            batch.update(candidates_ref.document(candidate["id"]), {"status": "contacted"})
+        await asyncio.to_thread(batch.commit)
+
+    return {
+        "message": f"Selected {len(selected)} of the top {len(top)} candidates.",
+        "selected": [
+            {"id": c["id"], "name": c.get("candidateName"), "suitabilityScore": c.get("suitabilityScore")}
+            for c in selected
+        ],
+        "skipped": [{"id": c["id"], "status": c.get("status")} for c in top if not candidate_queries.selectable(c)],
+    }
+
 @app.post("/jobs/{job_id}/schedule-interviews", response_model=dict)
 async def schedule_interviews_endpoint(job_id: str):
+    db = await asyncio.to_thread(get_db)
     if not db:
         raise HTTPException(status_code=503, detail="Firebase is not configured.")
 
-    creds = None
-    if os.path.exists('token.json'):
-        creds = Credentials.from_authorized_user_file('token.json', SCOPES)
-    
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
-            creds.refresh(GoogleAuthRequest())
-            with open('token.json', 'w') as token_file:
-                token_file.write(creds.to_json())
-        else:
-            raise HTTPException(
-                status_code=401, 
-                detail="User not authenticated. Please visit /authorize to grant calendar access."
-            )
+    # Served from memory; token.json is only read once and rewritten when a refresh changes it.
+    try:
+        creds = await _credentials.get_async(LOCAL_USER)
+    except credential_manager.CredentialsUnavailable as e:
+        raise HTTPException(status_code=503, detail=f"{e}. Please try again shortly.")
+    if not creds:
+        raise HTTPException(
+            status_code=401, 
+            detail="User not authenticated. Please visit /authorize to grant calendar access."
+        )
+
+    try:
+        policy = slot_allocator.SlotPolicy.from_config()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=f"Interview scheduling is misconfigured: {e}")
 
     try:
-        service = build('calendar', 'v3', credentials=creds)
         job_ref = db.collection("jobs").document(job_id)
         candidates_ref = job_ref.collection("candidates")
         contacted_candidates_query = candidates_ref.where("status", "==", "contacted").stream()
@@ -109,8 +162,7 @@ async def schedule_interviews_endpoint(job_id: str):
         failed_interviews = []
         batch = db.batch()
         
-        start_time = datetime.datetime.now(datetime.timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
-
+        to_schedule = []
         for doc in contacted_candidates_query:
             candidate = doc.to_dict()
             candidate_email = candidate.get("candidateEmail")
@@ -119,9 +171,20 @@ async def schedule_interviews_endpoint(job_id: str):
             if not candidate_email:
                 failed_interviews.append({"name": candidate_name, "reason": "Missing email."})
                 continue
-
-            end_time = start_time + datetime.timedelta(minutes=30)
-            event = {
+            to_schedule.append((doc, candidate_name, candidate_email))
+
+        # One free/busy query for the interviewer's calendar, then a non-overlapping slot per candidate.
+        earliest_start = datetime.datetime.now(datetime.timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        slots = await asyncio.to_thread(
+            slot_allocator.find_interview_slots, creds, len(to_schedule), earliest_start, calendar.query_busy, policy
+        )
+        for doc, candidate_name, _ in to_schedule[len(slots):]:
+            failed_interviews.append({"name": candidate_name, "reason": "No free interview slot in the search window."})
+        to_schedule = to_schedule[:len(slots)]
+
+        events = []
+        for (doc, candidate_name, candidate_email), (start_time, end_time) in zip(to_schedule, slots):
+            events.append({
                 'summary': f'Interview: {candidate_name}',
                 'location': 'Google Meet',
                 'description': 'Interview for the position.',
@@ -134,15 +197,17 @@ async def schedule_interviews_endpoint(job_id: str):
                         'conferenceSolutionKey': {'type': 'hangoutsMeet'}
                     }
                 }
-            }
+            })
 
-            try:
-                created_event = service.events().insert(calendarId='primary', body=event, conferenceDataVersion=1).execute()
+        # Insert all events through the cached client in batched requests (50 per round-trip).
+        results = await asyncio.to_thread(calendar.insert_events, creds, events, conference_data_version=1)
+        for (doc, candidate_name, _), result in zip(to_schedule, results):
+            if result["ok"]:
+                created_event = result["event"]
                 batch.update(doc.reference, {"status": "scheduled", "interviewLink": created_event.get('hangoutLink')})
                 scheduled_interviews.append({"name": candidate_name, "event_id": created_event.get('id')})
-                start_time = end_time
-            except HttpError as error:
-                failed_interviews.append({"name": candidate_name, "reason": str(error)})
+            else:
+                failed_interviews.append({"name": candidate_name, "reason": result["error"]})
         
         batch.commit()
         job_ref.update({"status": "scheduling_completed"})
@@ -154,6 +219,9 @@ async def schedule_interviews_endpoint(job_id: str):
             "scheduled": scheduled_interviews,
             "failed": failed_interviews
         }
+    except ValueError as e:
+        # Raised by the allocator when no slot can fit the policy's working hours.
+        raise HTTPException(status_code=409, detail=f"Interview scheduling is misconfigured: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
@@ -163,26 +231,19 @@ async def schedule_interviews_endpoint(job_id: str):
 
 @app.delete("/jobs/{job_id}", status_code=204)
 async def delete_job_endpoint(job_id: str):
+    db = await asyncio.to_thread(get_db)
     if not db:
         raise HTTPException(status_code=503, detail="Firebase is not configured.")
 
     job_ref = db.collection("jobs").document(job_id)
     
     try:
-        # Firestore does not support cascading deletes, so we must delete subcollections manually.
-        candidates_ref = job_ref.collection("candidates")
-        candidates_docs = candidates_ref.stream()
-
-        batch = db.batch()
-        deleted_candidates_count = 0
-        for doc in candidates_docs:
-            batch.delete(doc.reference)
-            deleted_candidates_count += 1
-        
-        # Delete the job document itself
-        batch.delete(job_ref)
-        
-        batch.commit()
+        # Firestore does not support cascading deletes, so the candidates subcollection is
+        # paged through and deleted in parallel batches before the job document itself.
+        deleted_candidates_count = await asyncio.to_thread(
+            bulk_delete.delete_job_tree, db, job_ref,
+            progress=bulk_delete.throttled(lambda n: print(f"Job {job_id}: deleted {n} candidates so far..."))
+        )
 
         print(f"Deleted job {job_id} and {deleted_candidates_count} associated candidates.")
         return  # Return a 204 No Content response
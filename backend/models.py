@@ -1,6 +1,6 @@
 # backend/models.py
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional
 
 # --- Candidate Models ---
@@ -11,6 +11,10 @@ class Candidate(BaseModel):
     suitabilityScore: float
     summary: str
 
+class SelectionRequest(BaseModel):
+    """Model for selecting a job's top-scored candidates."""
+    count: int = Field(..., gt=0, description="The number of top candidates to select.")
+
 # --- Job Management Models ---
 class JobCreate(BaseModel):
     """Pydantic model for creating a new job."""
@@ -22,18 +26,27 @@ class JobUpdate(BaseModel):
     title: Optional[str] = None
     jobDescription: Optional[str] = None
 
+class DeletionTask(BaseModel):
+    """Response body when a large job is deleted in the background (202)."""
+    taskId: str = Field(..., description="Background task removing the job; see GET /api/tasks/{task_id}.")
+    candidateCount: int = Field(..., description="Candidates the job had when deletion started.")
+
 # --- Email & Scheduling Models ---
 class EmailDraftRequest(BaseModel):
     """Model for the request to draft emails."""
     jobId: str
     interviewDatetime: str  # ISO 8601 format string
     candidateIds: List[str]
+    interviewType: Optional[str] = None  # Used with EMAIL_DRAFT_MODE=template
+    tone: Optional[str] = None
 
 class EmailSendRequest(BaseModel):
     """Model for the request to send emails and create calendar events."""
     jobId: str
     interviewDatetime: str
     candidateIds: List[str]
+    interviewType: Optional[str] = None  # Used with EMAIL_DRAFT_MODE=template
+    tone: Optional[str] = None
 
 class DraftedEmail(BaseModel):
     """Model for a single drafted email to be returned to the frontend."""
@@ -41,6 +54,9 @@ class DraftedEmail(BaseModel):
     candidateEmail: EmailStr
     subject: str
     body: str
+    candidateId: Optional[str] = None
+    draftId: Optional[str] = None  # Content key; the send step reuses the draft stored under it
+    interviewTime: Optional[str] = None
 
 # --- Google Auth Models ---
 class AuthURL(BaseModel):
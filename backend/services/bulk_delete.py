@@ -0,0 +1,78 @@
+# backend/services/bulk_delete.py
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, List, Optional
+
+import config
+
+# Firestore rejects batched writes with more than 500 operations.
+MAX_BATCH_SIZE = 500
+
+ProgressCallback = Callable[[int], None]
+
+
+def _delete_refs(client, refs: List) -> int:
+    batch = client.batch()
+    for ref in refs:
+        batch.delete(ref)
+    batch.commit()
+    return len(refs)
+
+def delete_collection(client, coll_ref, page_size: Optional[int] = None, parallelism: Optional[int] = None,
+                      progress: Optional[ProgressCallback] = None) -> int:
+    """
+    Deletes every document in a collection and returns how many were deleted.
+
+    Document names are paged through with a cursor (only `__name__` is fetched), and
+    each page is deleted as one batch on a thread pool while the next page is read,
+    with at most `parallelism` batches in flight. `progress` is called with the
+    running total after every committed batch.
+    """
+    page_size = min(page_size or config.BULK_DELETE_PAGE_SIZE, MAX_BATCH_SIZE)
+    parallelism = parallelism or config.BULK_DELETE_PARALLELISM
+    base_query = coll_ref.order_by('__name__').select(['__name__']).limit(page_size)
+    deleted = 0
+
+    def collect(done):
+        nonlocal deleted
+        for future in done:
+            deleted += future.result()
+            if progress:
+                progress(deleted)
+
+    with ThreadPoolExecutor(max_workers=parallelism, thread_name_prefix="bulk-delete") as pool:
+        in_flight = set()
+        cursor = None
+        while True:
+            query = base_query.start_after(cursor) if cursor is not None else base_query
+            docs = list(query.stream())
+            if not docs:
+                break
+            cursor = docs[-1]
+            in_flight.add(pool.submit(_delete_refs, client, [doc.reference for doc in docs]))
+            if len(in_flight) >= parallelism:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            if len(docs) < page_size:
+                break
+        done, _ = wait(in_flight)
+        collect(done)
+    return deleted
+
+def delete_job_tree(client, job_ref, progress: Optional[ProgressCallback] = None) -> int:
+    """Deletes a job's 'candidates' subcollection and then the job document itself."""
+    deleted = delete_collection(client, job_ref.collection('candidates'), progress=progress)
+    job_ref.delete()
+    return deleted
+
+def throttled(callback: ProgressCallback, interval_seconds: float = 2.0) -> ProgressCallback:
+    """Wraps a progress callback so it runs at most once per `interval_seconds`."""
+    last = [0.0]
+
+    def wrapper(deleted: int):
+        now = time.monotonic()
+        if now - last[0] >= interval_seconds:
+            last[0] = now
+            callback(deleted)
+    return wrapper
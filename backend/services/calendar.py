@@ -1,28 +1,137 @@
-from typing import Dict
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 import logging
 
+# The Calendar API accepts at most 50 requests in one batch call.
+MAX_BATCH_SIZE = 50
+# Upper bound on the number of per-user service clients kept in memory.
+MAX_CACHED_SERVICES = 256
+
+# Per-user service clients, most recently used last. Each entry carries a lock because the
+# underlying HTTP transport is not thread-safe.
+_services: "OrderedDict[str, tuple]" = OrderedDict()
+_services_lock = threading.Lock()
+
+
+def _user_key(user_credentials: Union[Dict, Credentials]) -> str:
+    if isinstance(user_credentials, Credentials):
+        identity = f"{user_credentials.client_id}:{user_credentials.refresh_token or user_credentials.token}"
+    else:
+        identity = f"{user_credentials.get('client_id')}:{user_credentials.get('refresh_token') or user_credentials.get('token')}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+def _get_service_entry(user_credentials: Union[Dict, Credentials]) -> tuple:
+    key = _user_key(user_credentials)
+    with _services_lock:
+        entry = _services.get(key)
+        if entry is not None:
+            _services.move_to_end(key)
+            return entry
+
+    creds = user_credentials if isinstance(user_credentials, Credentials) else Credentials.from_authorized_user_info(user_credentials)
+    # The discovery document is bundled with the client library, so skip the on-disk discovery cache.
+    service = build('calendar', 'v3', credentials=creds, cache_discovery=False)
+    with _services_lock:
+        entry = _services.setdefault(key, (service, threading.Lock()))
+        _services.move_to_end(key)
+        while len(_services) > MAX_CACHED_SERVICES:
+            _services.popitem(last=False)
+    return entry
+
+def get_calendar_service(user_credentials: Union[Dict, Credentials]):
+    """Returns the cached Calendar API client for a user, building it on first use."""
+    return _get_service_entry(user_credentials)[0]
+
+def invalidate_calendar_service(user_credentials: Union[Dict, Credentials]):
+    """Drops a user's cached client, e.g. after their tokens were revoked or replaced."""
+    with _services_lock:
+        _services.pop(_user_key(user_credentials), None)
+
+def _parse_rfc3339(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def query_busy(user_credentials: Union[Dict, Credentials], time_min: datetime, time_max: datetime,
+               calendar_id: str = 'primary') -> List[Tuple[datetime, datetime]]:
+    """Returns the busy intervals of a calendar between two instants, from a single free/busy query."""
+    service, lock = _get_service_entry(user_credentials)
+    body = {
+        'timeMin': time_min.isoformat(),
+        'timeMax': time_max.isoformat(),
+        'items': [{'id': calendar_id}],
+    }
+    with lock:
+        response = service.freebusy().query(body=body).execute()
+    busy = response.get('calendars', {}).get(calendar_id, {}).get('busy', [])
+    return [(_parse_rfc3339(b['start']), _parse_rfc3339(b['end'])) for b in busy]
+
+def build_event_body(event_details: Dict) -> Dict:
+    """Converts the app's event details into a Calendar API event resource."""
+    return {
+        'summary': event_details.get('summary'),
+        'description': event_details.get('description'),
+        'start': {'dateTime': event_details.get('start_time'), 'timeZone': 'UTC'},
+        'end': {'dateTime': event_details.get('end_time'), 'timeZone': 'UTC'},
+        'attendees': [{'email': email} for email in event_details.get('attendees', [])],
+    }
+
 def create_calendar_event(user_credentials: Dict, event_details: Dict) -> Dict:
     """
     Creates an event on the user's primary Google Calendar.
     """
     try:
-        creds = Credentials.from_authorized_user_info(user_credentials)
-        service = build('calendar', 'v3', credentials=creds)
-
-        event_body = {
-            'summary': event_details.get('summary'),
-            'description': event_details.get('description'),
-            'start': {'dateTime': event_details.get('start_time'), 'timeZone': 'UTC'},
-            'end': {'dateTime': event_details.get('end_time'), 'timeZone': 'UTC'},
-            'attendees': [{'email': email} for email in event_details.get('attendees', [])],
-        }
-
-        created_event = service.events().insert(calendarId='primary', body=event_body).execute()
-        
+        service, lock = _get_service_entry(user_credentials)
+        with lock:
+            created_event = service.events().insert(calendarId='primary', body=build_event_body(event_details)).execute()
+
         return created_event
 
     except Exception as e:
         logging.error(f"Error creating calendar event: {e}")
         raise
+
+def insert_events(user_credentials: Union[Dict, Credentials], event_bodies: List[Dict],
+                  conference_data_version: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Inserts many event resources on the user's primary calendar using batch requests
+    (up to MAX_BATCH_SIZE inserts per HTTP round-trip).
+
+    Returns one result per input, in order: {"ok": True, "event": {...}} on success or
+    {"ok": False, "error": "..."} when that particular insert failed.
+    """
+    service, lock = _get_service_entry(user_credentials)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(event_bodies)
+
+    def on_response(request_id, response, exception):
+        index = int(request_id)
+        if exception is not None:
+            results[index] = {"ok": False, "error": str(exception)}
+        else:
+            results[index] = {"ok": True, "event": response}
+
+    insert_kwargs = {'conferenceDataVersion': conference_data_version} if conference_data_version is not None else {}
+    for start in range(0, len(event_bodies), MAX_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        for index in range(start, min(start + MAX_BATCH_SIZE, len(event_bodies))):
+            batch.add(
+                service.events().insert(calendarId='primary', body=event_bodies[index], **insert_kwargs),
+                request_id=str(index)
+            )
+        try:
+            with lock:
+                batch.execute()
+        except Exception as e:
+            logging.error(f"Error executing calendar batch: {e}")
+            for index in range(start, min(start + MAX_BATCH_SIZE, len(event_bodies))):
+                if results[index] is None:
+                    results[index] = {"ok": False, "error": str(e)}
+    return results
+
+def create_calendar_events(user_credentials: Union[Dict, Credentials], events_details: List[Dict]) -> List[Dict[str, Any]]:
+    """Batched variant of `create_calendar_event`; see `insert_events` for the result format."""
+    return insert_events(user_credentials, [build_event_body(details) for details in events_details])
@@ -0,0 +1,69 @@
+# backend/services/candidate_queries.py
+#
+# Score-ordered reads of a job's candidates. Queries order by suitabilityScore (then
+# document ID, so ties have a stable order) and are served by Firestore's single-field
+# index, so a page or a top-K selection reads only the documents it returns.
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud.firestore_v1 import Query
+
+import config
+
+SCORE_FIELD = 'suitabilityScore'
+
+# Candidates stored without a model score (services.ingestion); never selected for interviews.
+UNSCORED_STATUSES = ('filtered', 'duplicate', 'extraction_failed')
+# Candidates already on their way to an interview.
+SELECTED_STATUSES = ('contacted', 'scheduled')
+
+
+def encode_cursor(score: float, candidate_id: str) -> str:
+    """Opaque cursor for the position right after the given candidate."""
+    raw = json.dumps([score, candidate_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    """Inverse of `encode_cursor`; raises ValueError for a malformed cursor."""
+    try:
+        score, candidate_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor.") from None
+    if not isinstance(score, (int, float)) or not isinstance(candidate_id, str):
+        raise ValueError("Invalid cursor.")
+    return score, candidate_id
+
+def score_ordered(candidates_ref):
+    """Candidates, best score first; ties are broken by document ID."""
+    return candidates_ref.order_by(SCORE_FIELD, direction=Query.DESCENDING) \
+        .order_by('__name__', direction=Query.DESCENDING)
+
+def page(candidates_ref, limit: Optional[int] = None,
+         cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Returns up to `limit` candidates in score order starting after `cursor`, and the
+    cursor for the next page (None on the last page). One extra document is read to
+    tell whether another page exists.
+    """
+    limit = max(1, min(limit or config.CANDIDATE_PAGE_SIZE, config.CANDIDATE_PAGE_MAX_SIZE))
+    query = score_ordered(candidates_ref)
+    if cursor:
+        score, candidate_id = decode_cursor(cursor)
+        query = query.start_after({SCORE_FIELD: score, '__name__': candidate_id})
+    docs = list(query.limit(limit + 1).stream())
+    candidates = [{"id": doc.id, **doc.to_dict()} for doc in docs[:limit]]
+    next_cursor = None
+    if len(docs) > limit:
+        last = candidates[-1]
+        next_cursor = encode_cursor(last[SCORE_FIELD], last["id"])
+    return candidates, next_cursor
+
+def top(candidates_ref, count: int) -> List[Dict[str, Any]]:
+    """The `count` best-scored candidates; reads only those documents."""
+    return [{"id": doc.id, **doc.to_dict()} for doc in score_ordered(candidates_ref).limit(count).stream()]
+
+def selectable(candidate: Dict[str, Any]) -> bool:
+    """Whether a candidate can be selected for an interview: scored and not selected already."""
+    return candidate.get('status') not in UNSCORED_STATUSES + SELECTED_STATUSES
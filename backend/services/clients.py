@@ -0,0 +1,57 @@
+# backend/services/clients.py
+#
+# Lifecycle of the process's external clients. Firestore and Gemini clients are created
+# lazily by their own modules (firestore_client.get_client, llm_gateway.get_gateway), so
+# importing the app needs no credentials and a new instance answers health checks at
+# once. The API and worker lifespans call `start` to create them in the background
+# and `stop` to close them on shutdown.
+
+import asyncio
+import time
+from typing import Callable, Dict, Optional
+
+from services import llm_gateway
+import services.firestore_client as db
+import config
+
+# Client name -> function that creates it (or returns it if it already exists).
+PROVIDERS: Dict[str, Callable[[], object]] = {
+    "firestore": lambda: db.get_client(),
+    "gemini": lambda: llm_gateway.get_gateway(),
+}
+
+_warm_up_task: Optional[asyncio.Task] = None
+_timings: Dict[str, Dict] = {}
+
+
+def warm_up(names=None) -> Dict[str, Dict]:
+    """
+    Creates the named clients (all by default) and records how long each took. A client
+    that fails to initialize is reported, not raised; it is created again on first use.
+    """
+    for name in names or PROVIDERS:
+        started = time.perf_counter()
+        try:
+            PROVIDERS[name]()
+            _timings[name] = {"ready": True, "seconds": round(time.perf_counter() - started, 3)}
+        except Exception as e:
+            print(f"Initializing the {name} client failed: {e}")
+            _timings[name] = {"ready": False, "seconds": round(time.perf_counter() - started, 3), "error": str(e)}
+    return dict(_timings)
+
+async def start():
+    """Warms up the clients in the background (WARM_UP_CLIENTS) without delaying startup."""
+    global _warm_up_task
+    if config.WARM_UP_CLIENTS:
+        _warm_up_task = asyncio.create_task(asyncio.to_thread(warm_up))
+
+async def stop():
+    global _warm_up_task
+    if _warm_up_task is not None:
+        # The thread cannot be interrupted; wait so the client is not created after it was closed.
+        await asyncio.gather(_warm_up_task, return_exceptions=True)
+        _warm_up_task = None
+    db.close()
+
+def stats() -> Dict[str, Dict]:
+    return dict(_timings)
@@ -0,0 +1,246 @@
+# backend/services/credential_manager.py
+#
+# Per-user Google OAuth credentials kept ready to use in memory. Tokens are read from
+# storage once per process, refreshed in the background before they expire, and written
+# back only when the refresh actually changed them, so calendar and email requests
+# neither read storage nor wait on a token refresh.
+
+import asyncio
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Union
+
+from google.auth.exceptions import RefreshError
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.credentials import Credentials
+
+import config
+
+
+def tokens_of(credentials: Credentials) -> Dict:
+    """Storable form of credentials, including the access token's expiry."""
+    return json.loads(credentials.to_json())
+
+
+class CredentialsUnavailable(Exception):
+    """The user's token could not be refreshed right now (network, 5xx); retry later."""
+
+
+class TokenStore:
+    """Where a user's OAuth tokens are persisted."""
+
+    def load(self, user_id: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def save(self, user_id: str, tokens: Dict):
+        raise NotImplementedError
+
+
+class FirestoreTokenStore(TokenStore):
+    """Tokens in the user's Firestore document (services.firestore_client)."""
+
+    def load(self, user_id: str) -> Optional[Dict]:
+        # Imported here so file-backed users of this module don't initialize Firebase.
+        import services.firestore_client as db
+        return db.get_user_tokens(user_id)
+
+    def save(self, user_id: str, tokens: Dict):
+        import services.firestore_client as db
+        db.store_user_tokens(user_id, tokens)
+
+
+class FileTokenStore(TokenStore):
+    """Tokens for a single local user in a JSON file such as token.json."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self, user_id: str) -> Optional[Dict]:
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            return json.load(f)
+
+    def save(self, user_id: str, tokens: Dict):
+        # Write-then-rename so a reader never sees a half-written file.
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(tokens, f)
+        os.replace(tmp_path, self.path)
+
+
+@dataclass
+class _Entry:
+    credentials: Credentials
+    persisted: Dict
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class CredentialManager:
+    """
+    Caches one Credentials object per user and keeps it fresh.
+
+    `get` serves cached credentials without I/O. Loads and refreshes for a user run
+    under that user's lock, so concurrent callers share one storage read or one
+    token refresh instead of each doing their own. A background task (`start`)
+    refreshes credentials that expire within `refresh_ahead_seconds`; `get` only
+    refreshes inline if a token has already expired, e.g. right after startup.
+    Credentials are refreshed in place, so Calendar clients built on them
+    (services.calendar) keep working without being rebuilt.
+    """
+
+    def __init__(self, store: TokenStore, refresh_ahead_seconds: Optional[float] = None,
+                 check_interval: Optional[float] = None):
+        self.store = store
+        self.refresh_ahead = timedelta(seconds=config.CREDENTIALS_REFRESH_AHEAD_SECONDS
+                                       if refresh_ahead_seconds is None else refresh_ahead_seconds)
+        self.check_interval = config.CREDENTIALS_REFRESH_CHECK_SECONDS if check_interval is None else check_interval
+        self._entries: Dict[str, _Entry] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._transport = GoogleAuthRequest()
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"hits": 0, "loads": 0, "refreshes": 0, "backgroundRefreshes": 0,
+                          "refreshFailures": 0, "writes": 0}
+
+    def _load_lock(self, user_id: str) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(user_id, threading.Lock())
+
+    def cached(self, user_id: str) -> Optional[Credentials]:
+        """Cached credentials that need no refresh, or None; never blocks."""
+        entry = self._entries.get(user_id)
+        if entry is not None and not entry.credentials.expired:
+            self._counters["hits"] += 1
+            return entry.credentials
+        return None
+
+    def get(self, user_id: str) -> Optional[Credentials]:
+        """
+        Ready-to-use credentials for the user, or None if they have not connected or were
+        revoked. Raises CredentialsUnavailable if an expired token could not be refreshed
+        for a transient reason.
+        """
+        credentials = self.cached(user_id)
+        if credentials is not None:
+            return credentials
+
+        with self._load_lock(user_id):
+            entry = self._entries.get(user_id)
+            if entry is None:
+                tokens = self.store.load(user_id)
+                self._counters["loads"] += 1
+                if not tokens:
+                    return None
+                entry = _Entry(Credentials.from_authorized_user_info(tokens), tokens)
+                with self._lock:
+                    self._entries[user_id] = entry
+        if entry.credentials.expired and not self._refresh(user_id, entry):
+            return None
+        return entry.credentials
+
+    async def get_async(self, user_id: str) -> Optional[Credentials]:
+        """`get` for the event loop; the common cached case does not leave the loop."""
+        return self.cached(user_id) or await asyncio.to_thread(self.get, user_id)
+
+    def put(self, user_id: str, credentials: Union[Credentials, Dict]):
+        """Stores new credentials (e.g. from the OAuth callback) and caches them."""
+        if not isinstance(credentials, Credentials):
+            credentials = Credentials.from_authorized_user_info(credentials)
+        tokens = tokens_of(credentials)
+        self.store.save(user_id, tokens)
+        self._counters["writes"] += 1
+        with self._lock:
+            self._entries[user_id] = _Entry(credentials, tokens)
+
+    def forget(self, user_id: str):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def _due(self, credentials: Credentials) -> bool:
+        if not credentials.refresh_token:
+            return False
+        # Tokens stored without an expiry are refreshed once to learn it.
+        if credentials.expiry is None:
+            return True
+        # google-auth keeps expiry as a naive UTC datetime.
+        return credentials.expiry - datetime.now(timezone.utc).replace(tzinfo=None) <= self.refresh_ahead
+
+    def _refresh(self, user_id: str, entry: _Entry, only_if_due: bool = False) -> bool:
+        """
+        Refreshes under the entry's lock; a caller that waited for another thread's
+        refresh finds the token fresh and returns without refreshing again. Returns
+        False if the grant was revoked, and raises CredentialsUnavailable if the refresh
+        failed for any other reason (the cached credentials are kept for a retry).
+        """
+        with entry.lock:
+            credentials = entry.credentials
+            if not (self._due(credentials) if only_if_due else credentials.expired):
+                return True
+            try:
+                credentials.refresh(self._transport)
+            except RefreshError as e:
+                # The grant was revoked or expired: the user has to connect again.
+                print(f"Refreshing Google credentials for {user_id} failed: {e}")
+                self._counters["refreshFailures"] += 1
+                self.forget(user_id)
+                return False
+            except Exception as e:
+                print(f"Refreshing Google credentials for {user_id} failed, will retry: {e}")
+                self._counters["refreshFailures"] += 1
+                raise CredentialsUnavailable(f"Google credentials could not be refreshed: {e}") from e
+            self._counters["refreshes"] += 1
+            tokens = tokens_of(credentials)
+            if tokens != entry.persisted:
+                self.store.save(user_id, tokens)
+                entry.persisted = tokens
+                self._counters["writes"] += 1
+            return True
+
+    def refresh_due(self) -> int:
+        """Refreshes every cached credential that expires within the look-ahead window."""
+        refreshed = 0
+        for user_id, entry in list(self._entries.items()):
+            try:
+                if self._due(entry.credentials) and self._refresh(user_id, entry, only_if_due=True):
+                    refreshed += 1
+            except CredentialsUnavailable:
+                continue  # Tried again on the next check, or inline once the token expires.
+        self._counters["backgroundRefreshes"] += refreshed
+        return refreshed
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh_due)
+            except Exception as e:
+                print(f"Background credential refresh failed: {e}")
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> Dict:
+        return {**self._counters, "users": len(self._entries)}
+
+
+_manager: Optional[CredentialManager] = None
+_manager_lock = threading.Lock()
+
+def get_manager() -> CredentialManager:
+    """Returns the process-wide manager for tokens stored in Firestore."""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = CredentialManager(FirestoreTokenStore())
+    return _manager
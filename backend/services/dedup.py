@@ -0,0 +1,216 @@
+# backend/services/dedup.py
+#
+# Per-job near-duplicate detection for resumes. Each resume gets a MinHash signature
+# over its word shingles; signatures are split into LSH bands and stored in SQLite, so
+# finding the resumes similar to a new one only reads the few rows that share one of
+# its band buckets, however many candidates the job has.
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+import config
+
+SHINGLE_SIZE = 5
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _permutations(num_perm: int) -> Tuple[np.ndarray, np.ndarray]:
+    # Fixed seed: signatures are persisted, so the hash family must never change.
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+    return a, b
+
+_perm_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Overlapping word n-grams of the lower-cased text (the whole text if it is shorter)."""
+    words = _WORD_PATTERN.findall((text or "").lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash_signature(text: str, num_perm: Optional[int] = None) -> np.ndarray:
+    """MinHash signature (uint32 per permutation) of the text's word shingles."""
+    num_perm = num_perm or config.DEDUP_NUM_PERM
+    if num_perm not in _perm_cache:
+        _perm_cache[num_perm] = _permutations(num_perm)
+    a, b = _perm_cache[num_perm]
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles(text)), dtype=np.uint64)
+    if hashes.size == 0:
+        return np.full(num_perm, int(_MAX_HASH), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        permuted = ((np.outer(hashes, a) + b) % _MERSENNE_PRIME) & _MAX_HASH
+    return permuted.min(axis=0).astype(np.uint32)
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return float(np.mean(first == second))
+
+def _best_match(signature: np.ndarray, others: Iterable[Tuple[str, np.ndarray]],
+                threshold: float) -> Optional[Tuple[str, float]]:
+    best: Optional[Tuple[str, float]] = None
+    for other_id, other in others:
+        similarity = estimate_similarity(signature, other)
+        if similarity >= threshold and (best is None or similarity > best[1]):
+            best = (other_id, similarity)
+    return best
+
+def band_hashes(signature: np.ndarray, bands: int) -> List[int]:
+    """One bucket hash per LSH band; similar signatures share at least one with high probability."""
+    rows = len(signature) // bands
+    return [zlib.crc32(signature[i * rows:(i + 1) * rows].tobytes()) for i in range(bands)]
+
+
+class DedupIndex:
+    """LSH index of MinHash signatures, partitioned by job, stored in a local SQLite file."""
+
+    def __init__(self, path: str, num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.path = path
+        self.num_perm = num_perm
+        self.bands = bands
+        self._local = threading.local()
+        self._counters = {"lookups": 0, "duplicates": 0, "candidatesCompared": 0}
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                "job_id TEXT NOT NULL, candidate_id TEXT NOT NULL, signature BLOB NOT NULL, created_at REAL NOT NULL, "
+                "PRIMARY KEY (job_id, candidate_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                "job_id TEXT NOT NULL, band INTEGER NOT NULL, bucket INTEGER NOT NULL, candidate_id TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_lookup ON buckets(job_id, band, bucket)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_buckets_candidate ON buckets(job_id, candidate_id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait instead of failing mid-transaction.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def find(self, job_id: str, candidate_id: str, signature: np.ndarray,
+             threshold: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """
+        Returns (original_candidate_id, similarity) when the job already has a resume at
+        least `threshold` similar, else None. Matching a candidate against its own
+        earlier entry (e.g. a re-uploaded job) is not a duplicate.
+        """
+        threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        buckets = band_hashes(signature, self.bands)
+        probes = ", ".join(["(?, ?)"] * self.bands)
+        rows = self._connection().execute(
+            f"WITH probe(band, bucket) AS (VALUES {probes}) "
+            "SELECT DISTINCT s.candidate_id, s.signature FROM probe "
+            "JOIN buckets b ON b.job_id = ? AND b.band = probe.band AND b.bucket = probe.bucket "
+            "JOIN signatures s ON s.job_id = b.job_id AND s.candidate_id = b.candidate_id "
+            "WHERE b.candidate_id != ?",
+            [v for pair in enumerate(buckets) for v in pair] + [job_id, candidate_id]
+        ).fetchall()
+        self._counters["lookups"] += 1
+        self._counters["candidatesCompared"] += len(rows)
+        best = _best_match(signature, ((other_id, np.frombuffer(blob, dtype=np.uint32)) for other_id, blob in rows),
+                           threshold)
+        if best is not None:
+            self._counters["duplicates"] += 1
+        return best
+
+    def add(self, job_id: str, signatures: Dict[str, np.ndarray]):
+        """
+        Indexes candidates of a job by ID. Called once their documents are stored, so
+        the index never points later uploads at a candidate that was not written.
+        """
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO signatures (job_id, candidate_id, signature, created_at) VALUES (?, ?, ?, ?)",
+                [(job_id, candidate_id, signature.astype(np.uint32).tobytes(), time.time())
+                 for candidate_id, signature in signatures.items()]
+            )
+            conn.executemany("DELETE FROM buckets WHERE job_id = ? AND candidate_id = ?",
+                             [(job_id, candidate_id) for candidate_id in signatures])
+            conn.executemany(
+                "INSERT INTO buckets (job_id, band, bucket, candidate_id) VALUES (?, ?, ?, ?)",
+                [(job_id, band, bucket, candidate_id) for candidate_id, signature in signatures.items()
+                 for band, bucket in enumerate(band_hashes(signature, self.bands))]
+            )
+
+    def remove(self, job_id: str, candidate_ids: Iterable[str]):
+        """Forgets deleted candidates so later uploads of the same resume are scored again."""
+        ids = [(job_id, candidate_id) for candidate_id in candidate_ids]
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM signatures WHERE job_id = ? AND candidate_id = ?", ids)
+            conn.executemany("DELETE FROM buckets WHERE job_id = ? AND candidate_id = ?", ids)
+
+    def drop_job(self, job_id: str):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM signatures WHERE job_id = ?", (job_id,))
+            conn.execute("DELETE FROM buckets WHERE job_id = ?", (job_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        (indexed,) = self._connection().execute("SELECT COUNT(*) FROM signatures").fetchone()
+        return {**self._counters, "indexedResumes": indexed, "numPerm": self.num_perm, "bands": self.bands}
+
+
+class SignatureBatch:
+    """
+    In-memory LSH buckets for the resumes of one upload, so copies within the upload are
+    caught before any of them is added to the index.
+    """
+
+    def __init__(self, bands: int):
+        self.bands = bands
+        self.signatures: Dict[str, np.ndarray] = {}
+        self._buckets: Dict[Tuple[int, int], List[str]] = defaultdict(list)
+
+    def find(self, signature: np.ndarray, threshold: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        threshold = config.DEDUP_THRESHOLD if threshold is None else threshold
+        candidate_ids = {candidate_id for band, bucket in enumerate(band_hashes(signature, self.bands))
+                         for candidate_id in self._buckets.get((band, bucket), ())}
+        return _best_match(signature, ((c, self.signatures[c]) for c in candidate_ids), threshold)
+
+    def add(self, candidate_id: str, signature: np.ndarray):
+        self.signatures[candidate_id] = signature
+        for band, bucket in enumerate(band_hashes(signature, self.bands)):
+            self._buckets[(band, bucket)].append(candidate_id)
+
+
+_index: Optional[DedupIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> DedupIndex:
+    """Returns the process-wide dedup index, configured from `config`."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                os.makedirs(os.path.dirname(os.path.abspath(config.DEDUP_INDEX_PATH)), exist_ok=True)
+                _index = DedupIndex(config.DEDUP_INDEX_PATH, num_perm=config.DEDUP_NUM_PERM, bands=config.DEDUP_BANDS)
+    return _index
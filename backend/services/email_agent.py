@@ -1,24 +1,15 @@
-import os
-import google.generativeai as genai
-from typing import Dict
+import json
+from typing import Dict, List, Optional, Tuple
 
-# Get the Gemini API key from environment variables
-gemini_api_key = os.getenv("GEMINI_API_KEY")
+from services import email_templates, llm_gateway
 
-# Configure the Gemini API
-genai.configure(api_key=gemini_api_key)
+# Gemini model used for drafting; calls go through services.llm_gateway.
+MODEL_NAME = 'gemini-pro'
+# Bump when the prompt below changes so stored drafts are regenerated.
+PROMPT_VERSION = '1'
 
-# Create a Gemini model instance
-model = genai.GenerativeModel('gemini-pro')
-
-def draft_email(job_details: Dict, candidate_details: Dict, interview_time: str) -> Dict:
-    """
-    Uses the Gemini LLM to draft a personalized interview confirmation email.
-    """
-    job_title = job_details.get("title", "the role")
-    candidate_name = candidate_details.get("candidateName", "there")
-
-    prompt = f"""
+def _build_prompt(job_title: str, candidate_name: str, interview_time: str) -> str:
+    return f"""
     Draft a friendly and professional email to a candidate named {candidate_name} inviting them to an interview for the {job_title} position.
 
     The interview is scheduled for {interview_time}.
@@ -34,16 +25,17 @@ def draft_email(job_details: Dict, candidate_details: Dict, interview_time: str)
     Return a JSON object with two keys: "subject" and "body".
     """
 
-    try:
-        response = model.generate_content(prompt)
-        cleaned_response = response.text.strip().replace('```json', '').replace('```', '')
-        return json.loads(cleaned_response)
-    except Exception as e:
-        print(f"Error drafting email with Gemini: {e}")
-        # Fallback to a default template
-        return {
-            "subject": f"Interview Invitation for the {job_title} Position at ResumeRank",
-            "body": f"""Hi {candidate_name},
+def _parse_response(text: str) -> Dict:
+    cleaned_response = text.strip().replace('```json', '').replace('```', '')
+    email = json.loads(cleaned_response)
+    if not isinstance(email, dict) or not email.get("subject") or not email.get("body"):
+        raise ValueError("Model response is missing the subject or body.")
+    return email
+
+def _fallback_email(job_title: str, candidate_name: str, interview_time: str) -> Dict:
+    return {
+        "subject": f"Interview Invitation for the {job_title} Position at ResumeRank",
+        "body": f"""Hi {candidate_name},
 
 Thank you for your application for the {job_title} position. Our team was impressed with your background.
 
@@ -56,4 +48,49 @@ Please let us know if this time works for you.
 Best regards,
 The Hiring Team
 ResumeRank"""
-        }
+    }
+
+def draft_email(job_details: Dict, candidate_details: Dict, interview_time: str) -> Dict:
+    """
+    Uses the Gemini LLM to draft a personalized interview confirmation email.
+    """
+    job_title = job_details.get("title", "the role")
+    candidate_name = candidate_details.get("candidateName", "there")
+
+    try:
+        response = llm_gateway.generate_sync(MODEL_NAME, _build_prompt(job_title, candidate_name, interview_time))
+        return _parse_response(response.text)
+    except Exception as e:
+        print(f"Error drafting email with Gemini: {e}")
+        # Fallback to a default template
+        return _fallback_email(job_title, candidate_name, interview_time)
+
+async def draft_email_async(job_details: Dict, candidate_details: Dict, interview_time: str) -> Tuple[Dict, bool]:
+    """
+    Non-blocking variant of `draft_email`. Returns the email and whether it came from
+    the model (False means the default template was used after an error).
+    """
+    job_title = job_details.get("title", "the role")
+    candidate_name = candidate_details.get("candidateName", "there")
+
+    try:
+        response = await llm_gateway.generate(MODEL_NAME, _build_prompt(job_title, candidate_name, interview_time))
+        return _parse_response(response.text), True
+    except Exception as e:
+        print(f"Error drafting email with Gemini: {e}")
+        return _fallback_email(job_title, candidate_name, interview_time), False
+
+
+# --- Template-first drafting ---
+async def _generate_text(prompt: str) -> str:
+    response = await llm_gateway.generate(MODEL_NAME, prompt)
+    return response.text
+
+async def draft_emails_from_template(job_details: Dict, items: List[Tuple[Dict, str]],
+                                     interview_type: Optional[str] = None, tone: Optional[str] = None,
+                                     personalize: Optional[bool] = None) -> List[Tuple[Dict, bool]]:
+    """Template-first drafting with this module's model; see `email_templates.draft_from_template`."""
+    return await email_templates.draft_from_template(
+        _generate_text, MODEL_NAME, job_details.get("title", "the role"), items,
+        interview_type=interview_type, tone=tone, personalize=personalize
+    )
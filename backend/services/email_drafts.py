@@ -0,0 +1,91 @@
+# backend/services/email_drafts.py
+
+import asyncio
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import email_agent, email_templates
+from services.scoring_cache import ScoringCache, content_key
+import config
+
+
+def draft_key(job_id: str, job: Dict[str, Any], candidate_id: str, candidate: Dict[str, Any], interview_time: str,
+              style: str = "") -> str:
+    """
+    Content key of a draft. It changes whenever anything the email is written from
+    changes (job title, candidate name or email, interview time, drafting style, model
+    or prompt), so a stored draft is only reused when it is still accurate.
+    """
+    return content_key(job_id, job.get("title") or "", candidate_id, candidate.get("candidateName") or "",
+                       candidate.get("candidateEmail") or "", interview_time, style,
+                       email_agent.MODEL_NAME, email_agent.PROMPT_VERSION, email_templates.TEMPLATE_PROMPT_VERSION)
+
+
+_store: Optional[ScoringCache] = None
+_store_lock = threading.Lock()
+
+def get_store() -> ScoringCache:
+    """Returns the process-wide draft store, configured from `config`."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ScoringCache(
+                    max_entries=config.EMAIL_DRAFT_MAX_ENTRIES,
+                    ttl_seconds=config.EMAIL_DRAFT_TTL_SECONDS,
+                    disk_path=config.EMAIL_DRAFT_STORE_PATH,
+                )
+    return _store
+
+
+async def get_or_draft(job_id: str, job: Dict[str, Any], items: List[Tuple[Dict[str, Any], str]],
+                       concurrency: Optional[int] = None, interview_type: Optional[str] = None,
+                       tone: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Returns one draft per (candidate, interview_time) item, in order.
+
+    Stored drafts are reused and only the rest are generated. With EMAIL_DRAFT_MODE
+    "per_candidate" each email is its own model call, at most `concurrency` at a time;
+    with "template" they are rendered from a cached template with batched personal
+    notes. Emails that fell back to a default are returned but not stored, so the next
+    request retries the model. Each result is {"draftId", "subject", "body", "reused"}.
+    """
+    store = get_store()
+    mode = config.EMAIL_DRAFT_MODE
+    style = f"{mode}:{interview_type or config.EMAIL_INTERVIEW_TYPE}:{tone or config.EMAIL_TONE}" if mode == "template" else mode
+    keys = [draft_key(job_id, job, candidate.get("id", ""), candidate, interview_time, style) for candidate, interview_time in items]
+
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    missing = []
+    for i, key in enumerate(keys):
+        stored = store.get(key)
+        if stored is not None:
+            results[i] = {"draftId": key, **stored, "reused": True}
+        else:
+            missing.append(i)
+    if not missing:
+        return results
+
+    if mode == "template":
+        generated = await email_agent.draft_emails_from_template(
+            job, [items[i] for i in missing], interview_type=interview_type, tone=tone
+        )
+    else:
+        semaphore = asyncio.Semaphore(concurrency or config.EMAIL_DRAFT_CONCURRENCY)
+
+        async def one(candidate: Dict[str, Any], interview_time: str):
+            async with semaphore:
+                return await email_agent.draft_email_async(job, candidate, interview_time)
+
+        generated = await asyncio.gather(*(one(*items[i]) for i in missing))
+
+    for i, (content, complete) in zip(missing, generated):
+        email = {"subject": content["subject"], "body": content["body"]}
+        if complete:
+            store.set(keys[i], email)
+        results[i] = {"draftId": keys[i], **email, "reused": False}
+    return results
+
+
+def stats() -> Dict[str, Any]:
+    return get_store().stats()
@@ -0,0 +1,276 @@
+# backend/services/email_outbox.py
+#
+# Persisted outbox for outgoing email. Request handlers only insert rows; an
+# OutboxDispatcher drains them in provider-sized batches under a rate limit, with
+# retries. Each message carries an idempotency key per (job, candidate, template),
+# so the same email is never queued twice and a retried batch is not delivered twice.
+
+import asyncio
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from services.email_providers import EmailProvider
+from services.job_queue import summarize_latencies
+from services.rate_limit import TokenBucket
+from services.scoring_cache import content_key
+import config
+
+
+def idempotency_key(job_id: str, candidate_id: str, template_id: str) -> str:
+    return content_key(job_id, candidate_id, template_id)
+
+
+@dataclass
+class OutboxMessage:
+    id: str
+    idempotency_key: str
+    to: str
+    subject: str
+    body: str
+    sender: str
+    attempts: int
+    max_attempts: int
+
+    def as_params(self) -> Dict[str, Any]:
+        return {"from": self.sender, "to": self.to, "subject": self.subject, "body": self.body}
+
+
+class EmailOutbox:
+    """Outbox stored in a local SQLite file, safe to share between processes on one host."""
+
+    def __init__(self, path: str, max_attempts: int = 5, retry_backoff_seconds: float = 10.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id TEXT PRIMARY KEY, idempotency_key TEXT NOT NULL UNIQUE, tracking_id TEXT NOT NULL, "
+                "job_id TEXT, candidate_id TEXT, sender TEXT NOT NULL, recipient TEXT NOT NULL, "
+                "subject TEXT NOT NULL, body TEXT NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, available_at REAL NOT NULL, "
+                "lease_owner TEXT, lease_expires_at REAL, provider_message_id TEXT, "
+                "created_at REAL NOT NULL, sent_at REAL, last_error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_claim ON outbox(status, available_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_outbox_tracking ON outbox(tracking_id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, messages: List[Dict[str, Any]], tracking_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queues messages ({"idempotencyKey", "to", "subject", "body", optional "jobId",
+        "candidateId", "from"}) under one tracking ID. A message whose idempotency key is
+        already in the outbox is skipped and counted as a duplicate.
+        """
+        tracking_id = tracking_id or uuid.uuid4().hex
+        now = time.time()
+        queued = 0
+        with self._transaction() as conn:
+            for m in messages:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO outbox (id, idempotency_key, tracking_id, job_id, candidate_id, sender, "
+                    "recipient, subject, body, status, max_attempts, available_at, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                    (uuid.uuid4().hex, m["idempotencyKey"], tracking_id, m.get("jobId"), m.get("candidateId"),
+                     m.get("from") or config.EMAIL_FROM, m["to"], m["subject"], m["body"], self.max_attempts, now, now)
+                )
+                queued += cursor.rowcount
+        return {"trackingId": tracking_id, "queued": queued, "duplicates": len(messages) - queued}
+
+    def claim_batch(self, worker_id: str, limit: int, lease_seconds: float) -> List[OutboxMessage]:
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, idempotency_key, recipient, subject, body, sender, attempts, max_attempts FROM outbox "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'sending' AND lease_expires_at < ?) "
+                "ORDER BY available_at LIMIT ?",
+                (now, now, limit)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ? WHERE id = ?",
+                [(worker_id, now + lease_seconds, row[0]) for row in rows]
+            )
+        return [OutboxMessage(id=r[0], idempotency_key=r[1], to=r[2], subject=r[3], body=r[4], sender=r[5],
+                              attempts=r[6] + 1, max_attempts=r[7]) for r in rows]
+
+    def record_results(self, batch: List[OutboxMessage], results: List[Dict[str, Any]], worker_id: str):
+        """
+        Stores a provider call's per-message results in one transaction. Failed messages
+        are retried with exponential backoff, or failed for good when the error is
+        permanent or they are out of attempts.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            for message, result in zip(batch, results):
+                if result["ok"]:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'sent', sent_at = ?, provider_message_id = ?, "
+                        "lease_owner = NULL, lease_expires_at = NULL WHERE id = ? AND lease_owner = ?",
+                        (now, result.get("id"), message.id, worker_id)
+                    )
+                elif result.get("permanent") or message.attempts >= message.max_attempts:
+                    conn.execute(
+                        "UPDATE outbox SET status = 'failed', last_error = ?, lease_owner = NULL, lease_expires_at = NULL "
+                        "WHERE id = ? AND lease_owner = ?",
+                        (result["error"], message.id, worker_id)
+                    )
+                else:
+                    backoff = self.retry_backoff_seconds * (2 ** (message.attempts - 1))
+                    conn.execute(
+                        "UPDATE outbox SET status = 'queued', available_at = ?, last_error = ?, "
+                        "lease_owner = NULL, lease_expires_at = NULL WHERE id = ? AND lease_owner = ?",
+                        (now + backoff, result["error"], message.id, worker_id)
+                    )
+
+    def tracking_status(self, tracking_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._connection().execute(
+            "SELECT candidate_id, recipient, status, attempts, provider_message_id, sent_at, last_error "
+            "FROM outbox WHERE tracking_id = ? ORDER BY created_at", (tracking_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        counts: Dict[str, int] = {}
+        for row in rows:
+            counts[row[2]] = counts.get(row[2], 0) + 1
+        keys = ("candidateId", "to", "status", "attempts", "providerMessageId", "sentAt", "lastError")
+        return {"trackingId": tracking_id, "counts": counts, "messages": [dict(zip(keys, row)) for row in rows]}
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        now = time.time()
+        by_status = dict(conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall())
+        (oldest,) = conn.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'queued'").fetchone()
+        delays = [r[0] for r in conn.execute(
+            "SELECT sent_at - created_at FROM outbox WHERE status = 'sent' ORDER BY sent_at DESC LIMIT 200"
+        ).fetchall()]
+        return {
+            "depth": by_status.get("queued", 0),
+            "sending": by_status.get("sending", 0),
+            "sent": by_status.get("sent", 0),
+            "failed": by_status.get("failed", 0),
+            "oldestQueuedAgeSeconds": now - oldest if oldest else 0.0,
+            "recentDeliveryDelaySeconds": summarize_latencies(delays),
+        }
+
+
+class OutboxDispatcher:
+    """
+    Drains the outbox: claims up to one provider batch at a time under a lease, sends it
+    with a batch idempotency key, and records each message's outcome. A batch whose
+    worker dies is re-claimed once its lease expires.
+    """
+
+    def __init__(self, outbox: EmailOutbox, provider: EmailProvider, batch_size: Optional[int] = None,
+                 rate_per_second: Optional[float] = None, poll_interval: Optional[float] = None,
+                 lease_seconds: Optional[float] = None):
+        self.outbox = outbox
+        self.provider = provider
+        self.batch_size = min(batch_size or config.EMAIL_SEND_BATCH_SIZE, provider.max_batch_size)
+        self.limiter = TokenBucket(config.EMAIL_SEND_RATE_PER_SECOND if rate_per_second is None else rate_per_second)
+        self.poll_interval = config.EMAIL_DISPATCHER_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        self.lease_seconds = lease_seconds or config.EMAIL_DISPATCHER_LEASE_SECONDS
+        self.dispatcher_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"batches": 0, "sent": 0, "retried": 0, "failed": 0, "batchErrors": 0}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stops dispatching; a batch in flight is abandoned and re-claimed after its lease expires."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                sent = await self.dispatch_once()
+            except Exception as e:
+                print(f"Email dispatcher {self.dispatcher_id} failed: {e}")
+                sent = 0
+            if not sent:
+                await asyncio.sleep(self.poll_interval)
+
+    async def dispatch_once(self) -> int:
+        """Sends one batch; returns how many messages were claimed (0 when the outbox is empty)."""
+        batch = await asyncio.to_thread(self.outbox.claim_batch, self.dispatcher_id, self.batch_size, self.lease_seconds)
+        if not batch:
+            return 0
+        await self.limiter.acquire()
+        # The same messages always produce the same key, so a retried batch is not delivered twice.
+        batch_key = hashlib.sha256("".join(sorted(m.idempotency_key for m in batch)).encode('utf-8')).hexdigest()
+        try:
+            results = await asyncio.to_thread(self.provider.send_batch, [m.as_params() for m in batch], batch_key)
+        except Exception as e:
+            self._counters["batchErrors"] += 1
+            results = [{"ok": False, "error": str(e), "permanent": False}] * len(batch)
+        self._counters["batches"] += 1
+        await asyncio.to_thread(self.outbox.record_results, batch, results, self.dispatcher_id)
+        for message, result in zip(batch, results):
+            if result["ok"]:
+                self._counters["sent"] += 1
+            elif result.get("permanent") or message.attempts >= message.max_attempts:
+                self._counters["failed"] += 1
+            else:
+                self._counters["retried"] += 1
+        return len(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"dispatcherId": self.dispatcher_id, "provider": self.provider.name, **self._counters}
+
+
+_outbox: Optional[EmailOutbox] = None
+_outbox_lock = threading.Lock()
+_dispatcher: Optional[OutboxDispatcher] = None
+
+def get_outbox() -> EmailOutbox:
+    """Returns the process-wide outbox, configured from `config`."""
+    global _outbox
+    if _outbox is None:
+        with _outbox_lock:
+            if _outbox is None:
+                os.makedirs(os.path.dirname(os.path.abspath(config.EMAIL_OUTBOX_PATH)), exist_ok=True)
+                _outbox = EmailOutbox(
+                    config.EMAIL_OUTBOX_PATH,
+                    max_attempts=config.EMAIL_OUTBOX_MAX_ATTEMPTS,
+                    retry_backoff_seconds=config.EMAIL_OUTBOX_RETRY_BACKOFF_SECONDS,
+                )
+    return _outbox
+
+def get_dispatcher() -> Optional[OutboxDispatcher]:
+    return _dispatcher
+
+def set_dispatcher(dispatcher: Optional[OutboxDispatcher]):
+    global _dispatcher
+    _dispatcher = dispatcher
@@ -0,0 +1,120 @@
+# backend/services/email_providers.py
+
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+
+
+class EmailProvider:
+    """
+    Interface for an email delivery service that can send several messages per API call.
+
+    `send_batch` returns one result per message, in order: {"ok": True, "id": "..."} on
+    success, or {"ok": False, "error": "...", "permanent": bool} when that message was
+    rejected. It raises when the call as a whole failed and may be retried.
+    """
+
+    name = "base"
+    max_batch_size = 1
+
+    def send_batch(self, messages: List[Dict[str, Any]], idempotency_key: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class ResendProvider(EmailProvider):
+    """Sends through Resend's batch endpoint (up to 100 emails per request)."""
+
+    name = "resend"
+    max_batch_size = 100
+
+    def __init__(self, api_key: Optional[str] = None):
+        import resend
+
+        resend.api_key = api_key or os.getenv("RESEND_API_KEY")
+        self._resend = resend
+
+    def send_batch(self, messages: List[Dict[str, Any]], idempotency_key: str) -> List[Dict[str, Any]]:
+        params = [{"from": m["from"], "to": [m["to"]], "subject": m["subject"], "text": m["body"]} for m in messages]
+        # Permissive validation: one bad address rejects that email only, not the whole batch.
+        response = self._resend.Batch.send(params, {"idempotency_key": idempotency_key, "batch_validation": "permissive"})
+        errors = {e["index"]: e["message"] for e in (response.get("errors") or [])}
+        sent = iter(response.get("data") or [])
+        results = []
+        for index in range(len(messages)):
+            if index in errors:
+                results.append({"ok": False, "error": errors[index], "permanent": True})
+            else:
+                email = next(sent, None)
+                results.append({"ok": True, "id": email.get("id")} if email else
+                               {"ok": False, "error": "Missing from provider response.", "permanent": False})
+        return results
+
+
+class FakeProvider(EmailProvider):
+    """
+    In-memory provider for tests and local development. Records every delivered
+    message and, like a real provider, ignores a repeated idempotency key.
+    """
+
+    name = "fake"
+    max_batch_size = 100
+
+    def __init__(self):
+        self.sent: List[Dict[str, Any]] = []
+        self.calls = 0
+        # Set to an exception to make the next `send_batch` call raise it.
+        self.fail_next: Optional[Exception] = None
+        self._responses: Dict[str, List[Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def send_batch(self, messages: List[Dict[str, Any]], idempotency_key: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.calls += 1
+            if self.fail_next is not None:
+                error, self.fail_next = self.fail_next, None
+                raise error
+            if idempotency_key in self._responses:
+                return self._responses[idempotency_key]
+            results = []
+            for message in messages:
+                if "@" not in (message.get("to") or ""):
+                    results.append({"ok": False, "error": "Invalid recipient address.", "permanent": True})
+                    continue
+                message_id = uuid.uuid4().hex
+                self.sent.append({**message, "id": message_id})
+                results.append({"ok": True, "id": message_id})
+            self._responses[idempotency_key] = results
+            return results
+
+
+# --- Provider registry ---
+_PROVIDERS: Dict[str, Callable[[], EmailProvider]] = {
+    "resend": ResendProvider,
+    "fake": FakeProvider,
+}
+
+_provider: Optional[EmailProvider] = None
+_provider_lock = threading.Lock()
+
+def register_provider(name: str, factory: Callable[[], EmailProvider]):
+    """Makes a custom provider selectable through EMAIL_PROVIDER."""
+    _PROVIDERS[name] = factory
+
+def get_provider() -> EmailProvider:
+    """Returns the process-wide provider for EMAIL_PROVIDER."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if config.EMAIL_PROVIDER not in _PROVIDERS:
+                    raise ValueError(f"Unknown email provider: {config.EMAIL_PROVIDER}")
+                _provider = _PROVIDERS[config.EMAIL_PROVIDER]()
+    return _provider
+
+def set_provider(provider: Optional[EmailProvider]):
+    """Overrides the process-wide provider, e.g. with a FakeProvider in tests."""
+    global _provider
+    _provider = provider
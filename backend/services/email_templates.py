@@ -0,0 +1,262 @@
+# backend/services/email_templates.py
+#
+# Template-first email generation. One template per (job title, interview type, tone)
+# is generated by the model and cached; per-candidate fields are filled in locally.
+# The model is only asked for short personal notes, for many candidates per call.
+
+import asyncio
+import json
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.scoring_cache import ScoringCache, content_key
+import config
+
+# Placeholders a template may contain. Anything else in braces is left untouched,
+# so model output with stray braces cannot break rendering.
+PLACEHOLDERS = ("candidate_name", "job_title", "interview_time", "personal_note")
+
+INTERVIEW = "interview"
+NEXT_ROUND = "next_round"
+
+# Bump when the prompts below change so cached templates and drafts are regenerated.
+TEMPLATE_PROMPT_VERSION = '1'
+
+# Takes a prompt and returns the model's text response.
+GenerateText = Callable[[str], Awaitable[str]]
+
+_DEFAULT_TEMPLATES = {
+    INTERVIEW: {
+        "subject": "Interview Invitation for the {job_title} Position at ResumeRank",
+        "body": """Hi {candidate_name},
+
+Thank you for your application for the {job_title} position. Our team was impressed with your background.
+
+{personal_note}
+
+We would like to invite you to an interview scheduled for:
+
+**Date & Time:** {interview_time}
+
+Please let us know if this time works for you.
+
+Best regards,
+The Hiring Team
+ResumeRank""",
+    },
+    NEXT_ROUND: {
+        "subject": "Next Steps for the {job_title} Position at ResumeRank",
+        "body": """Hi {candidate_name},
+
+Thank you for applying for the {job_title} position. We are happy to let you know that you have been selected for the next round.
+
+{personal_note}
+
+We will be in touch shortly to schedule an interview.
+
+Best regards,
+The Hiring Team
+ResumeRank""",
+    },
+}
+
+
+def default_template(interview_type: str) -> Dict[str, str]:
+    """The static template used when the model cannot produce one."""
+    return dict(_DEFAULT_TEMPLATES.get(interview_type, _DEFAULT_TEMPLATES[INTERVIEW]))
+
+def is_valid(template: Any, interview_type: str) -> bool:
+    """
+    A usable template has a subject and a body that addresses the candidate by name. An
+    interview invitation (any type but NEXT_ROUND, as in the prompt) must also state the
+    interview time.
+    """
+    if not (isinstance(template, dict) and template.get("subject") and template.get("body")):
+        return False
+    body = template["body"]
+    return "{candidate_name}" in body and (interview_type == NEXT_ROUND or "{interview_time}" in body)
+
+def _fill(text: str, fields: Dict[str, str]) -> str:
+    for name in PLACEHOLDERS:
+        text = text.replace("{" + name + "}", fields.get(name) or "")
+    return text
+
+def render(template: Dict[str, str], fields: Dict[str, str]) -> Dict[str, str]:
+    """Fills a template's placeholders; an empty personal note leaves no blank gap."""
+    body = _fill(template["body"], fields)
+    body = re.sub(r"\n{3,}", "\n\n", body).strip()
+    return {"subject": _fill(template["subject"], fields).strip(), "body": body}
+
+def template_key(job_title: str, interview_type: str, tone: str, model_name: str, prompt_version: str) -> str:
+    return content_key("template", job_title, interview_type, tone, model_name, prompt_version)
+
+
+_store: Optional[ScoringCache] = None
+_store_lock = threading.Lock()
+# Generations in flight, so concurrent requests for the same template share one model call.
+_pending: Dict[str, asyncio.Future] = {}
+
+def get_store() -> ScoringCache:
+    """Returns the process-wide template store, configured from `config`."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ScoringCache(
+                    max_entries=config.EMAIL_TEMPLATE_MAX_ENTRIES,
+                    ttl_seconds=config.EMAIL_DRAFT_TTL_SECONDS,
+                    disk_path=config.EMAIL_DRAFT_STORE_PATH,
+                    table="email_templates",  # Drafts use the same file; keep eviction and clear() apart.
+                )
+    return _store
+
+async def get_template(key: str, interview_type: str,
+                       generate: Callable[[], Awaitable[Tuple[Dict[str, str], bool]]]) -> Tuple[Dict[str, str], bool]:
+    """
+    Returns (template, from_model) for `key`, generating the template with `generate()`
+    on a miss. Only model-generated templates are cached; after a failure the default
+    template is returned with from_model False and the next request tries the model again.
+    """
+    store = get_store()
+    template = store.get(key)
+    if template is not None:
+        return template, True
+
+    pending = _pending.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    _pending[key] = future
+    try:
+        try:
+            template, from_model = await generate()
+        except Exception as e:
+            print(f"Error generating email template: {e}")
+            template, from_model = None, False
+        from_model = from_model and is_valid(template, interview_type)
+        if from_model:
+            store.set(key, template)
+        else:
+            template = default_template(interview_type)
+        future.set_result((template, from_model))
+        return template, from_model
+    finally:
+        if not future.done():
+            future.cancel()
+        _pending.pop(key, None)
+
+
+# --- Prompts ---
+_INTERVIEW_TYPE_INSTRUCTIONS = {
+    INTERVIEW: """inviting the candidate to an interview for the {job_title} position.
+    - Clearly state the date and time of the interview using the placeholder {interview_time}.
+    - Ask them to confirm if the time works for them.""",
+    NEXT_ROUND: """confirming that the candidate has been selected for the next round for the {job_title} position.
+    - Do not include scheduling details; say that the team will be in touch to schedule an interview.""",
+}
+
+def build_template_prompt(job_title: str, interview_type: str, tone: str) -> str:
+    instructions = _INTERVIEW_TYPE_INSTRUCTIONS.get(interview_type, _INTERVIEW_TYPE_INSTRUCTIONS[INTERVIEW])
+    return f"""
+    Write a reusable, {tone} and professional email template {instructions}
+
+    The template will be sent to many candidates, so use these placeholders literally instead of real values:
+    - {{candidate_name}} for the candidate's name.
+    - {{job_title}} for the position ("{job_title}").
+    - {{interview_time}} for the interview date and time, if the email mentions it.
+    - {{personal_note}} on a line of its own after the opening paragraph; it is replaced by a short personalized sentence or removed.
+
+    The email should:
+    - Have a clear subject line.
+    - Thank them for their application.
+    - Be signed by "The Hiring Team, ResumeRank".
+
+    Return a JSON object with two keys: "subject" and "body".
+    """
+
+def build_personalization_prompt(job_title: str, candidates: List[Dict[str, Any]]) -> str:
+    listing = "\n".join(
+        f"[{i}] {c.get('candidateName', 'Candidate')}: {(c.get('summary') or '')[:config.EMAIL_PERSONALIZATION_SUMMARY_CHARS]}"
+        for i, c in enumerate(candidates)
+    )
+    return f"""
+    For each candidate below, who applied for the {job_title} position, write one or two sentences for their
+    email that mention something specific and positive from their background summary.
+    Address the candidate directly ("your experience with ..."). Do not mention scores, dates or the interview itself.
+
+    Candidates:
+    {listing}
+
+    Return a JSON array with one object per candidate: {{"index": <candidate number>, "note": "<sentences>"}}.
+    """
+
+def _parse_json(text: str) -> Any:
+    return json.loads(text.strip().replace('```json', '').replace('```', ''))
+
+async def personalize_notes(generate_text: GenerateText, job_title: str,
+                            candidates: List[Dict[str, Any]]) -> List[Optional[str]]:
+    """Writes a short personal note for each candidate in one model call; None where none came back."""
+    notes: List[Optional[str]] = [None] * len(candidates)
+    try:
+        for item in _parse_json(await generate_text(build_personalization_prompt(job_title, candidates))):
+            index = item.get("index") if isinstance(item, dict) else None
+            if isinstance(index, int) and 0 <= index < len(candidates) and item.get("note"):
+                notes[index] = str(item["note"]).strip()
+    except Exception as e:
+        print(f"Error personalizing emails: {e}")
+    return notes
+
+async def draft_from_template(generate_text: GenerateText, model_name: str, job_title: str,
+                              items: List[Tuple[Dict[str, Any], str]], interview_type: Optional[str] = None,
+                              tone: Optional[str] = None, personalize: Optional[bool] = None) -> List[Tuple[Dict[str, str], bool]]:
+    """
+    Drafts one email per (candidate, interview_time) item from a cached template.
+
+    Makes at most one model call for the template (none when it is cached) plus one call
+    per EMAIL_PERSONALIZATION_BATCH_SIZE candidates for their personal notes. Returns
+    (email, complete) per item; `complete` is False when the default template stood in
+    for a model one, or a note was requested but could not be written, so callers do not
+    store that draft.
+    """
+    interview_type = interview_type or config.EMAIL_INTERVIEW_TYPE
+    tone = tone or config.EMAIL_TONE
+    personalize = config.EMAIL_PERSONALIZATION if personalize is None else personalize
+
+    async def generate_template() -> Tuple[Dict[str, str], bool]:
+        return _parse_json(await generate_text(build_template_prompt(job_title, interview_type, tone))), True
+
+    key = template_key(job_title, interview_type, tone, model_name, TEMPLATE_PROMPT_VERSION)
+    template, from_model = await get_template(key, interview_type, generate_template)
+
+    # Only candidates with a summary get a personal note; there is nothing to personalize from otherwise.
+    wanted = [i for i, (candidate, _) in enumerate(items) if personalize and candidate.get("summary")]
+    notes: List[Optional[str]] = [None] * len(items)
+    if wanted:
+        batch_size = max(1, config.EMAIL_PERSONALIZATION_BATCH_SIZE)
+        semaphore = asyncio.Semaphore(config.EMAIL_DRAFT_CONCURRENCY)
+
+        async def batch(indices: List[int]):
+            async with semaphore:
+                written = await personalize_notes(generate_text, job_title, [items[i][0] for i in indices])
+            for i, note in zip(indices, written):
+                notes[i] = note
+
+        await asyncio.gather(*(batch(wanted[start:start + batch_size]) for start in range(0, len(wanted), batch_size)))
+
+    wanted_set = set(wanted)
+    drafts = []
+    for i, ((candidate, interview_time), note) in enumerate(zip(items, notes)):
+        email = render(template, {
+            "candidate_name": candidate.get("candidateName") or "there",
+            "job_title": job_title,
+            "interview_time": interview_time,
+            "personal_note": note or "",
+        })
+        drafts.append((email, from_model and (i not in wanted_set or note is not None)))
+    return drafts
+
+
+def stats() -> Dict[str, Any]:
+    return get_store().stats()
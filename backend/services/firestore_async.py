@@ -0,0 +1,100 @@
+# backend/services/firestore_async.py
+#
+# Async facade over services.firestore_client. The Admin SDK's Firestore client is
+# blocking, so every call runs on a dedicated, bounded thread pool instead of the
+# event loop. The pool size (FIRESTORE_ASYNC_THREADS) caps concurrent Firestore
+# round-trips per process without starving asyncio's default executor.
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import services.firestore_client as db
+import config
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=config.FIRESTORE_ASYNC_THREADS, thread_name_prefix="firestore")
+    return _executor
+
+async def run(func: Callable, *args, **kwargs) -> Any:
+    """Runs a blocking Firestore call on the Firestore thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+def shutdown():
+    """Stops the Firestore thread pool; called on application shutdown."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+# --- Jobs ---
+async def create_job(title: str, description: str) -> str:
+    return await run(db.create_job, title, description)
+
+async def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return await run(db.get_job, job_id)
+
+async def update_job(job_id: str, data: Dict[str, Any]):
+    await run(db.update_job, job_id, data)
+
+async def update_job_status(job_id: str, status: str):
+    await run(db.update_job_status, job_id, status)
+
+async def delete_job_and_candidates(job_id: str, progress: Optional[Callable[[int], None]] = None) -> int:
+    return await run(db.delete_job_and_candidates, job_id, progress)
+
+async def count_candidates(job_id: str) -> int:
+    return await run(db.count_candidates, job_id)
+
+
+# --- Candidates ---
+async def add_candidate(job_id: str, candidate_data: Dict[str, Any], candidate_id: Optional[str] = None):
+    await run(db.add_candidate, job_id, candidate_data, candidate_id)
+
+async def commit_candidate_batch(job_id: str, candidates: List[Tuple[str, Dict[str, Any]]],
+                                 job_update: Optional[Dict[str, Any]] = None):
+    await run(db.commit_candidate_batch, job_id, candidates, job_update)
+
+async def get_candidates(job_id: str, candidate_ids: List[str]) -> List[Dict[str, Any]]:
+    return await run(db.get_candidates, job_id, candidate_ids)
+
+async def list_candidates_page(job_id: str, limit: Optional[int] = None,
+                               cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    return await run(db.list_candidates_page, job_id, limit, cursor)
+
+async def get_top_candidates(job_id: str, count: int) -> List[Dict[str, Any]]:
+    return await run(db.get_top_candidates, job_id, count)
+
+async def list_candidate_fields(job_id: str, field_paths: List[str]) -> List[Dict[str, Any]]:
+    return await run(db.list_candidate_fields, job_id, field_paths)
+
+async def update_candidate_batch(job_id: str, updates: List[Tuple[str, Dict[str, Any]]],
+                                 job_update: Optional[Dict[str, Any]] = None):
+    await run(db.update_candidate_batch, job_id, updates, job_update)
+
+async def delete_candidate(job_id: str, candidate_id: str):
+    await run(db.delete_candidate, job_id, candidate_id)
+
+async def delete_all_candidates(job_id: str) -> int:
+    return await run(db.delete_all_candidates, job_id)
+
+
+# --- Users ---
+async def store_user_tokens(user_id: str, tokens: Dict):
+    await run(db.store_user_tokens, user_id, tokens)
+
+async def get_user_tokens(user_id: str) -> Optional[Dict]:
+    return await run(db.get_user_tokens, user_id)
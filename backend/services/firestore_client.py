@@ -1,22 +1,63 @@
 # backend/services/firestore_client.py
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import firebase_admin
 from firebase_admin import credentials, firestore
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
-# Initialize the Firebase Admin SDK.
-# It automatically uses the credentials from the GOOGLE_APPLICATION_CREDENTIALS env var.
-# Make sure you have set this environment variable to point to your service account key file.
-try:
-    firebase_admin.get_app()
-except ValueError:
-    # In a production environment, you might use a different credential source,
-    # but for local development, this is standard.
-    # cred = credentials.Certificate("serviceAccountKey.json")
-    firebase_admin.initialize_app()
+import config
+from services import bulk_delete, candidate_queries
 
+_client = None
+_client_lock = threading.Lock()
 
-db = firestore.client()
+def get_client():
+    """
+    Returns the Firestore client, initializing the Firebase Admin SDK on first use.
+    Creating it resolves credentials (GOOGLE_APPLICATION_CREDENTIALS or the metadata
+    server) and takes seconds, so it is not done at import time; the API warms it up
+    in the background after startup instead (services.clients).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                try:
+                    firebase_admin.get_app()
+                except ValueError:
+                    # In a production environment, you might use a different credential source,
+                    # but for local development, this is standard.
+                    # cred = credentials.Certificate("serviceAccountKey.json")
+                    firebase_admin.initialize_app()
+                _client = firestore.client()
+    return _client
+
+def set_client(client):
+    """Replaces the Firestore client, e.g. with an emulator or in-memory stand-in."""
+    global _client
+    with _client_lock:
+        _client = client
+
+def close():
+    """Closes the client's channels; the next call creates a new client."""
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None and hasattr(client, 'close'):
+        client.close()
+
+# Maximum number of document references fetched in a single multi-get call.
+GET_ALL_CHUNK_SIZE = 100
+_read_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="firestore-read")
+
+# Short-lived cache for job documents. Entries are dropped on every local write to the job;
+# the TTL bounds staleness for writes made by other processes.
+_job_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+_job_versions: Dict[str, int] = {}
+_job_cache_lock = threading.Lock()
 
 def create_job(title: str, description: str) -> str:
     """Creates a new job document in Firestore."""
@@ -26,74 +67,159 @@ def create_job(title: str, description: str) -> str:
         'status': 'processing',
         'createdAt': firestore.SERVER_TIMESTAMP
     }
-    _, job_ref = db.collection('jobs').add(job_data)
+    _, job_ref = get_client().collection('jobs').add(job_data)
     return job_ref.id
 
+def invalidate_job(job_id: str):
+    """Drops a job from the read cache; called whenever the job document is written."""
+    with _job_cache_lock:
+        _job_cache.pop(job_id, None)
+        _job_versions[job_id] = _job_versions.get(job_id, 0) + 1
+
 def get_job(job_id: str) -> Dict[str, Any]:
-    """Retrieves a single job document by its ID."""
-    job = db.collection('jobs').document(job_id).get()
-    return {"id": job.id, **job.to_dict()} if job.exists else None
+    """Retrieves a single job document by its ID, served from a short-lived cache when fresh."""
+    with _job_cache_lock:
+        entry = _job_cache.get(job_id)
+        if entry and time.monotonic() - entry[0] < config.JOB_CACHE_TTL_SECONDS:
+            return dict(entry[1])
+        version = _job_versions.get(job_id, 0)
+
+    job = get_client().collection('jobs').document(job_id).get()
+    if not job.exists:
+        return None
+    job_data = {"id": job.id, **job.to_dict()}
+    with _job_cache_lock:
+        # Skip caching if the job was written while we were reading it.
+        if _job_versions.get(job_id, 0) == version:
+            _job_cache[job_id] = (time.monotonic(), job_data)
+    return dict(job_data)
 
 def update_job(job_id: str, data: Dict[str, Any]):
     """Updates fields of a specific job document."""
-    db.collection('jobs').document(job_id).update(data)
+    get_client().collection('jobs').document(job_id).update(data)
+    invalidate_job(job_id)
 
 def update_job_status(job_id: str, status: str):
     """Convenience function to update a job's status."""
     update_job(job_id, {'status': status})
 
-def delete_job_and_candidates(job_id: str):
-    """Deletes a job and its entire 'candidates' subcollection."""
-    job_ref = db.collection('jobs').document(job_id)
-    _delete_collection(job_ref.collection('candidates'), 100)
-    job_ref.delete()
+def delete_job_and_candidates(job_id: str, progress: Optional[bulk_delete.ProgressCallback] = None) -> int:
+    """Deletes a job and its entire 'candidates' subcollection; returns the number of candidates deleted."""
+    job_ref = get_client().collection('jobs').document(job_id)
+    deleted = bulk_delete.delete_job_tree(get_client(), job_ref, progress=progress)
+    invalidate_job(job_id)
+    return deleted
 
-def add_candidate(job_id: str, candidate_data: Dict[str, Any]):
-    """Adds a new candidate document to a job's subcollection."""
-    db.collection('jobs').document(job_id).collection('candidates').add(candidate_data)
+def count_candidates(job_id: str) -> int:
+    """Counts a job's candidates with a server-side aggregation query."""
+    result = get_client().collection('jobs').document(job_id).collection('candidates').count().get()
+    return int(result[0][0].value)
+
+def add_candidate(job_id: str, candidate_data: Dict[str, Any], candidate_id: Optional[str] = None):
+    """
+    Adds a new candidate document to a job's subcollection.
+    Passing a deterministic `candidate_id` makes the write idempotent, so retried tasks don't duplicate candidates.
+    """
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    if candidate_id:
+        candidates_ref.document(candidate_id).set(candidate_data)
+    else:
+        candidates_ref.add(candidate_data)
+
+def new_candidate_id(job_id: str) -> str:
+    """Allocates an auto-generated document ID in a job's 'candidates' subcollection without writing."""
+    return get_client().collection('jobs').document(job_id).collection('candidates').document().id
+
+def commit_candidate_batch(job_id: str, candidates: List[Tuple[str, Dict[str, Any]]],
+                           job_update: Optional[Dict[str, Any]] = None):
+    """
+    Writes several candidate documents (and optionally a job update) in one atomic batch.
+    Callers must keep the batch within Firestore's 500-operation limit.
+    """
+    job_ref = get_client().collection('jobs').document(job_id)
+    candidates_ref = job_ref.collection('candidates')
+    batch = get_client().batch()
+    for candidate_id, candidate_data in candidates:
+        batch.set(candidates_ref.document(candidate_id), candidate_data)
+    if job_update:
+        batch.update(job_ref, job_update)
+    batch.commit()
+    if job_update:
+        invalidate_job(job_id)
 
 def get_candidates(job_id: str, candidate_ids: List[str]) -> List[Dict[str, Any]]:
-    """Fetches specific candidates from a job's subcollection."""
-    candidates = []
-    candidates_ref = db.collection('jobs').document(job_id).collection('candidates')
-    for cid in candidate_ids:
-        doc = candidates_ref.document(cid).get()
-        if doc.exists:
-            candidates.append({"id": doc.id, **doc.to_dict()})
-    return candidates
+    """
+    Fetches specific candidates from a job's subcollection using batched multi-get reads.
+    Chunks are fetched concurrently; results keep the order of `candidate_ids` and skip missing documents.
+    """
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    unique_ids = list(dict.fromkeys(candidate_ids))
+    chunks = [
+        [candidates_ref.document(cid) for cid in unique_ids[i:i + GET_ALL_CHUNK_SIZE]]
+        for i in range(0, len(unique_ids), GET_ALL_CHUNK_SIZE)
+    ]
+    snapshots = {}
+    for chunk_docs in _read_executor.map(lambda refs: list(get_client().get_all(refs)), chunks):
+        for doc in chunk_docs:
+            if doc.exists:
+                snapshots[doc.id] = doc
+    return [{"id": cid, **snapshots[cid].to_dict()} for cid in candidate_ids if cid in snapshots]
+
+def list_candidates_page(job_id: str, limit: Optional[int] = None,
+                         cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of a job's candidates in score order, and the cursor for the next page (None at the end)."""
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    return candidate_queries.page(candidates_ref, limit, cursor)
+
+def get_top_candidates(job_id: str, count: int) -> List[Dict[str, Any]]:
+    """The `count` best-scored candidates of a job, read with a score-ordered limit query."""
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    return candidate_queries.top(candidates_ref, count)
+
+def list_candidate_fields(job_id: str, field_paths: List[str]) -> List[Dict[str, Any]]:
+    """Reads only the given fields of every candidate in a job (a projection query)."""
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    return [{"id": doc.id, **doc.to_dict()} for doc in candidates_ref.select(field_paths).stream()]
+
+def update_candidate_batch(job_id: str, updates: List[Tuple[str, Dict[str, Any]]],
+                           job_update: Optional[Dict[str, Any]] = None):
+    """
+    Updates fields of several candidate documents (and optionally the job) in one atomic batch.
+    Callers must keep the batch within Firestore's 500-operation limit.
+    """
+    job_ref = get_client().collection('jobs').document(job_id)
+    candidates_ref = job_ref.collection('candidates')
+    batch = get_client().batch()
+    for candidate_id, data in updates:
+        batch.update(candidates_ref.document(candidate_id), data)
+    if job_update:
+        batch.update(job_ref, job_update)
+    batch.commit()
+    if job_update:
+        invalidate_job(job_id)
 
 def delete_candidate(job_id: str, candidate_id: str):
     """Deletes a single candidate document."""
-    db.collection('jobs').document(job_id).collection('candidates').document(candidate_id).delete()
+    get_client().collection('jobs').document(job_id).collection('candidates').document(candidate_id).delete()
 
-def delete_all_candidates(job_id: str):
+def delete_all_candidates(job_id: str) -> int:
     """Deletes all documents in the 'candidates' subcollection for a job."""
-    candidates_ref = db.collection('jobs').document(job_id).collection('candidates')
-    _delete_collection(candidates_ref, 100)
-
-def _delete_collection(coll_ref, batch_size: int):
-    """Recursively deletes a collection in batches."""
-    docs = coll_ref.limit(batch_size).stream()
-    deleted = 0
-    for doc in docs:
-        doc.reference.delete()
-        deleted += 1
-    if deleted >= batch_size:
-        return _delete_collection(coll_ref, batch_size)
+    candidates_ref = get_client().collection('jobs').document(job_id).collection('candidates')
+    return bulk_delete.delete_collection(get_client(), candidates_ref)
 
 def store_user_tokens(user_id: str, tokens: Dict):
     """
     Stores user's Google OAuth tokens in Firestore.
     IMPORTANT: In production, you MUST encrypt these tokens before storing them.
     """
-    db.collection('users').document(user_id).set({'google_tokens': tokens}, merge=True)
+    get_client().collection('users').document(user_id).set({'google_tokens': tokens}, merge=True)
 
 def get_user_tokens(user_id: str) -> Optional[Dict]:
     """
     Retrieves a user's stored Google OAuth tokens.
     In production, you would decrypt the tokens after fetching them.
     """
-    doc = db.collection('users').document(user_id).get()
+    doc = get_client().collection('users').document(user_id).get()
     if doc.exists:
         return doc.to_dict().get('google_tokens')
     return None
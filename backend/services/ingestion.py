@@ -0,0 +1,329 @@
+# backend/services/ingestion.py
+
+import asyncio
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+import ai_logic
+from services import dedup, metrics, prefilter, profiles, resume_processing, staging, text_extraction, tracing
+from services.job_queue import Task
+from services.write_batcher import CandidateWriteBatcher
+import services.firestore_async as db
+import config
+
+# Task type names used on the job queue.
+PROCESS_RESUMES = "process_resumes"
+
+
+class ExtractionFailed(Exception):
+    """No text could be extracted from a staged file (e.g. a damaged PDF)."""
+
+
+@dataclass
+class ResumeFeatures:
+    """What dedup and the prefilter need of a resume, so its full text need not be kept."""
+    contact: Dict[str, Any]
+    signature: Optional[np.ndarray] = None  # None when the resume has no words to compare
+    terms: Optional[Dict[str, int]] = None
+
+
+def _candidate_id(path: str) -> str:
+    """Stable document ID per staged file, so a retried task overwrites instead of duplicating."""
+    return hashlib.sha1(path.encode('utf-8')).hexdigest()[:20]
+
+async def process_resumes_task(job_id: str, job_description: str, resume_paths: List[str],
+                               content_hashes: Optional[Dict[str, str]] = None):
+    """
+    Extracts text from staged resumes, scores them, and stores the resulting candidates.
+
+    In the default "per_resume" mode resumes are scored concurrently (bounded by
+    RESUME_PROCESSING_CONCURRENCY); in "batch_stream" mode they are ranked in shards
+    and streamed back. With DEDUP_ENABLED, near-duplicates of resumes already in the
+    job are stored as links to the original instead of being scored. With
+    PREFILTER_ENABLED, a BM25 pass over the extracted text picks the shortlist that is
+    sent to the model; the others are stored unscored. Both first extract every resume
+    (at most EXTRACTION_PROCESSES * 2 at a time) and keep only its ResumeFeatures; the
+    resumes that get scored are extracted again, from the extraction cache. Either way
+    each candidate is handed to a write batcher as soon as its score is available, and
+    the job's final status is written with the last batch. `content_hashes` (path ->
+    SHA-256, computed while staging) spare the extraction cache from re-reading files
+    to hash them. Errors propagate so the queue can retry the task.
+    """
+    content_hashes = content_hashes or {}
+    batcher = CandidateWriteBatcher(job_id)
+    signatures: Dict[str, Any] = {}
+    try:
+        extra_fields: Dict[str, Dict[str, Any]] = {}
+        if config.DEDUP_ENABLED or config.PREFILTER_ENABLED:
+            resume_paths, features = await _extract_features(batcher, resume_paths, content_hashes)
+        if config.DEDUP_ENABLED:
+            resume_paths, signatures = await _dedupe_and_link(batcher, job_id, resume_paths, features)
+        if config.PREFILTER_ENABLED:
+            resume_paths, extra_fields = await _prefilter_and_store_rest(batcher, job_description, resume_paths, features)
+        if config.RESUME_RANKING_MODE == "batch_stream":
+            await _rank_and_store_streaming(batcher, job_description, resume_paths, extra_fields, content_hashes)
+        else:
+            await _score_and_store_each(batcher, job_description, resume_paths, extra_fields, content_hashes)
+    except Exception:
+        # Keep whatever was scored; the retry overwrites these documents by ID.
+        try:
+            await batcher.close()
+        except Exception as e:
+            print(f"Could not flush partial results for job {job_id}: {e}")
+        raise
+    await batcher.close(job_update={'status': 'completed'})
+    if signatures:
+        # Only now are these candidates stored, so later uploads can be linked to them.
+        await asyncio.to_thread(dedup.get_index().add, job_id, signatures)
+
+async def _extract_text(path: str, content_hashes: Optional[Dict[str, str]] = None) -> str:
+    """The file's text; raises ExtractionFailed for a file that could not be parsed."""
+    content_hash = (content_hashes or {}).get(path)
+    with metrics.stage("extract"):
+        result = await text_extraction.extract_file_async(path, content_hash=content_hash)
+    if result.get('error'):
+        raise ExtractionFailed(result['error'])
+    return result['text']
+
+async def _gather_extracted(resume_paths: List[str], extract):
+    """
+    `extract(path)` for every path, with at most EXTRACTION_PROCESSES * 2 extractions
+    (and so extracted texts) in flight. Exceptions are returned, as with
+    `asyncio.gather(..., return_exceptions=True)`.
+    """
+    semaphore = asyncio.Semaphore(max(1, 2 * config.EXTRACTION_PROCESSES))
+
+    async def bounded(path: str):
+        async with semaphore:
+            return await extract(path)
+
+    return await asyncio.gather(*(bounded(path) for path in resume_paths), return_exceptions=True)
+
+async def _store_extraction_failures(batcher: CandidateWriteBatcher, resume_paths: List[str], extracted: list):
+    """
+    Stores an unscored candidate for each ExtractionFailed in `extracted` (results of
+    `_gather_extracted`) and returns the remaining paths and results. Any other error
+    is raised.
+    """
+    kept_paths, kept_results = [], []
+    for path, result in zip(resume_paths, extracted):
+        if isinstance(result, ExtractionFailed):
+            await batcher.add(_extraction_failed_candidate(result), _candidate_id(path))
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            kept_paths.append(path)
+            kept_results.append(result)
+    return kept_paths, kept_results
+
+def _features(text: str, num_perm: int) -> ResumeFeatures:
+    features = ResumeFeatures(contact=_contact(text))
+    if config.DEDUP_ENABLED and dedup.shingles(text):
+        features.signature = dedup.minhash_signature(text, num_perm)
+    if config.PREFILTER_ENABLED:
+        features.terms = prefilter.term_counts(text)
+    return features
+
+async def _extract_features(batcher: CandidateWriteBatcher, resume_paths: List[str],
+                            content_hashes: Dict[str, str]):
+    """
+    Extracts every resume and reduces it to its ResumeFeatures, storing the ones that
+    could not be extracted. Returns the remaining paths and their features by path.
+    """
+    num_perm = dedup.get_index().num_perm if config.DEDUP_ENABLED else 0
+
+    async def extract(path: str) -> ResumeFeatures:
+        text = await _extract_text(path, content_hashes)
+        return await asyncio.to_thread(_features, text, num_perm)
+
+    extracted = await _gather_extracted(resume_paths, extract)
+    resume_paths, features = await _store_extraction_failures(batcher, resume_paths, extracted)
+    return resume_paths, dict(zip(resume_paths, features))
+
+async def _score_and_store_each(batcher: CandidateWriteBatcher, job_description: str, resume_paths: List[str],
+                                extra_fields: Optional[Dict[str, Dict[str, Any]]] = None,
+                                content_hashes: Optional[Dict[str, str]] = None):
+    semaphore = asyncio.Semaphore(config.RESUME_PROCESSING_CONCURRENCY)
+    extra_fields = extra_fields or {}
+    requirements = profiles.DescriptionRequirements(job_description)
+    description_hash = profiles.description_hash(job_description)
+
+    async def score_and_store(path: str):
+        with tracing.span("candidate", candidateId=_candidate_id(path)), metrics.CANDIDATES_IN_FLIGHT.track_in_progress():
+            async with semaphore:
+                # Extracted only once a slot is free, so waiting resumes hold no text.
+                try:
+                    text = await _extract_text(path, content_hashes)
+                except ExtractionFailed as e:
+                    await batcher.add(_extraction_failed_candidate(e), _candidate_id(path))
+                    return
+                candidate_data = await resume_processing.process_resume_async(job_description, text)
+            candidate_data = {**candidate_data, **_scoring_base(candidate_data, requirements, description_hash)}
+            await batcher.add({**candidate_data, **extra_fields.get(path, {})}, _candidate_id(path))
+
+    await asyncio.gather(*(score_and_store(path) for path in resume_paths))
+
+async def _rank_and_store_streaming(batcher: CandidateWriteBatcher, job_description: str, resume_paths: List[str],
+                                    extra_fields: Optional[Dict[str, Dict[str, Any]]] = None,
+                                    content_hashes: Optional[Dict[str, str]] = None):
+    # The model ranks all resumes in one stream, so their texts are all held here.
+    extra_fields = extra_fields or {}
+    requirements = profiles.DescriptionRequirements(job_description)
+    description_hash = profiles.description_hash(job_description)
+    extracted = await _gather_extracted(resume_paths, lambda path: _extract_text(path, content_hashes))
+    resume_paths, resume_texts = await _store_extraction_failures(batcher, resume_paths, extracted)
+    async for ranking in ai_logic.stream_rank_candidates(job_description, list(resume_texts)):
+        path = resume_paths[ranking.candidateIndex]
+        candidate_data = ranking.model_dump(exclude={'candidateIndex', 'profile'}, exclude_none=True)
+        profile = profiles.normalize(ranking.profile.model_dump()) if ranking.profile else None
+        if profile:
+            candidate_data['profile'] = profile
+        candidate_data.update(_scoring_base(candidate_data, requirements, description_hash))
+        await batcher.add({**candidate_data, **extra_fields.get(path, {})}, _candidate_id(path))
+
+
+def _scoring_base(candidate_data: Dict[str, Any], requirements: profiles.DescriptionRequirements,
+                  description_hash: str) -> Dict[str, Any]:
+    """Fields recording which description a model score was given for; rescoring starts from them."""
+    profile = candidate_data.get('profile')
+    if not profile:
+        return {}
+    return {
+        'baseSuitabilityScore': candidate_data.get('suitabilityScore', 0),
+        'baseMatchScore': requirements.match_score(profile),
+        'scoredForDescriptionHash': description_hash,
+    }
+
+
+# --- Unscored candidates ---
+_EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+def _contact(text: str) -> Dict[str, Any]:
+    """
+    Best-effort name (the first line) and email of a resume. `candidateEmail` is None when
+    the text has no address.
+    """
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    email = _EMAIL_PATTERN.search(text)
+    return {"candidateName": first_line[:80] or "N/A", "candidateEmail": email.group(0) if email else None}
+
+def _unscored_candidate(contact: Dict[str, Any], status: str, summary: str) -> Dict[str, Any]:
+    """Candidate document, with the `_contact` fields, for a resume that was not sent to the model."""
+    return {
+        **contact,
+        "suitabilityScore": 0,
+        "summary": summary,
+        "status": status,
+    }
+
+
+def _extraction_failed_candidate(error: ExtractionFailed) -> Dict[str, Any]:
+    return _unscored_candidate(
+        _contact(""), "extraction_failed", f"Not scored: no text could be extracted from this file ({error})."
+    )
+
+
+# --- Near-duplicate detection ---
+def _find_duplicates(job_id: str, resume_paths: List[str], features: Dict[str, ResumeFeatures]):
+    """
+    Checks each resume in order against the job's index and the upload's earlier resumes,
+    so copies within one upload are caught too. Returns the duplicates and the signatures
+    of the other resumes, which are indexed once their candidates are stored.
+    """
+    index = dedup.get_index()
+    batch = dedup.SignatureBatch(index.bands)
+    duplicates = {}
+    for path in resume_paths:
+        signature = features[path].signature
+        if signature is None:
+            continue  # Nothing extracted; empty resumes would all look identical.
+        candidate_id = _candidate_id(path)
+        match = index.find(job_id, candidate_id, signature) or batch.find(signature)
+        if match is not None:
+            duplicates[path] = match
+        else:
+            batch.add(candidate_id, signature)
+    return duplicates, batch.signatures
+
+async def _dedupe_and_link(batcher: CandidateWriteBatcher, job_id: str, resume_paths: List[str],
+                           features: Dict[str, ResumeFeatures]):
+    """
+    Stores near-duplicates as links to the original candidate. Returns the remaining
+    paths and their signatures for the dedup index.
+    """
+    with metrics.stage("dedup", resumes=len(resume_paths)):
+        duplicates, signatures = await asyncio.to_thread(_find_duplicates, job_id, resume_paths, features)
+    for path, (original_id, similarity) in duplicates.items():
+        candidate_data = _unscored_candidate(
+            features[path].contact, "duplicate",
+            f"Not scored: near-duplicate ({similarity:.0%} similar) of a resume already uploaded for this job."
+        )
+        candidate_data.update({"duplicateOf": original_id, "duplicateSimilarity": round(similarity, 4)})
+        await batcher.add(candidate_data, _candidate_id(path))
+    if duplicates:
+        print(f"Linked {len(duplicates)} of {len(resume_paths)} resumes for job {job_id} to existing candidates.")
+    return [path for path in resume_paths if path not in duplicates], signatures
+
+
+# --- Lexical prefilter ---
+def _filtered_candidate(contact: Dict[str, Any], rank: int, total: int) -> Dict[str, Any]:
+    return _unscored_candidate(
+        contact, "filtered",
+        f"Not scored: ranked {rank} of {total} by keyword match with the job description, below the prefilter cutoff."
+    )
+
+def _prefilter_scores(job_description: str, resume_terms: List[Dict[str, int]]):
+    index = prefilter.BM25Index(resume_terms)
+    scores = index.score(job_description)
+    return prefilter.normalize(scores), prefilter.rank_positions(scores), prefilter.shortlist(scores)
+
+async def _prefilter_and_store_rest(batcher: CandidateWriteBatcher, job_description: str, resume_paths: List[str],
+                                    features: Dict[str, ResumeFeatures]):
+    """
+    Scores every resume with BM25 and stores the ones outside the shortlist right away.
+    Returns the shortlisted paths and the prefilter fields (prefilterScore,
+    prefilterRank) to store on each shortlisted candidate.
+    """
+    resume_terms = [features[path].terms for path in resume_paths]
+    with metrics.stage("prefilter", resumes=len(resume_paths)):
+        normalized, ranks, kept = await asyncio.to_thread(_prefilter_scores, job_description, resume_terms)
+
+    fields = {
+        path: {"prefilterScore": round(float(normalized[i]), 4), "prefilterRank": int(ranks[i])}
+        for i, path in enumerate(resume_paths)
+    }
+    kept_set = set(kept)
+    for i, path in enumerate(resume_paths):
+        if i not in kept_set:
+            candidate_data = _filtered_candidate(features[path].contact, int(ranks[i]), len(resume_paths))
+            await batcher.add({**candidate_data, **fields[path]}, _candidate_id(path))
+    print(f"Prefilter kept {len(kept)} of {len(resume_paths)} resumes for model scoring.")
+    return [resume_paths[i] for i in kept], fields
+
+async def handle_process_resumes(task: Task):
+    """Queue handler for PROCESS_RESUMES tasks."""
+    payload = task.payload
+    job_id = payload['jobId']
+    try:
+        with tracing.span("process_resumes", jobId=job_id, taskId=task.id, attempt=task.attempts,
+                          resumes=len(payload['files']), mode=config.RESUME_RANKING_MODE):
+            await process_resumes_task(
+                job_id, payload['jobDescription'], [f['path'] for f in payload['files']],
+                {f['path']: f['sha256'] for f in payload['files'] if f.get('sha256')}
+            )
+    except Exception as e:
+        print(f"Error during background resume processing for job {job_id} (attempt {task.attempts}): {e}")
+        if task.is_last_attempt:
+            await db.update_job_status(job_id, 'failed')
+            staging.discard(payload['stagingDir'])
+        raise
+    staging.discard(payload['stagingDir'])
+
+
+TASK_HANDLERS = {
+    PROCESS_RESUMES: handle_process_resumes,
+}
@@ -0,0 +1,253 @@
+# backend/services/job_queue.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import config
+
+
+@dataclass
+class Task:
+    """A unit of background work claimed from the queue by a worker."""
+    id: str
+    type: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+    lease_owner: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def is_last_attempt(self) -> bool:
+        return self.attempts >= self.max_attempts
+
+
+class QueueBackend:
+    """
+    Interface for a durable task queue. Workers claim tasks under a time-limited
+    lease; a task whose lease expires (e.g. because its worker died) becomes
+    claimable again, and failed tasks are retried until `max_attempts`.
+    """
+
+    def enqueue(self, task_type: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Task]:
+        raise NotImplementedError
+
+    def extend_lease(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        raise NotImplementedError
+
+    def complete(self, task_id: str, worker_id: str):
+        raise NotImplementedError
+
+    def fail(self, task_id: str, worker_id: str, error: str):
+        raise NotImplementedError
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """Queue stored in a local SQLite file, safe to share between processes on one host."""
+
+    def __init__(self, path: str, max_attempts: int = 3, retry_backoff_seconds: float = 5.0):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id TEXT PRIMARY KEY, type TEXT NOT NULL, payload TEXT NOT NULL, "
+                "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+                "available_at REAL NOT NULL, lease_owner TEXT, lease_expires_at REAL, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, last_error TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_claim ON tasks(status, available_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front so two workers can never claim the same row.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def enqueue(self, task_type: str, payload: Dict[str, Any], max_attempts: Optional[int] = None) -> str:
+        task_id = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO tasks (id, type, payload, status, max_attempts, available_at, created_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (task_id, task_type, json.dumps(payload), max_attempts or self.max_attempts, now, now)
+            )
+        return task_id
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[Task]:
+        now = time.time()
+        with self._transaction() as conn:
+            # A lease that expired on the last attempt means the task took its worker down
+            # (or hung) every time; fail it instead of handing it out again.
+            conn.execute(
+                "UPDATE tasks SET status = 'failed', finished_at = ?, last_error = 'lease expired', "
+                "lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE status = 'running' AND lease_expires_at < ? AND attempts >= max_attempts",
+                (now, now)
+            )
+            row = conn.execute(
+                "SELECT id, type, payload, attempts, max_attempts, created_at FROM tasks "
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires_at < ? AND attempts < max_attempts) "
+                "ORDER BY available_at LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                return None
+            task_id, task_type, payload, attempts, max_attempts, created_at = row
+            conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires_at = ?, started_at = ? WHERE id = ?",
+                (worker_id, now + lease_seconds, now, task_id)
+            )
+        return Task(id=task_id, type=task_type, payload=json.loads(payload), attempts=attempts + 1,
+                    max_attempts=max_attempts, lease_owner=worker_id, created_at=created_at)
+
+    def extend_lease(self, task_id: str, worker_id: str, lease_seconds: float) -> bool:
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires_at = ? WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (time.time() + lease_seconds, task_id, worker_id)
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: str, worker_id: str):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE tasks SET status = 'done', finished_at = ?, lease_owner = NULL, lease_expires_at = NULL "
+                "WHERE id = ? AND lease_owner = ?",
+                (time.time(), task_id, worker_id)
+            )
+
+    def fail(self, task_id: str, worker_id: str, error: str):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM tasks WHERE id = ? AND lease_owner = ?", (task_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return
+            attempts, max_attempts = row
+            if attempts >= max_attempts:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', finished_at = ?, last_error = ?, "
+                    "lease_owner = NULL, lease_expires_at = NULL WHERE id = ?",
+                    (now, error, task_id)
+                )
+            else:
+                backoff = self.retry_backoff_seconds * (2 ** (attempts - 1))
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', available_at = ?, last_error = ?, "
+                    "lease_owner = NULL, lease_expires_at = NULL WHERE id = ?",
+                    (now + backoff, error, task_id)
+                )
+
+    def get_task(self, task_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            "SELECT id, type, status, attempts, max_attempts, created_at, started_at, finished_at, last_error "
+            "FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        keys = ("id", "type", "status", "attempts", "maxAttempts", "createdAt", "startedAt", "finishedAt", "lastError")
+        return dict(zip(keys, row))
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connection()
+        now = time.time()
+        by_status = dict(conn.execute("SELECT status, COUNT(*) FROM tasks GROUP BY status").fetchall())
+        (oldest,) = conn.execute("SELECT MIN(created_at) FROM tasks WHERE status = 'queued'").fetchone()
+        durations = [r[0] for r in conn.execute(
+            "SELECT finished_at - started_at FROM tasks WHERE status = 'done' "
+            "ORDER BY finished_at DESC LIMIT 200"
+        ).fetchall()]
+        return {
+            "backend": "sqlite",
+            "depth": by_status.get("queued", 0),
+            "running": by_status.get("running", 0),
+            "done": by_status.get("done", 0),
+            "failed": by_status.get("failed", 0),
+            "oldestQueuedAgeSeconds": now - oldest if oldest else 0.0,
+            "recentTaskLatencySeconds": summarize_latencies(durations),
+        }
+
+
+def summarize_latencies(durations: List[float]) -> Dict[str, float]:
+    """Count, mean and percentiles for a list of durations in seconds."""
+    if not durations:
+        return {"count": 0}
+    ordered = sorted(durations)
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean": sum(ordered) / len(ordered),
+        "p50": pct(0.50),
+        "p95": pct(0.95),
+        "p99": pct(0.99),
+        "max": ordered[-1],
+    }
+
+
+# --- Backend registry ---
+_BACKENDS: Dict[str, Callable[[], QueueBackend]] = {
+    "sqlite": lambda: SQLiteQueueBackend(
+        config.JOB_QUEUE_PATH,
+        max_attempts=config.JOB_QUEUE_MAX_ATTEMPTS,
+        retry_backoff_seconds=config.JOB_QUEUE_RETRY_BACKOFF_SECONDS,
+    ),
+}
+
+_queue: Optional[QueueBackend] = None
+_queue_lock = threading.Lock()
+
+def register_backend(name: str, factory: Callable[[], QueueBackend]):
+    """Makes a custom queue backend selectable through JOB_QUEUE_BACKEND."""
+    _BACKENDS[name] = factory
+
+def get_queue() -> QueueBackend:
+    """Returns the process-wide queue for the configured backend."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                backend = config.JOB_QUEUE_BACKEND
+                if backend not in _BACKENDS:
+                    raise ValueError(f"Unknown job queue backend: {backend}")
+                if backend == "sqlite":
+                    os.makedirs(os.path.dirname(os.path.abspath(config.JOB_QUEUE_PATH)), exist_ok=True)
+                _queue = _BACKENDS[backend]()
+    return _queue
@@ -0,0 +1,59 @@
+# backend/services/json_stream.py
+
+import json
+from typing import Any, Dict, List
+
+
+class JsonObjectStream:
+    """
+    Incremental JSON scanner for streamed model output.
+
+    Text is fed in arbitrary chunks; every JSON object that opens at nesting
+    depth `emit_depth` is returned from `feed` as soon as its closing brace
+    arrives. With `emit_depth=2`, a response shaped like
+    `{"rankings": [{...}, {...}]}` yields each ranking object in turn; with
+    `emit_depth=0` the whole top-level object is yielded once complete.
+    Anything outside the top-level value (such as a markdown code fence) is ignored.
+    """
+
+    def __init__(self, emit_depth: int = 0):
+        self.emit_depth = emit_depth
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._capture: List[str] = []
+        self._capturing = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        completed = []
+        start = 0 if self._capturing else None
+        for i, char in enumerate(chunk):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif char in '{[':
+                if char == '{' and self._depth == self.emit_depth and not self._capturing:
+                    self._capturing = True
+                    start = i
+                self._depth += 1
+            elif char in '}]':
+                self._depth = max(0, self._depth - 1)
+                if char == '}' and self._capturing and self._depth == self.emit_depth:
+                    self._capture.append(chunk[start:i + 1])
+                    completed.append(json.loads("".join(self._capture)))
+                    self._capture = []
+                    self._capturing = False
+                    start = None
+
+        if self._capturing and start is not None:
+            self._capture.append(chunk[start:])
+        return completed
@@ -0,0 +1,386 @@
+# backend/services/llm_gateway.py
+#
+# Single entry point for Gemini calls. Every call site goes through `generate`,
+# `stream` or `generate_sync`, which share:
+#   - one configured client and a cache of GenerativeModel objects,
+#   - a token-bucket limit on requests (and optionally tokens) per minute,
+#   - AIMD adaptive concurrency: the number of calls in flight grows by one per
+#     window of successful calls and is halved when the API throttles us,
+#   - retries with full-jitter exponential backoff on throttling and transient errors,
+#   - per-model latency and token-usage statistics, also exported on /metrics.
+
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from google.api_core import exceptions as google_exceptions
+
+from services import metrics
+from services.job_queue import summarize_latencies
+from services.rate_limit import TokenBucket
+import config
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+_THROTTLE_ERRORS = (google_exceptions.ResourceExhausted, google_exceptions.TooManyRequests)
+_TRANSIENT_ERRORS = _THROTTLE_ERRORS + (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.InternalServerError,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.GatewayTimeout,
+    asyncio.TimeoutError,
+    ConnectionError,
+)
+
+
+def is_throttle(error: BaseException) -> bool:
+    return isinstance(error, _THROTTLE_ERRORS) or getattr(error, "code", None) == 429
+
+def is_retryable(error: BaseException) -> bool:
+    return isinstance(error, _TRANSIENT_ERRORS) or is_throttle(error)
+
+def estimate_tokens(contents: Any) -> int:
+    """Rough prompt size (4 characters per token) used for the tokens-per-minute budget."""
+    if isinstance(contents, str):
+        return len(contents) // 4 + 1
+    if isinstance(contents, (bytes, bytearray)):
+        return len(contents) // 4 + 1
+    if isinstance(contents, dict):
+        return sum(estimate_tokens(v) for v in contents.values())
+    if isinstance(contents, (list, tuple)):
+        return sum(estimate_tokens(part) for part in contents)
+    return 1
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD concurrency limit shared by coroutines (on any event loop) and threads.
+
+    After a successful call the limit grows by 1/limit, i.e. by one slot per window of
+    `limit` successes; a throttled call multiplies it by `decrease_factor`. Throttles
+    from calls admitted before the last decrease are ignored, so one burst of 429s
+    backs off once while throttling that persists keeps backing off. Admission times
+    come from `clock`.
+    """
+
+    def __init__(self, initial: float, minimum: float = 1, maximum: float = 64,
+                 decrease_factor: float = 0.5, clock: Callable[[], float] = time.monotonic):
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.decrease_factor = decrease_factor
+        self._clock = clock
+        self.in_flight = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._waiters: deque = deque()
+
+    def _try_take(self, wake: Callable[[], None]) -> bool:
+        with self._lock:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            self._waiters.append(wake)
+            return False
+
+    def _forget(self, wake: Callable[[], None]):
+        with self._lock:
+            try:
+                self._waiters.remove(wake)
+            except ValueError:
+                pass
+
+    async def acquire(self) -> float:
+        """Waits for a slot; returns the admission time to pass back to `release`."""
+        loop = asyncio.get_running_loop()
+        while True:
+            woken = loop.create_future()
+
+            def wake(future=woken):
+                try:
+                    loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+                except RuntimeError:
+                    # The waiter's loop is gone; it can no longer take the slot.
+                    pass
+
+            if self._try_take(wake):
+                return self._clock()
+            try:
+                await woken
+            except asyncio.CancelledError:
+                self._forget(wake)
+                # We may have been woken for a free slot; pass it on.
+                self._wake_waiters()
+                raise
+            self._forget(wake)
+
+    def acquire_sync(self) -> float:
+        while True:
+            event = threading.Event()
+            if self._try_take(event.set):
+                return self._clock()
+            event.wait()
+            self._forget(event.set)
+
+    def release(self, admitted: float, throttled: bool = False, succeeded: bool = True):
+        with self._lock:
+            self.in_flight -= 1
+            if throttled:
+                if admitted >= self._last_decrease:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self._last_decrease = self._clock()
+                    self.decreases += 1
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+        self._wake_waiters()
+
+    def _wake_waiters(self):
+        with self._lock:
+            free = int(self.limit) - self.in_flight
+            to_wake = [self._waiters.popleft() for _ in range(min(max(free, 0), len(self._waiters)))]
+        for wake in to_wake:
+            wake()
+
+
+class LLMGateway:
+    """Shared Gemini client: cached models, rate limits, adaptive concurrency, retries and stats."""
+
+    def __init__(self, api_key: Optional[str] = None, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_attempts: Optional[int] = None):
+        # The SDK is imported on first use: it takes about half a second to import,
+        # which would otherwise be paid by every process start and health check.
+        import google.generativeai as genai
+        genai.configure(api_key=api_key or config.GEMINI_API_KEY)
+        self._genai = genai
+        rpm = config.LLM_REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        tpm = config.LLM_TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.requests = TokenBucket(rpm / 60, capacity=config.LLM_REQUEST_BURST)
+        self.tokens = TokenBucket(tpm / 60, capacity=max(1.0, tpm / 6)) if tpm > 0 else None
+        self.concurrency = AdaptiveConcurrency(
+            config.LLM_INITIAL_CONCURRENCY, config.LLM_MIN_CONCURRENCY, config.LLM_MAX_CONCURRENCY
+        )
+        self.max_attempts = max_attempts or config.LLM_MAX_ATTEMPTS
+        self._models: Dict[Tuple[str, str, str], "genai.GenerativeModel"] = {}
+        self._models_lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
+            "calls": 0, "succeeded": 0, "failed": 0, "retries": 0, "throttled": 0,
+            "promptTokens": 0, "outputTokens": 0, "latencies": deque(maxlen=500),
+        })
+        self._stats_lock = threading.Lock()
+
+    # --- Models ---
+    def get_model(self, model_name: str, generation_config: Optional[Dict[str, Any]] = None,
+                  system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+        """Returns a cached GenerativeModel for this exact configuration."""
+        key = (model_name, json.dumps(generation_config or {}, sort_keys=True, default=str), system_instruction or "")
+        with self._models_lock:
+            model = self._models.get(key)
+            if model is None:
+                model = self._genai.GenerativeModel(
+                    model_name=model_name, generation_config=generation_config, system_instruction=system_instruction
+                )
+                self._models[key] = model
+            return model
+
+    # --- Bookkeeping ---
+    def _record(self, model_name: str, started: float, response: Any = None, error: Optional[BaseException] = None):
+        try:
+            usage = response.usage_metadata if response is not None else None
+        except Exception:
+            # Not available on a stream that was abandoned early.
+            usage = None
+        latency = time.perf_counter() - started
+        throttled = error is not None and is_throttle(error)
+        prompt_tokens = (getattr(usage, "prompt_token_count", 0) or 0) if usage is not None else 0
+        output_tokens = (getattr(usage, "candidates_token_count", 0) or 0) if usage is not None else 0
+        with self._stats_lock:
+            stats = self._stats[model_name]
+            stats["calls"] += 1
+            stats["latencies"].append(latency)
+            if error is None:
+                stats["succeeded"] += 1
+            else:
+                stats["failed"] += 1
+                if throttled:
+                    stats["throttled"] += 1
+            stats["promptTokens"] += prompt_tokens
+            stats["outputTokens"] += output_tokens
+        metrics.LLM_CALL_SECONDS.observe(latency, model=model_name, outcome="ok" if error is None else "error")
+        if throttled:
+            metrics.LLM_THROTTLED.inc(model=model_name)
+        if prompt_tokens:
+            metrics.LLM_TOKENS.inc(prompt_tokens, model=model_name, kind="prompt")
+        if output_tokens:
+            metrics.LLM_TOKENS.inc(output_tokens, model=model_name, kind="output")
+
+    def _note_retry(self, model_name: str):
+        with self._stats_lock:
+            self._stats[model_name]["retries"] += 1
+        metrics.LLM_RETRIES.inc(model=model_name)
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter: spreads retries from many callers instead of having them collide again.
+        return random.uniform(0, min(config.LLM_RETRY_MAX_SECONDS, config.LLM_RETRY_BASE_SECONDS * 2 ** (attempt - 1)))
+
+    async def _admit(self, contents: Any) -> float:
+        await self.requests.acquire()
+        if self.tokens is not None:
+            await self.tokens.acquire(estimate_tokens(contents))
+        return await self.concurrency.acquire()
+
+    # --- Calls ---
+    async def generate(self, model_name: str, contents: Any, *, generation_config: Optional[Dict[str, Any]] = None,
+                       system_instruction: Optional[str] = None,
+                       request_generation_config: Any = None, **request_kwargs) -> Any:
+        """
+        `generate_content_async` through the gateway. `generation_config` and
+        `system_instruction` select the (cached) model; `request_generation_config` and
+        other keyword arguments are passed to the call itself.
+        """
+        model = self.get_model(model_name, generation_config, system_instruction)
+        if request_generation_config is not None:
+            request_kwargs["generation_config"] = request_generation_config
+        for attempt in range(1, self.max_attempts + 1):
+            admitted = await self._admit(contents)
+            started = time.perf_counter()
+            try:
+                response = await model.generate_content_async(contents, **request_kwargs)
+            except Exception as e:
+                throttled = is_throttle(e)
+                self.concurrency.release(admitted, throttled=throttled, succeeded=False)
+                self._record(model_name, started, error=e)
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                self._note_retry(model_name)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                self.concurrency.release(admitted, succeeded=False)
+                raise
+            self.concurrency.release(admitted)
+            self._record(model_name, started, response)
+            return response
+
+    async def stream(self, model_name: str, contents: Any, *, generation_config: Optional[Dict[str, Any]] = None,
+                     system_instruction: Optional[str] = None,
+                     request_generation_config: Any = None, **request_kwargs) -> AsyncIterator[str]:
+        """
+        Streams response text chunks. The call is retried like `generate` until the first
+        chunk arrives; after that an error is raised to the caller, which has already
+        consumed part of the answer. Use with `contextlib.aclosing` when the caller may
+        stop early, so the concurrency slot is released right away.
+        """
+        model = self.get_model(model_name, generation_config, system_instruction)
+        if request_generation_config is not None:
+            request_kwargs["generation_config"] = request_generation_config
+        attempt = 0
+        while True:
+            attempt += 1
+            admitted = await self._admit(contents)
+            started = time.perf_counter()
+            response = None
+            received = False
+            throttled = False
+            error: Optional[BaseException] = None
+            try:
+                response = await model.generate_content_async(contents, stream=True, **request_kwargs)
+                async for chunk in response:
+                    received = True
+                    yield chunk.text
+                return
+            except Exception as e:
+                error = e
+                throttled = is_throttle(e)
+                if received or attempt >= self.max_attempts or not is_retryable(e):
+                    raise
+            finally:
+                self.concurrency.release(admitted, throttled=throttled, succeeded=error is None and received)
+                self._record(model_name, started, response, error)
+            self._note_retry(model_name)
+            await asyncio.sleep(self._backoff(attempt))
+
+    def generate_sync(self, model_name: str, contents: Any, *, generation_config: Optional[Dict[str, Any]] = None,
+                      system_instruction: Optional[str] = None,
+                      request_generation_config: Any = None, **request_kwargs) -> Any:
+        """Blocking `generate` for code that runs outside the event loop, sharing the same limits."""
+        model = self.get_model(model_name, generation_config, system_instruction)
+        if request_generation_config is not None:
+            request_kwargs["generation_config"] = request_generation_config
+        for attempt in range(1, self.max_attempts + 1):
+            self.requests.acquire_sync()
+            if self.tokens is not None:
+                self.tokens.acquire_sync(estimate_tokens(contents))
+            admitted = self.concurrency.acquire_sync()
+            started = time.perf_counter()
+            try:
+                response = model.generate_content(contents, **request_kwargs)
+            except Exception as e:
+                self.concurrency.release(admitted, throttled=is_throttle(e), succeeded=False)
+                self._record(model_name, started, error=e)
+                if attempt == self.max_attempts or not is_retryable(e):
+                    raise
+                self._note_retry(model_name)
+                time.sleep(self._backoff(attempt))
+                continue
+            except BaseException:
+                self.concurrency.release(admitted, succeeded=False)
+                raise
+            self.concurrency.release(admitted)
+            self._record(model_name, started, response)
+            return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            models = {
+                name: {**{k: v for k, v in s.items() if k != "latencies"},
+                       "latencySeconds": summarize_latencies(list(s["latencies"]))}
+                for name, s in self._stats.items()
+            }
+        return {
+            "concurrencyLimit": round(self.concurrency.limit, 2),
+            "inFlight": self.concurrency.in_flight,
+            "concurrencyDecreases": self.concurrency.decreases,
+            "requestTokensAvailable": round(self.requests.available, 2),
+            "models": models,
+        }
+
+
+_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+def get_gateway() -> LLMGateway:
+    """Returns the process-wide gateway, configured from `config`."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
+
+def set_gateway(gateway: Optional[LLMGateway]):
+    """Replaces the process-wide gateway, e.g. with one over fake models for benchmarks."""
+    global _gateway
+    with _gateway_lock:
+        _gateway = gateway
+
+# Read at scrape time; no gateway (and no SDK import) is created just to report zeros.
+metrics.LLM_IN_FLIGHT.set_function(lambda: _gateway.concurrency.in_flight if _gateway else 0)
+metrics.LLM_CONCURRENCY_LIMIT.set_function(lambda: _gateway.concurrency.limit if _gateway else 0)
+
+async def generate(model_name: str, contents: Any, **kwargs) -> Any:
+    return await get_gateway().generate(model_name, contents, **kwargs)
+
+def stream(model_name: str, contents: Any, **kwargs) -> AsyncIterator[str]:
+    return get_gateway().stream(model_name, contents, **kwargs)
+
+def generate_sync(model_name: str, contents: Any, **kwargs) -> Any:
+    return get_gateway().generate_sync(model_name, contents, **kwargs)
+
+def stats() -> Dict[str, Any]:
+    return get_gateway().stats()
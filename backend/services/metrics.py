@@ -0,0 +1,278 @@
+# backend/services/metrics.py
+#
+# Process-wide metrics in the Prometheus text exposition format (0.0.4), served on
+# GET /metrics by the API and on `worker.py --metrics-port` by dedicated workers.
+# Counters, gauges and histograms are kept in memory with a small lock each, so
+# recording from the event loop or from worker threads is cheap and safe.
+#
+# `stage(name)` is the usual entry point: it times one pipeline stage into
+# resumerank_stage_seconds{stage=...} and, with tracing on, records it as a span.
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from services import tracing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; spans a cache hit (~1 ms) to a slow model call (~1 min).
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra is not None:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, str, float]]:
+        """(name suffix, formatted labels, value) per exposed sample."""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """Monotonic count; by convention the name ends in `_total`."""
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [("", _format_labels(self.labelnames, key), value) for key, value in values]
+
+
+GaugeFunction = Callable[[], Union[float, Dict[LabelValues, float]]]
+
+class Gauge(Metric):
+    """
+    Value that goes up and down. Either set directly, or backed by a function read at
+    scrape time (returning one value, or {label values: value} for a labelled gauge).
+    """
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 function: Optional[GaugeFunction] = None):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function = function
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Optional[GaugeFunction]):
+        self._function = function
+
+    @contextmanager
+    def track_in_progress(self, **labels) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        if self._function is not None:
+            try:
+                value = self._function()
+            except Exception:
+                return []
+            values = value if isinstance(value, dict) else {(): value}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [("", _format_labels(self.labelnames, key), v) for key, v in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Label values -> [per-bucket counts (non-cumulative), sum, count]
+        self._series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        samples = []
+        for key, (counts, total, count) in series:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = "+Inf" if math.isinf(bound) else _format_value(bound)
+                samples.append(("_bucket", _format_labels(self.labelnames, key, ("le", le)), cumulative))
+            samples.append(("_sum", _format_labels(self.labelnames, key), total))
+            samples.append(("_count", _format_labels(self.labelnames, key), count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(m.render() for m in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+# --- Pipeline ---
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "resumerank_stage_seconds",
+    "Time spent in each pipeline stage (extract, dedup, prefilter, llm, parse, firestore_write, "
+    "allocate_slots, draft_emails, calendar_insert, outbox_enqueue, ...).",
+    ["stage"]))
+CANDIDATES_IN_FLIGHT = REGISTRY.register(Gauge(
+    "resumerank_candidates_in_flight", "Resumes currently being extracted, scored or stored."))
+CANDIDATES = REGISTRY.register(Counter(
+    "resumerank_candidates_total", "Candidates stored, by status (scored, duplicate, filtered, extraction_failed).", ["status"]))
+
+# --- Tasks ---
+TASKS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "resumerank_tasks_in_flight", "Queued tasks (e.g. process_resumes jobs) being run by this process's workers.",
+    ["type"]))
+TASK_SECONDS = REGISTRY.register(Histogram(
+    "resumerank_task_seconds", "Task run time by type and outcome (completed, failed, lease_lost).", ["type", "outcome"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)))
+
+# --- LLM ---
+LLM_CALL_SECONDS = REGISTRY.register(Histogram(
+    "resumerank_llm_call_seconds", "Latency of each Gemini call attempt by model and outcome (ok, error).",
+    ["model", "outcome"]))
+LLM_TOKENS = REGISTRY.register(Counter(
+    "resumerank_llm_tokens_total", "Gemini tokens reported by the API, by model and kind (prompt, output).",
+    ["model", "kind"]))
+LLM_RETRIES = REGISTRY.register(Counter(
+    "resumerank_llm_retries_total", "Gemini call attempts that were retried, by model.", ["model"]))
+LLM_THROTTLED = REGISTRY.register(Counter(
+    "resumerank_llm_throttled_total", "Gemini call attempts rejected with 429 / resource exhausted.", ["model"]))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "resumerank_llm_in_flight", "Gemini calls currently in flight."))
+LLM_CONCURRENCY_LIMIT = REGISTRY.register(Gauge(
+    "resumerank_llm_concurrency_limit", "Current adaptive limit on Gemini calls in flight."))
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[None]:
+    """Times a pipeline stage into resumerank_stage_seconds and records it as a span when tracing."""
+    started = time.perf_counter()
+    with tracing.span(name, **attributes):
+        try:
+            yield
+        finally:
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage=name)
+
+def observe_stage(name: str, seconds: float):
+    """Records time for a stage measured by the caller (e.g. spread over a stream)."""
+    STAGE_SECONDS.observe(seconds, stage=name)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves GET /metrics from a daemon thread, for processes without the API (worker.py)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
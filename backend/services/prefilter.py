@@ -0,0 +1,119 @@
+# backend/services/prefilter.py
+#
+# Lexical first stage of two-stage ranking. A BM25 inverted index over the extracted
+# resume texts scores every resume against the job description in one vectorized
+# pass; only the shortlist goes on to LLM scoring.
+
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Union
+
+import numpy as np
+
+import config
+
+# Keeps tokens such as "c++", "c#", "node.js" and ".net" intact.
+_TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*|\.[a-z][a-z0-9]*")
+
+_STOPWORDS = frozenset("""
+a about above after all also an and any are as at be been being both but by can could did do does
+doing during each for from further had has have having he her here hers him his how i if in into is
+it its just me more most my no nor not of off on once only or other our ours out over own same she
+should so some such than that the their them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your yours
+experience work working years year team teams role skills ability strong using including etc
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased terms with stopwords and one-character noise removed."""
+    return [t for t in _TOKEN_PATTERN.findall((text or "").lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+
+def term_counts(text: str) -> Dict[str, int]:
+    """How often each term of `tokenize(text)` occurs; all BM25Index needs of a document."""
+    return dict(Counter(tokenize(text)))
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed set of documents, stored as flat posting arrays sorted by
+    term so a query touches only the postings of its own terms. Each document is its
+    text or, to avoid keeping texts around, its `term_counts`.
+    """
+
+    def __init__(self, documents: Iterable[Union[str, Mapping[str, int]]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[int] = []
+        lengths: List[int] = []
+        for doc_id, document in enumerate(documents):
+            counts = term_counts(document) if isinstance(document, str) else document
+            lengths.append(sum(counts.values()))
+            for token, count in counts.items():
+                term_ids.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                frequencies.append(count)
+
+        self.num_docs = len(lengths)
+        self.doc_lengths = np.asarray(lengths, dtype=np.float64)
+        avg_length = self.doc_lengths.mean() if self.num_docs else 0.0
+        self._length_norm = k1 * (1 - b + b * self.doc_lengths / avg_length) if avg_length else np.full(self.num_docs, k1)
+
+        # One posting per (term, doc), sorted by term.
+        vocab_size = len(self.vocabulary)
+        keys = np.asarray(term_ids, dtype=np.int64) * max(self.num_docs, 1) + np.asarray(doc_ids, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        self._posting_terms = keys // max(self.num_docs, 1)
+        self._posting_docs = keys % max(self.num_docs, 1)
+        self._posting_tf = np.asarray(frequencies, dtype=np.float64)[order]
+        self._term_offsets = np.searchsorted(self._posting_terms, np.arange(vocab_size + 1))
+
+        doc_frequency = np.diff(self._term_offsets).astype(np.float64)
+        self.idf = np.log1p((self.num_docs - doc_frequency + 0.5) / (doc_frequency + 0.5))
+
+    def score(self, query: str) -> np.ndarray:
+        """BM25 score of every document for `query`; repeated query terms count once each."""
+        scores = np.zeros(self.num_docs, dtype=np.float64)
+        term_ids = sorted({self.vocabulary[t] for t in tokenize(query) if t in self.vocabulary})
+        if not term_ids:
+            return scores
+        spans = [np.arange(self._term_offsets[t], self._term_offsets[t + 1]) for t in term_ids]
+        postings = np.concatenate(spans)
+        tf = self._posting_tf[postings]
+        docs = self._posting_docs[postings]
+        weights = self.idf[self._posting_terms[postings]] * tf * (self.k1 + 1) / (tf + self._length_norm[docs])
+        np.add.at(scores, docs, weights)
+        return scores
+
+
+def normalize(scores: np.ndarray) -> np.ndarray:
+    """Scales scores to [0, 1] relative to the best match in this batch."""
+    top = scores.max() if scores.size else 0.0
+    return scores / top if top > 0 else np.zeros_like(scores)
+
+def shortlist(scores: np.ndarray, top_k: Optional[int] = None, min_score: Optional[float] = None) -> List[int]:
+    """
+    Indices that go on to LLM scoring: the `top_k` best and anything whose normalized
+    score reaches `min_score`. With neither set, every document passes.
+    """
+    top_k = config.PREFILTER_TOP_K if top_k is None else top_k
+    min_score = config.PREFILTER_MIN_SCORE if min_score is None else min_score
+    if top_k <= 0 and min_score <= 0:
+        return list(range(scores.size))
+    keep = np.zeros(scores.size, dtype=bool)
+    if top_k > 0:
+        keep[np.argsort(-scores, kind="stable")[:top_k]] = True
+    if min_score > 0:
+        keep |= normalize(scores) >= min_score
+    return np.flatnonzero(keep).tolist()
+
+def rank_positions(scores: np.ndarray) -> np.ndarray:
+    """1-based rank of each document by score (ties keep input order)."""
+    ranks = np.empty(scores.size, dtype=np.int64)
+    ranks[np.argsort(-scores, kind="stable")] = np.arange(1, scores.size + 1)
+    return ranks
@@ -0,0 +1,95 @@
+# backend/services/profiles.py
+#
+# Compact structured profiles (skills, years of experience, titles) extracted once per
+# resume at scoring time and stored on the candidate. Rescoring after a job description
+# edit works from these instead of the resume, and a cheap local match score over them
+# tells which candidates the edit can actually move.
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from services import prefilter
+
+MAX_SKILLS = 40
+MAX_TITLES = 10
+
+# Instructions shared by every prompt that asks the model for a profile.
+PROFILE_INSTRUCTIONS = (
+    "profile: an object with skills (up to 40 short lowercase skill names, e.g. \"python\", \"kubernetes\"), "
+    "yearsExperience (total years of professional experience as a number, or null if unclear) and "
+    "titles (up to 10 job titles the candidate has held)."
+)
+
+_YEARS_PATTERN = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?(?:years|yrs)", re.IGNORECASE)
+
+# Weight of term coverage versus years of experience in the local match score.
+_COVERAGE_WEIGHT = 0.8
+
+
+def _clean_list(values: Any, limit: int) -> list:
+    if not isinstance(values, list):
+        return []
+    cleaned = (str(v).strip().lower() for v in values if isinstance(v, (str, int, float)))
+    return list(dict.fromkeys(v for v in cleaned if v))[:limit]
+
+def normalize(raw: Any) -> Optional[Dict[str, Any]]:
+    """Validated, size-capped copy of a model-produced profile, or None if there is nothing usable."""
+    if not isinstance(raw, dict):
+        return None
+    years = raw.get("yearsExperience")
+    try:
+        years = round(float(years), 1) if years is not None else None
+    except (TypeError, ValueError):
+        years = None
+    profile = {
+        "skills": _clean_list(raw.get("skills"), MAX_SKILLS),
+        "yearsExperience": years if years is None or 0 <= years <= 60 else None,
+        "titles": _clean_list(raw.get("titles"), MAX_TITLES),
+    }
+    if not profile["skills"] and not profile["titles"] and profile["yearsExperience"] is None:
+        return None
+    return profile
+
+def description_hash(description: str) -> str:
+    """Short fingerprint of a job description, stored with scores to record what they were given for."""
+    return hashlib.sha256((description or "").encode("utf-8")).hexdigest()[:16]
+
+def profile_terms(profile: Dict[str, Any]) -> frozenset:
+    """Search terms of the profile's skills and titles, tokenized like job descriptions."""
+    return frozenset(prefilter.tokenize(" ".join(profile.get("skills", []) + profile.get("titles", []))))
+
+
+class DescriptionRequirements:
+    """The parts of a job description the local match score looks at."""
+
+    def __init__(self, description: str):
+        self.terms = frozenset(prefilter.tokenize(description))
+        years = [int(m) for m in _YEARS_PATTERN.findall(description or "")]
+        self.required_years = max(years) if years else None
+
+    def __eq__(self, other):
+        return isinstance(other, DescriptionRequirements) and \
+            (self.terms, self.required_years) == (other.terms, other.required_years)
+
+    def changed_terms(self, other: "DescriptionRequirements") -> frozenset:
+        return self.terms ^ other.terms
+
+    def years_fit(self, profile: Dict[str, Any]) -> float:
+        """How much of the required experience the profile has (0-1); 1 when none is stated."""
+        years = profile.get("yearsExperience")
+        if not self.required_years:
+            return 1.0
+        if years is None:
+            return 0.5
+        return min(1.0, years / self.required_years)
+
+    def match_score(self, profile: Dict[str, Any], terms: Optional[Iterable[str]] = None) -> float:
+        """
+        Local 0-1 fit of a profile: the share of description terms it covers, blended
+        with `years_fit`. Not comparable to model scores; only differences between two
+        descriptions are meaningful.
+        """
+        terms = profile_terms(profile) if terms is None else terms
+        coverage = len(self.terms.intersection(terms)) / len(self.terms) if self.terms else 0.0
+        return _COVERAGE_WEIGHT * coverage + (1 - _COVERAGE_WEIGHT) * self.years_fit(profile)
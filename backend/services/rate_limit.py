@@ -0,0 +1,54 @@
+# backend/services/rate_limit.py
+
+import asyncio
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """
+    Token bucket allowing `rate` units per second with bursts up to `capacity`.
+
+    Callers reserve units up front and then wait until the bucket would have had them,
+    so waiters are served in order and the bucket can be shared by coroutines on any
+    event loop as well as by plain threads. A rate of 0 disables limiting. `clock`
+    returns the current time in seconds.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """Takes `amount` units and returns how many seconds to wait before using them."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A request larger than the bucket still goes through once the bucket is full.
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, amount: float = 1.0):
+        wait = self._reserve(amount)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_sync(self, amount: float = 1.0):
+        wait = self._reserve(amount)
+        if wait > 0:
+            time.sleep(wait)
+
+    @property
+    def available(self) -> float:
+        with self._lock:
+            if self.rate <= 0:
+                return self.capacity
+            return min(self.capacity, self._tokens + (self._clock() - self._updated) * self.rate)
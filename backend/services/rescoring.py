@@ -0,0 +1,205 @@
+# backend/services/rescoring.py
+#
+# Incremental rescoring after a job description edit. Candidates are rescored from the
+# structured profiles stored at ingest, and only those whose profile overlaps what the
+# edit changed (added or removed terms, the experience requirement) are touched at all.
+
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from services import llm_gateway, profiles, resume_processing, scoring_cache
+from services.job_queue import Task
+from services.write_batcher import FIRESTORE_MAX_BATCH_OPERATIONS
+import services.firestore_async as db
+import config
+
+# Task type names used on the job queue.
+RESCORE_CANDIDATES = "rescore_candidates"
+
+# Bump whenever the rescoring prompt changes so stale cached scores are not reused.
+RESCORE_PROMPT_VERSION = '1'
+
+_CANDIDATE_FIELDS = ['profile', 'summary', 'suitabilityScore', 'baseSuitabilityScore', 'baseMatchScore',
+                     'scoredForDescriptionHash']
+
+
+def select_affected(candidates: List[Dict[str, Any]], old: profiles.DescriptionRequirements,
+                    new: profiles.DescriptionRequirements, min_delta: Optional[float] = None
+                    ) -> Tuple[List[Tuple[Dict[str, Any], float]], int]:
+    """
+    Returns the candidates the edit can move, each with the change in their local match
+    score, and how many candidates had no stored profile. A candidate is affected when
+    their profile has an added or removed term, or the experience requirement changed
+    for them, and their local score moves by at least `min_delta`. Every other
+    candidate only sees the uniform shift from the description's length changing,
+    which leaves their order unchanged.
+    """
+    min_delta = config.RESCORE_MIN_DELTA if min_delta is None else min_delta
+    changed_terms = old.changed_terms(new)
+    affected, without_profile = [], 0
+    for candidate in candidates:
+        profile = candidate.get('profile')
+        if not profile:
+            without_profile += 1
+            continue
+        terms = profiles.profile_terms(profile)
+        if terms.isdisjoint(changed_terms) and old.years_fit(profile) == new.years_fit(profile):
+            continue
+        delta = new.match_score(profile, terms) - old.match_score(profile, terms)
+        if abs(delta) >= min_delta:
+            affected.append((candidate, delta))
+    return affected, without_profile
+
+def _candidate_text(candidate: Dict[str, Any]) -> str:
+    summary = (candidate.get('summary') or "")[:config.RESCORE_SUMMARY_CHARS]
+    return json.dumps({**candidate['profile'], "summary": summary}, sort_keys=True)
+
+def _cache_key(job_description: str, candidate: Dict[str, Any]) -> str:
+    return scoring_cache.make_key(job_description, _candidate_text(candidate), resume_processing.MODEL_NAME,
+                                  RESCORE_PROMPT_VERSION)
+
+def _build_prompt(job_description: str, candidates: List[Dict[str, Any]]) -> str:
+    lines = "\n".join(f"Candidate {i}: {_candidate_text(c)}" for i, c in enumerate(candidates))
+    return f"""
+    The job description below has been updated. Score how well each candidate fits it, using their
+    profile (skills, yearsExperience, titles) and the summary of their resume.
+    Return a JSON object of the form {{"scores": [{{"index": 0, "suitabilityScore": 0.5}}]}} with one
+    entry per candidate, where suitabilityScore is from 0 to 1.
+
+    Job Description:
+    {job_description}
+
+    Candidates:
+    {lines}
+    """
+
+def _parse_scores(response_text: str, count: int) -> Dict[int, float]:
+    cleaned_response = response_text.strip().replace('```json', '').replace('```', '')
+    scores = {}
+    for entry in json.loads(cleaned_response).get('scores', []):
+        index = entry.get('index')
+        if isinstance(index, int) and 0 <= index < count:
+            scores[index] = min(1.0, max(0.0, float(entry['suitabilityScore'])))
+    return scores
+
+async def _score_with_model(job_description: str, candidates: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Scores candidates in small batched calls, reusing cached scores; failed batches are left out."""
+    cache = scoring_cache.get_cache()
+    scores: Dict[str, float] = {}
+    pending = []
+    for candidate in candidates:
+        cached = cache.get(_cache_key(job_description, candidate))
+        if cached is not None:
+            scores[candidate['id']] = cached['suitabilityScore']
+        else:
+            pending.append(candidate)
+
+    semaphore = asyncio.Semaphore(config.RESUME_PROCESSING_CONCURRENCY)
+    batch_size = max(1, config.RESCORE_BATCH_SIZE)
+
+    async def score_batch(batch: List[Dict[str, Any]]):
+        async with semaphore:
+            try:
+                response = await llm_gateway.generate(resume_processing.MODEL_NAME, _build_prompt(job_description, batch))
+                batch_scores = _parse_scores(response.text, len(batch))
+            except Exception as e:
+                print(f"Rescoring batch of {len(batch)} candidates failed: {e}")
+                return
+        for index, score in batch_scores.items():
+            scores[batch[index]['id']] = score
+            cache.set(_cache_key(job_description, batch[index]), {"suitabilityScore": score})
+
+    await asyncio.gather(*(score_batch(pending[i:i + batch_size]) for i in range(0, len(pending), batch_size)))
+    return scores
+
+def _local_score(candidate: Dict[str, Any], old: profiles.DescriptionRequirements,
+                 new: profiles.DescriptionRequirements) -> Tuple[float, float, float]:
+    """
+    Local rescore of one candidate: their base score (the last model score) shifted by
+    how much their local match moved since that score was given. Returns the score, the
+    base score and the base match. Computed from the stored base, never from the current
+    score, so applying it twice or after several edits gives the same result.
+    """
+    profile = candidate['profile']
+    base = candidate.get('baseSuitabilityScore', candidate.get('suitabilityScore', 0))
+    base_match = candidate.get('baseMatchScore', old.match_score(profile))
+    return min(1.0, max(0.0, base + new.match_score(profile) - base_match)), base, base_match
+
+async def rescore_job(job_id: str, previous_description: str, description_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Rescores a job's candidates after its description changed. `description_hash` is the
+    fingerprint of the description the edit wrote; if the job has been edited again
+    since, the task is skipped and the task queued by the later edit does the work.
+    Scores are compared against the description they were last given for (the job's
+    `scoredDescription`, or `previous_description` for jobs rescored before it existed).
+    Candidates already scored for the current description (at ingest, or by an earlier
+    attempt of this task) are left alone, so a retried task does not apply a change twice.
+    Returns counts of what was done, which are also stored on the job as `lastRescore`.
+    """
+    job = await db.get_job(job_id)
+    if not job:
+        return {}
+    description = job.get('jobDescription', "")
+    current_hash = profiles.description_hash(description)
+    if description_hash is not None and description_hash != current_hash:
+        return {"skipped": "superseded by a later edit"}
+    old = profiles.DescriptionRequirements(job.get('scoredDescription', previous_description))
+    new = profiles.DescriptionRequirements(description)
+    result = {"mode": config.RESCORE_MODE, "candidates": 0, "withoutProfile": 0, "affected": 0, "rescored": 0}
+    job_update = {'lastRescore': result, 'scoredDescription': description}
+    if old == new:
+        # Wording or formatting only: nothing the scores depend on has changed.
+        await db.update_job(job_id, job_update)
+        return result
+
+    candidates = await db.list_candidate_fields(job_id, _CANDIDATE_FIELDS)
+    pending = [c for c in candidates if c.get('scoredForDescriptionHash') != current_hash]
+    affected, result["withoutProfile"] = select_affected(pending, old, new)
+    result.update(candidates=len(candidates), affected=len(affected))
+
+    by_id = {c['id']: c for c, _ in affected}
+    if config.RESCORE_MODE == "local":
+        local = {c['id']: _local_score(c, old, new) for c, _ in affected}
+        scores = {candidate_id: score for candidate_id, (score, _, _) in local.items()}
+        bases = {candidate_id: (base, base_match) for candidate_id, (_, base, base_match) in local.items()}
+    else:
+        scores = await _score_with_model(description, [c for c, _ in affected])
+        # A model score is a new base, given for the new description.
+        bases = {candidate_id: (score, new.match_score(by_id[candidate_id]['profile']))
+                 for candidate_id, score in scores.items()}
+    result["rescored"] = len(scores)
+
+    updates = [
+        (candidate_id, {
+            'suitabilityScore': score,
+            'previousSuitabilityScore': by_id[candidate_id].get('suitabilityScore', 0),
+            'baseSuitabilityScore': bases[candidate_id][0],
+            'baseMatchScore': bases[candidate_id][1],
+            'scoredForDescriptionHash': current_hash,
+        })
+        for candidate_id, score in scores.items()
+    ]
+    # Leave room in the last batch for the job update.
+    chunk_size = min(config.FIRESTORE_WRITE_BATCH_SIZE, FIRESTORE_MAX_BATCH_OPERATIONS - 1)
+    chunks = [updates[i:i + chunk_size] for i in range(0, len(updates), chunk_size)] or [[]]
+    for i, chunk in enumerate(chunks):
+        await db.update_candidate_batch(job_id, chunk, job_update if i == len(chunks) - 1 else None)
+    return result
+
+async def handle_rescore_candidates(task: Task):
+    """Queue handler for RESCORE_CANDIDATES tasks."""
+    job_id = task.payload['jobId']
+    try:
+        result = await rescore_job(job_id, task.payload['previousDescription'], task.payload.get('descriptionHash'))
+    except Exception as e:
+        print(f"Error rescoring candidates for job {job_id} (attempt {task.attempts}): {e}")
+        if task.is_last_attempt:
+            await db.update_job(job_id, {'lastRescore': {"error": str(e)}})
+        raise
+    print(f"Rescored job {job_id}: {result}")
+
+
+TASK_HANDLERS = {
+    RESCORE_CANDIDATES: handle_rescore_candidates,
+}
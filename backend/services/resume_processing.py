@@ -1,27 +1,27 @@
-import os
-import google.generativeai as genai
 import json
+import time
+from contextlib import aclosing
 
-# Get the Gemini API key from environment variables
-gemini_api_key = os.getenv("GEMINI_API_KEY")
+from services import llm_gateway, metrics, profiles, scoring_cache
+from services.json_stream import JsonObjectStream
+import config
 
-# Configure the Gemini API
-genai.configure(api_key=gemini_api_key)
+# Gemini model used for scoring; calls go through services.llm_gateway.
+MODEL_NAME = 'gemini-pro'
 
-# Create a Gemini model instance
-model = genai.GenerativeModel('gemini-pro')
+# Bump whenever the prompt changes so stale cached scores are not reused.
+PROMPT_VERSION = '2'
 
-def process_resume(job_description, resume_content):
-    """
-    Uses the Gemini LLM to analyze a resume against a job description and extract structured data.
-    """
-    prompt = f"""
+def _build_prompt(job_description, resume_content):
+    """Builds the scoring prompt for a single resume."""
+    return f"""
     Analyze the following resume based on the provided job description.
     Return a JSON object with the following fields:
     - candidateName: The full name of the candidate.
     - candidateEmail: The email address of the candidate.
     - suitabilityScore: A score from 0 to 1 indicating how well the candidate's skills and experience match the job description.
     - summary: A brief summary of the candidate's qualifications and why they are a good fit for the role.
+    - {profiles.PROFILE_INSTRUCTIONS}
 
     Job Description:
     {job_description}
@@ -30,17 +30,93 @@ def process_resume(job_description, resume_content):
     {resume_content}
     """
 
+def _normalize_result(result):
+    """Keeps the structured profile only when it is usable, in its normalized form."""
+    profile = profiles.normalize(result.pop('profile', None))
+    if profile:
+        result['profile'] = profile
+    return result
+
+def _parse_response(response_text):
+    """Parses the model's JSON answer, which may be wrapped in a markdown code fence."""
+    cleaned_response = response_text.strip().replace('```json', '').replace('```', '')
+    return _normalize_result(json.loads(cleaned_response))
+
+def _error_result():
+    """Fallback candidate data used when the model call or parsing fails."""
+    return {
+        "candidateName": "N/A",
+        "candidateEmail": "N/A",
+        "suitabilityScore": 0,
+        "summary": "Error processing resume."
+    }
+
+def _cache_key(job_description, resume_content):
+    return scoring_cache.make_key(job_description, resume_content, MODEL_NAME, PROMPT_VERSION)
+
+def process_resume(job_description, resume_content):
+    """
+    Uses the Gemini LLM to analyze a resume against a job description and extract structured data.
+    """
+    cache = scoring_cache.get_cache()
+    key = _cache_key(job_description, resume_content)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        with metrics.stage("llm"):
+            response = llm_gateway.generate_sync(MODEL_NAME, _build_prompt(job_description, resume_content))
+        with metrics.stage("parse"):
+            result = _parse_response(response.text)
+    except Exception as e:
+        print(f"Error processing resume with Gemini: {e}")
+        return _error_result()
+    cache.set(key, result)
+    return result
+
+async def _generate_json_async(prompt, stream):
+    """
+    Runs the prompt and returns its JSON object; when streaming, returns as soon as the object closes.
+    When streaming, parsing is interleaved with the response: the "llm" stage includes it and
+    the "parse" stage reports the parser's share on its own.
+    """
+    if not stream:
+        with metrics.stage("llm"):
+            response = await llm_gateway.generate(MODEL_NAME, prompt)
+        with metrics.stage("parse"):
+            return _parse_response(response.text)
+    parser = JsonObjectStream(emit_depth=0)
+    parse_seconds = 0.0
+    try:
+        with metrics.stage("llm", streamed=True):
+            async with aclosing(llm_gateway.stream(MODEL_NAME, prompt)) as chunks:
+                async for text in chunks:
+                    started = time.perf_counter()
+                    results = parser.feed(text)
+                    parse_seconds += time.perf_counter() - started
+                    for result in results:
+                        return _normalize_result(result)
+    finally:
+        metrics.observe_stage("parse", parse_seconds)
+    raise ValueError("Streamed response did not contain a JSON object.")
+
+async def process_resume_async(job_description, resume_content, stream=None):
+    """
+    Non-blocking variant of `process_resume` for use inside the event loop.
+    Streams the model response when `stream` (default: LLM_STREAMING) is set.
+    """
+    stream = config.LLM_STREAMING if stream is None else stream
+    cache = scoring_cache.get_cache()
+    key = _cache_key(job_description, resume_content)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        response = model.generate_content(prompt)
-        # The response is in markdown format, so we need to clean it up
-        cleaned_response = response.text.strip().replace('```json', '').replace('```', '')
-        return json.loads(cleaned_response)
+        result = await _generate_json_async(_build_prompt(job_description, resume_content), stream)
     except Exception as e:
         print(f"Error processing resume with Gemini: {e}")
-        # Fallback to a default error response
-        return {
-            "candidateName": "N/A",
-            "candidateEmail": "N/A",
-            "suitabilityScore": 0,
-            "summary": "Error processing resume."
-        }
+        return _error_result()
+    cache.set(key, result)
+    return result
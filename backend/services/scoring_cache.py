@@ -0,0 +1,181 @@
+# backend/services/scoring_cache.py
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Union
+
+import config
+
+
+def normalize_job_description(job_description: str) -> str:
+    """Collapses whitespace so cosmetic edits to a posting still hit the cache."""
+    return " ".join((job_description or "").split())
+
+def _to_bytes(data: Union[bytes, str]) -> bytes:
+    return data.encode('utf-8') if isinstance(data, str) else data
+
+def content_key(*parts: Union[bytes, str]) -> str:
+    """SHA-256 hex digest of the parts, in order; strings are hashed as UTF-8."""
+    digest = hashlib.sha256()
+    for part in parts:
+        encoded = _to_bytes(part)
+        # Length-prefix each part so different splits can never collide.
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+def make_key(job_description: str, resume: Union[bytes, str], model_name: str, prompt_version: str) -> str:
+    """
+    Builds a content-addressed cache key from the normalized job description,
+    the resume content, the model name and the prompt version.
+    """
+    return content_key(normalize_job_description(job_description), hashlib.sha256(_to_bytes(resume)).digest(),
+                       model_name, prompt_version)
+
+def make_batch_key(job_description: str, resumes: Iterable[Union[bytes, str]], model_name: str, prompt_version: str) -> str:
+    """Cache key for a prompt that scores several resumes together, in order."""
+    combined = b"".join(hashlib.sha256(_to_bytes(r)).digest() for r in resumes)
+    return make_key(job_description, combined, model_name, prompt_version)
+
+
+class ScoringCache:
+    """
+    Two-tier cache for LLM scoring results: an in-memory LRU in front of an
+    optional SQLite store. Both tiers evict by size and by TTL. Caches that share a
+    `disk_path` need their own `table`, or they evict and clear each other's entries.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 7 * 24 * 3600,
+                 disk_path: Optional[str] = None, max_disk_entries: int = 100_000,
+                 table: str = "scoring_cache"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.table = table
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "memoryHits": 0, "diskHits": 0, "sets": 0, "evictions": 0}
+        self._conn = None
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_accessed ON {table}(accessed_at)")
+            self._conn.commit()
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._counters["hits"] += 1
+                    self._counters["memoryHits"] += 1
+                    return json.loads(value)
+                del self._memory[key]
+
+            if self._conn is not None:
+                row = self._conn.execute(
+                    f"SELECT value, created_at FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    value, created_at = row
+                    if not self._expired(created_at, now):
+                        self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._conn.commit()
+                        self._remember(key, value, created_at)
+                        self._counters["hits"] += 1
+                        self._counters["diskHits"] += 1
+                        return json.loads(value)
+                    self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self._conn.commit()
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Stores a JSON-serializable value under `key` in every tier."""
+        now = time.time()
+        serialized = json.dumps(value)
+        with self._lock:
+            self._remember(key, serialized, now)
+            self._counters["sets"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    f"INSERT OR REPLACE INTO {self.table} (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, serialized, now, now)
+                )
+                self._evict_disk(now)
+                self._conn.commit()
+
+    def _remember(self, key: str, serialized: str, created_at: float):
+        self._memory[key] = (serialized, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _evict_disk(self, now: float):
+        if self.ttl_seconds > 0:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (now - self.ttl_seconds,))
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN "
+                f"(SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)", (overflow,)
+            )
+            self._counters["evictions"] += overflow
+
+    def clear(self):
+        """Drops every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute(f"DELETE FROM {self.table}")
+                self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters; every hit is one LLM call saved."""
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "savedLlmCalls": self._counters["hits"],
+                "hitRate": self._counters["hits"] / lookups if lookups else 0.0,
+                "memoryEntries": len(self._memory),
+                "diskEnabled": self._conn is not None,
+            }
+
+
+_cache: Optional[ScoringCache] = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> ScoringCache:
+    """Returns the process-wide scoring cache, configured from `config`."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ScoringCache(
+                    max_entries=config.SCORING_CACHE_MAX_ENTRIES,
+                    ttl_seconds=config.SCORING_CACHE_TTL_SECONDS,
+                    disk_path=config.SCORING_CACHE_PATH,
+                    max_disk_entries=config.SCORING_CACHE_MAX_DISK_ENTRIES,
+                )
+    return _cache
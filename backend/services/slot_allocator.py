@@ -0,0 +1,133 @@
+# backend/services/slot_allocator.py
+
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+import config
+
+Interval = Tuple[datetime, datetime]
+
+
+@dataclass(frozen=True)
+class SlotPolicy:
+    """Rules for placing interviews: length, gaps, working hours and the search window."""
+    duration: timedelta = timedelta(minutes=30)
+    buffer: timedelta = timedelta(minutes=10)
+    work_start: time = time(9, 0)
+    work_end: time = time(17, 0)
+    time_zone: str = "UTC"
+    workdays: Tuple[int, ...] = (0, 1, 2, 3, 4)  # Monday=0
+    granularity: timedelta = timedelta(minutes=15)
+    search_window: timedelta = timedelta(days=14)
+
+    def __post_init__(self):
+        # A policy that cannot fit one interview into any working day is a configuration
+        # error; rejecting it here keeps the allocator from searching forever.
+        if self.duration <= timedelta(0):
+            raise ValueError("Interview duration must be positive.")
+        if not self.workdays or any(d not in range(7) for d in self.workdays):
+            raise ValueError(f"Workdays must be weekday numbers 0-6 (Monday=0), got {self.workdays}.")
+        day = datetime.combine(datetime.min.date(), self.work_end) - datetime.combine(datetime.min.date(), self.work_start)
+        if day < self.duration:
+            raise ValueError(f"Working hours {self.work_start}-{self.work_end} do not fit a {self.duration} interview.")
+        try:
+            ZoneInfo(self.time_zone)
+        except (KeyError, ValueError):
+            raise ValueError(f"Unknown time zone: {self.time_zone}")
+
+    @classmethod
+    def from_config(cls) -> "SlotPolicy":
+        return cls(
+            duration=timedelta(minutes=config.INTERVIEW_DURATION_MINUTES),
+            buffer=timedelta(minutes=config.INTERVIEW_BUFFER_MINUTES),
+            work_start=time.fromisoformat(config.INTERVIEW_WORKDAY_START),
+            work_end=time.fromisoformat(config.INTERVIEW_WORKDAY_END),
+            time_zone=config.INTERVIEW_TIME_ZONE,
+            workdays=tuple(int(d) for d in config.INTERVIEW_WORKDAYS.split(",")),
+            granularity=timedelta(minutes=config.INTERVIEW_SLOT_GRANULARITY_MINUTES),
+            search_window=timedelta(days=config.INTERVIEW_SEARCH_DAYS),
+        )
+
+
+def merge_intervals(intervals: Iterable[Interval], pad: timedelta = timedelta(0)) -> List[Interval]:
+    """Sorts busy intervals, widens each by `pad` on both sides, and merges overlaps."""
+    merged: List[Interval] = []
+    for start, end in sorted((s - pad, e + pad) for s, e in intervals):
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+def _ceil_to(moment: datetime, granularity: timedelta) -> datetime:
+    step = granularity.total_seconds()
+    if step <= 0:
+        return moment
+    remainder = moment.timestamp() % step
+    return moment + timedelta(seconds=step - remainder) if remainder else moment
+
+def _into_working_hours(moment: datetime, policy: SlotPolicy, tz: ZoneInfo) -> datetime:
+    """Earliest instant >= `moment` at which a full interview fits inside working hours."""
+    local = moment.astimezone(tz)
+    for _ in range(8):
+        day_start = datetime.combine(local.date(), policy.work_start, tzinfo=tz)
+        day_end = datetime.combine(local.date(), policy.work_end, tzinfo=tz)
+        if local.weekday() in policy.workdays:
+            candidate = max(local, day_start)
+            if candidate + policy.duration <= day_end:
+                return candidate.astimezone(timezone.utc)
+        next_day = local.date() + timedelta(days=1)
+        local = datetime.combine(next_day, policy.work_start, tzinfo=tz)
+    raise ValueError("Slot policy has no usable working hours.")
+
+def allocate_slots(count: int, window_start: datetime, busy: Sequence[Interval],
+                   policy: Optional[SlotPolicy] = None, window_end: Optional[datetime] = None) -> List[Interval]:
+    """
+    Assigns up to `count` non-overlapping interview slots, in one pass over the merged
+    busy intervals, between `window_start` and `window_end`.
+
+    Busy intervals are padded by the policy's buffer and consecutive interviews are
+    separated by it as well. Slots start on the policy's granularity and fit entirely
+    inside working hours in the policy's time zone. All returned datetimes are UTC.
+    Fewer than `count` slots are returned if the window runs out.
+    """
+    policy = policy or SlotPolicy()
+    tz = ZoneInfo(policy.time_zone)
+    window_start = window_start if window_start.tzinfo else window_start.replace(tzinfo=timezone.utc)
+    window_end = window_end or window_start + policy.search_window
+    blocked = merge_intervals(busy, pad=policy.buffer)
+
+    slots: List[Interval] = []
+    cursor = window_start
+    i = 0
+    while len(slots) < count:
+        cursor = _into_working_hours(_ceil_to(cursor, policy.granularity), policy, tz)
+        candidate_end = cursor + policy.duration
+        if candidate_end > window_end:
+            break
+        while i < len(blocked) and blocked[i][1] <= cursor:
+            i += 1
+        if i < len(blocked) and blocked[i][0] < candidate_end:
+            cursor = blocked[i][1]
+            continue
+        slots.append((cursor, candidate_end))
+        cursor = candidate_end + policy.buffer
+    return slots
+
+BusyLookup = Callable[[object, datetime, datetime], List[Interval]]
+
+def find_interview_slots(user_credentials, count: int, earliest_start: datetime, busy_lookup: BusyLookup,
+                         policy: Optional[SlotPolicy] = None) -> List[Interval]:
+    """
+    Makes a single free/busy query for the interviewer's calendar over the policy's
+    search window and allocates `count` slots from it. `busy_lookup` is usually
+    `services.calendar.query_busy`; pass a fake to run offline.
+    """
+    policy = policy or SlotPolicy.from_config()
+    earliest_start = earliest_start if earliest_start.tzinfo else earliest_start.replace(tzinfo=timezone.utc)
+    window_end = earliest_start + policy.search_window
+    busy = busy_lookup(user_credentials, earliest_start, window_end)
+    return allocate_slots(count, earliest_start, busy, policy, window_end)
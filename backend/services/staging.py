@@ -0,0 +1,116 @@
+# backend/services/staging.py
+
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from typing import Dict, List
+
+from fastapi import HTTPException, UploadFile
+
+import config
+
+
+class UploadTooLarge(HTTPException):
+    """Raised while staging or receiving an upload that exceeds a size cap; answered with 413."""
+
+    def __init__(self, detail: str):
+        super().__init__(status_code=413, detail=detail)
+
+
+def _safe_filename(filename: str) -> str:
+    """Strips any directory components a client may have put in the upload name."""
+    name = os.path.basename(filename or "") or "resume"
+    return "".join(c if c.isalnum() or c in "._-" else "_" for c in name)
+
+def stage_uploads(resumes: List[UploadFile]) -> Dict:
+    """
+    Streams uploaded files into a fresh directory under STAGING_DIR so that
+    background workers can process them after the request has finished.
+
+    Files are copied in STAGING_CHUNK_BYTES chunks and hashed (SHA-256) as they
+    are written, so memory use does not grow with upload size. A file over
+    UPLOAD_MAX_FILE_BYTES, or a request over UPLOAD_MAX_REQUEST_BYTES in total,
+    raises UploadTooLarge and leaves nothing staged. Returns the staging
+    directory and a manifest of the staged files.
+    """
+    staging_dir = os.path.join(config.STAGING_DIR, uuid.uuid4().hex)
+    os.makedirs(staging_dir)
+    files = []
+    total = 0
+    try:
+        for index, resume in enumerate(resumes):
+            path = os.path.join(staging_dir, f"{index:05d}_{_safe_filename(resume.filename)}")
+            digest = hashlib.sha256()
+            size = 0
+            resume.file.seek(0)
+            with open(path, 'wb') as out:
+                for chunk in iter(lambda: resume.file.read(config.STAGING_CHUNK_BYTES), b""):
+                    size += len(chunk)
+                    total += len(chunk)
+                    if size > config.UPLOAD_MAX_FILE_BYTES:
+                        raise UploadTooLarge(f"{resume.filename} exceeds the {config.UPLOAD_MAX_FILE_BYTES} byte limit per file.")
+                    if total > config.UPLOAD_MAX_REQUEST_BYTES:
+                        raise UploadTooLarge(f"Upload exceeds the {config.UPLOAD_MAX_REQUEST_BYTES} byte limit per request.")
+                    digest.update(chunk)
+                    out.write(chunk)
+            files.append({"path": path, "filename": resume.filename, "size": size, "sha256": digest.hexdigest()})
+    except BaseException:
+        discard(staging_dir)
+        raise
+    return {"stagingDir": staging_dir, "files": files}
+
+def discard(staging_dir: str):
+    """Removes a staging directory once its files are no longer needed."""
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that stops multipart uploads over UPLOAD_MAX_REQUEST_BYTES
+    before they are spooled: requests declaring a larger Content-Length are
+    answered with 413 right away, and bodies sent without one are counted as
+    they stream in and cut off once they pass the cap.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            return await self.app(scope, receive, send)
+
+        # Multipart framing (boundaries and part headers) is allowed on top of the file bytes.
+        limit = config.UPLOAD_MAX_REQUEST_BYTES + config.STAGING_CHUNK_BYTES
+        headers = dict(scope.get("headers") or [])
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            return await self._reject(send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise UploadTooLarge(f"Upload exceeds the {config.UPLOAD_MAX_REQUEST_BYTES} byte limit per request.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _is_multipart(scope) -> bool:
+        for name, value in scope.get("headers") or []:
+            if name == b"content-type":
+                return value.lower().startswith(b"multipart/form-data")
+        return False
+
+    @staticmethod
+    async def _reject(send):
+        body = json.dumps({"detail": f"Upload exceeds the {config.UPLOAD_MAX_REQUEST_BYTES} byte limit per request."}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,38 @@
+# backend/services/tasks.py
+
+import asyncio
+
+from services import bulk_delete, dedup, ingestion, rescoring
+from services.job_queue import Task
+import services.firestore_client as db
+import services.firestore_async as adb
+
+# Task type names used on the job queue.
+PROCESS_RESUMES = ingestion.PROCESS_RESUMES
+RESCORE_CANDIDATES = rescoring.RESCORE_CANDIDATES
+DELETE_JOB = "delete_job"
+
+
+async def handle_delete_job(task: Task):
+    """Queue handler for DELETE_JOB tasks; records progress on the job while it runs."""
+    job_id = task.payload['jobId']
+
+    def report(deleted: int):
+        db.update_job(job_id, {'deletedCandidates': deleted})
+
+    try:
+        deleted = await adb.delete_job_and_candidates(job_id, bulk_delete.throttled(report))
+    except Exception as e:
+        print(f"Error deleting job {job_id} (attempt {task.attempts}): {e}")
+        if task.is_last_attempt:
+            await adb.update_job_status(job_id, 'delete_failed')
+        raise
+    await asyncio.to_thread(dedup.get_index().drop_job, job_id)
+    print(f"Deleted job {job_id} and {deleted} associated candidates.")
+
+
+TASK_HANDLERS = {
+    **ingestion.TASK_HANDLERS,
+    **rescoring.TASK_HANDLERS,
+    DELETE_JOB: handle_delete_job,
+}
@@ -0,0 +1,375 @@
+# backend/services/text_extraction.py
+
+import asyncio
+import codecs
+import hashlib
+import mmap
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from io import SEEK_CUR, SEEK_END, SEEK_SET, BytesIO, RawIOBase
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+import config
+
+PDF, DOCX, RTF, HTML, TEXT = "pdf", "docx", "rtf", "html", "text"
+
+# Document content: bytes, or a read-only mmap of a staged file so that PDF and DOCX
+# parsers page in only the parts they touch instead of holding a full copy. Text-based
+# formats are decoded DECODE_CHUNK_BYTES at a time for the same reason.
+Data = Union[bytes, mmap.mmap]
+DECODE_CHUNK_BYTES = 1 << 20
+
+class _MappedFile(RawIOBase):
+    """Read-only, seekable file object over an mmap, without copying it."""
+
+    def __init__(self, data: mmap.mmap):
+        self._data = data
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer) -> int:
+        chunk = self._data[self._position:self._position + len(buffer)]
+        buffer[:len(chunk)] = chunk
+        self._position += len(chunk)
+        return len(chunk)
+
+    def seek(self, offset: int, whence: int = SEEK_SET) -> int:
+        base = {SEEK_SET: 0, SEEK_CUR: self._position, SEEK_END: len(self._data)}[whence]
+        self._position = max(0, base + offset)
+        return self._position
+
+    def tell(self) -> int:
+        return self._position
+
+def _as_stream(data: Data):
+    """Seekable file object over the content."""
+    return _MappedFile(data) if isinstance(data, mmap.mmap) else BytesIO(data)
+
+
+# --- Format detection ---
+def detect_format(data: Data, filename: str = "") -> str:
+    """Detects the document format from magic bytes, falling back to the file extension."""
+    head = bytes(data[:512]).lstrip()
+    lowered = head.lower()
+    name = (filename or "").lower()
+    if head.startswith(b"%PDF"):
+        return PDF
+    if data[:4] == b"PK\x03\x04":
+        try:
+            with zipfile.ZipFile(_as_stream(data)) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return DOCX
+        except zipfile.BadZipFile:
+            pass
+    if head.startswith(b"{\\rtf"):
+        return RTF
+    if lowered.startswith((b"<!doctype html", b"<html")) or b"<body" in lowered or name.endswith((".html", ".htm")):
+        return HTML
+    # A binary format whose magic bytes are missing is damaged, not plain text.
+    for extension, fmt in ((".pdf", PDF), (".docx", DOCX), (".rtf", RTF)):
+        if name.endswith(extension):
+            return fmt
+    return TEXT
+
+
+# --- Per-format extractors; each returns (text, page_count) ---
+def _extract_pdf(data: Data):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("PDF extraction requires the 'pypdf' package.")
+    reader = PdfReader(_as_stream(data))
+    pages = [page.extract_text() or "" for page in reader.pages]
+    return "\n\n".join(pages), len(pages)
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _extract_docx(data: Data):
+    with zipfile.ZipFile(_as_stream(data)) as archive:
+        root = ElementTree.fromstring(archive.read("word/document.xml"))
+    paragraphs = []
+    page_breaks = 0
+    for paragraph in root.iter(f"{_W_NS}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W_NS}t" and node.text:
+                parts.append(node.text)
+            elif node.tag == f"{_W_NS}tab":
+                parts.append("\t")
+            elif node.tag == f"{_W_NS}br":
+                if node.get(f"{_W_NS}type") == "page":
+                    page_breaks += 1
+                parts.append("\n")
+            elif node.tag == f"{_W_NS}lastRenderedPageBreak":
+                page_breaks += 1
+        paragraphs.append("".join(parts))
+    return "\n".join(paragraphs), page_breaks + 1
+
+# RTF destinations whose content is never visible text.
+_RTF_SKIP_DESTINATIONS = {
+    "fonttbl", "colortbl", "stylesheet", "info", "pict", "header", "footer", "listtable",
+    "listoverridetable", "rsidtbl", "generator", "xmlnstbl", "themedata", "datastore", "latentstyles",
+}
+_RTF_TOKEN = re.compile(r"\\([a-zA-Z]+)(-?\d+)? ?|\\'([0-9a-fA-F]{2})|\\([^a-zA-Z])|([{}])|[\r\n]+|([^\\{}\r\n]+)")
+
+# Longer than any RTF control word with its parameter, so a token cut by a chunk boundary
+# is always re-read whole from the next chunk.
+_RTF_TOKEN_MAX_CHARS = 64
+
+def _rtf_tokens(data: Data) -> Iterator[Tuple[Optional[str], ...]]:
+    """RTF tokens (the groups of _RTF_TOKEN), read a chunk at a time."""
+    buffer = ""
+    for start in range(0, len(data), DECODE_CHUNK_BYTES):
+        buffer += data[start:start + DECODE_CHUNK_BYTES].decode("latin-1")
+        final = start + DECODE_CHUNK_BYTES >= len(data)
+        limit = len(buffer) if final else len(buffer) - _RTF_TOKEN_MAX_CHARS
+        consumed = 0
+        for match in _RTF_TOKEN.finditer(buffer):
+            if match.end() > limit:
+                break
+            yield match.groups()
+            consumed = match.end()
+        buffer = buffer[consumed:]
+
+def _extract_rtf(data: Data):
+    out = []
+    stack = []
+    skipping = False
+    pages = 1
+    # Characters still to drop after a \uN escape: RTF follows each one with an ASCII fallback.
+    fallback = 0
+    for word, arg, hex_code, symbol, brace, text in _rtf_tokens(data):
+        if brace == "{":
+            stack.append(skipping)
+        elif brace == "}":
+            skipping = stack.pop() if stack else False
+        elif skipping:
+            continue
+        elif word:
+            if word in _RTF_SKIP_DESTINATIONS:
+                skipping = True
+            elif word in ("par", "line", "sect"):
+                out.append("\n")
+            elif word == "page":
+                pages += 1
+                out.append("\n")
+            elif word == "tab":
+                out.append("\t")
+            elif word == "u" and arg:
+                out.append(chr(int(arg) % 65536))
+                fallback = 1
+                continue
+        elif hex_code:
+            if not fallback:
+                out.append(bytes([int(hex_code, 16)]).decode("cp1252", errors="replace"))
+        elif symbol:
+            if symbol == "*":
+                skipping = True
+            elif symbol in "\\{}":
+                out.append(symbol)
+            elif symbol == "~":
+                out.append(" ")
+        elif text:
+            out.append(text[fallback:])
+        fallback = 0
+    return "".join(out), pages
+
+class _HTMLTextParser(HTMLParser):
+    _BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "section", "article", "header", "footer"}
+    _HIDDEN_TAGS = {"script", "style", "head", "noscript", "template"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._hidden_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self._HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in self._HIDDEN_TAGS:
+            self._hidden_depth = max(0, self._hidden_depth - 1)
+        elif tag in self._BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_data(self, data):
+        if not self._hidden_depth:
+            self.parts.append(data)
+
+def _latin1_fallback(error: UnicodeDecodeError):
+    return error.object[error.start:error.end].decode("latin-1"), error.end
+
+# Bytes that are not valid UTF-8 are read as Latin-1, so a legacy-encoded resume still
+# decodes in a single pass over the file.
+codecs.register_error("resumerank_latin1", _latin1_fallback)
+
+def _decoded_chunks(data: Data) -> Iterator[str]:
+    """
+    The content as text, decoded a slice at a time: UTF-16 if it starts with a byte-order
+    mark, otherwise UTF-8 with any invalid bytes read as Latin-1.
+    """
+    if data[:2] in (b"\xff\xfe", b"\xfe\xff"):
+        decoder = codecs.getincrementaldecoder("utf-16")(errors="replace")
+    else:
+        decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="resumerank_latin1")
+    for start in range(0, len(data), DECODE_CHUNK_BYTES):
+        text = decoder.decode(data[start:start + DECODE_CHUNK_BYTES])
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+def _decode_text(data: Data) -> str:
+    return "".join(_decoded_chunks(data))
+
+def _extract_html(data: Data):
+    parser = _HTMLTextParser()
+    for text in _decoded_chunks(data):
+        parser.feed(text)
+    parser.close()
+    return "".join(parser.parts), 1
+
+def _extract_text(data: Data):
+    return _decode_text(data), 1
+
+_EXTRACTORS = {PDF: _extract_pdf, DOCX: _extract_docx, RTF: _extract_rtf, HTML: _extract_html, TEXT: _extract_text}
+
+def _clean(text: str) -> str:
+    """Drops control characters and collapses the whitespace that layout-heavy formats leave behind."""
+    text = re.sub(r"[^\S\n\t]+", " ", text.replace("\x00", ""))
+    text = re.sub(r"[\x01-\x08\x0b-\x1f\x7f]", "", text)
+    text = re.sub(r" *\n *", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+def extract_text(data: Data, filename: str = "") -> Dict[str, Any]:
+    """
+    Extracts clean text from a resume document. Runs synchronously; use
+    `extract_file_async` from the event loop to run it in the process pool.
+    A PDF, DOCX or RTF file that cannot be parsed comes back with empty text and
+    `error` set; `error` is None otherwise.
+    """
+    started = time.perf_counter()
+    fmt = detect_format(data, filename)
+    error = None
+    try:
+        text, pages = _EXTRACTORS[fmt](data)
+    except Exception as e:
+        print(f"Error extracting {fmt} text from {filename or 'upload'}: {e}")
+        if fmt in (TEXT, HTML):
+            # Markup that does not parse is still readable as plain text.
+            text, pages = _extract_text(data)
+        else:
+            # Decoding a damaged PDF/DOCX/RTF as text only yields byte soup; report it instead.
+            text, pages, error = "", 0, f"{type(e).__name__}: {e}"
+    return {
+        "text": _clean(text),
+        "format": fmt,
+        "pages": pages,
+        "bytes": len(data),
+        "seconds": time.perf_counter() - started,
+        "error": error,
+    }
+
+def extract_file(path: str, filename: str = "") -> Dict[str, Any]:
+    """Extracts a staged file inside the worker process, reading it through a memory map."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return extract_text(b"", filename or path)  # Empty files cannot be mapped.
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return extract_text(data, filename or path)
+
+
+# --- Process pool, content-hash cache and throughput stats ---
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_stats = defaultdict(lambda: {"documents": 0, "failed": 0, "pages": 0, "bytes": 0, "seconds": 0.0})
+_counters = {"cacheHits": 0, "cacheMisses": 0}
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=config.EXTRACTION_PROCESSES)
+    return _pool
+
+def shutdown_pool():
+    """Stops the extraction worker processes; called on application shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _record(result: Dict[str, Any]):
+    entry = _stats[result["format"]]
+    entry["documents"] += 1
+    if result.get("error"):
+        entry["failed"] += 1
+    entry["pages"] += result["pages"]
+    entry["bytes"] += result["bytes"]
+    entry["seconds"] += result["seconds"]
+
+async def extract_file_async(path: str, filename: str = "", content_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Extracts text from a staged file in the process pool, reusing earlier
+    results for identical content.
+    """
+    content_hash = content_hash or await asyncio.to_thread(_hash_file, path)
+    cached = _cache.get(content_hash)
+    if cached is not None:
+        _cache.move_to_end(content_hash)
+        _counters["cacheHits"] += 1
+        return cached
+
+    _counters["cacheMisses"] += 1
+    loop = asyncio.get_running_loop()
+    result = await loop.run_in_executor(_get_pool(), extract_file, path, filename)
+    result["contentHash"] = content_hash
+    _record(result)
+    _cache[content_hash] = result
+    while len(_cache) > config.EXTRACTION_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return result
+
+def stats() -> Dict[str, Any]:
+    """Per-format timings and pages/sec, measured as CPU time spent inside the pool."""
+    per_format = {}
+    for fmt, entry in _stats.items():
+        per_format[fmt] = {
+            **entry,
+            "avgSecondsPerDocument": entry["seconds"] / entry["documents"] if entry["documents"] else 0.0,
+            "pagesPerSecond": entry["pages"] / entry["seconds"] if entry["seconds"] else 0.0,
+        }
+    total_pages = sum(e["pages"] for e in _stats.values())
+    total_seconds = sum(e["seconds"] for e in _stats.values())
+    return {
+        "processes": config.EXTRACTION_PROCESSES,
+        **_counters,
+        "pagesPerSecond": total_pages / total_seconds if total_seconds else 0.0,
+        "formats": per_format,
+    }
@@ -0,0 +1,139 @@
+# backend/services/tracing.py
+#
+# Lightweight trace spans for the resume pipeline. A span covers one unit of work (a
+# job, a candidate, a pipeline stage) and nests under whichever span is current in the
+# calling task, so coroutines started with asyncio.gather/create_task inherit it.
+# Finished spans go to an in-memory ring buffer (TRACE_BUFFER_SIZE) and, with
+# TRACE_LOG_PATH set, to a JSON-lines file. Nothing is recorded unless TRACING_ENABLED.
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+import config
+
+
+@dataclass
+class Span:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    job_id: Optional[str]
+    start: float
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentId": self.parent_id,
+            "jobId": self.job_id,
+            "name": self.name,
+            "start": self.start,
+            "durationMs": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+_finished: deque = deque(maxlen=config.TRACE_BUFFER_SIZE)
+_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return config.TRACING_ENABLED
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Records `name` as a child of the current span, or as the root of a new trace. A
+    `jobId` attribute (or the parent's) tags the span so the job's traces can be found.
+    Yields None when tracing is disabled.
+    """
+    if not config.TRACING_ENABLED:
+        yield None
+        return
+    parent = _current.get()
+    job_id = attributes.get("jobId") or (parent.job_id if parent else None)
+    current = Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent else None,
+        job_id=job_id,
+        start=time.time(),
+        attributes=attributes,
+    )
+    token = _current.set(current)
+    started = time.perf_counter()
+    try:
+        yield current
+    except BaseException as e:
+        current.error = repr(e)
+        raise
+    finally:
+        current.duration = time.perf_counter() - started
+        _current.reset(token)
+        _finish(current)
+
+
+def set_attributes(**attributes):
+    """Adds attributes to the current span, if any (e.g. a result known only at the end)."""
+    current = _current.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def _finish(finished: Span):
+    record = finished.to_dict()
+    with _lock:
+        _finished.append(finished)
+        if config.TRACE_LOG_PATH:
+            try:
+                with open(config.TRACE_LOG_PATH, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+            except OSError as e:
+                print(f"Could not write span to {config.TRACE_LOG_PATH}: {e}")
+
+
+def job_traces(job_id: str) -> List[Dict[str, Any]]:
+    """
+    The recorded traces of a job, newest first. Each lists its spans in start order and
+    sums span time per stage name, so the slowest stage stands out.
+    """
+    with _lock:
+        spans = [s for s in _finished if s.job_id == job_id]
+    by_trace: Dict[str, List[Span]] = defaultdict(list)
+    for s in spans:
+        by_trace[s.trace_id].append(s)
+
+    traces = []
+    for trace_id, trace_spans in by_trace.items():
+        trace_spans.sort(key=lambda s: s.start)
+        stages: Dict[str, Dict[str, float]] = {}
+        for s in trace_spans:
+            stage = stages.setdefault(s.name, {"count": 0, "totalMs": 0.0, "maxMs": 0.0})
+            ms = (s.duration or 0) * 1000
+            stage["count"] += 1
+            stage["totalMs"] = round(stage["totalMs"] + ms, 3)
+            stage["maxMs"] = round(max(stage["maxMs"], ms), 3)
+        root = next((s for s in trace_spans if s.parent_id is None), None)
+        traces.append({
+            "traceId": trace_id,
+            "start": trace_spans[0].start,
+            "durationMs": round(root.duration * 1000, 3) if root and root.duration is not None else None,
+            "stages": dict(sorted(stages.items(), key=lambda item: item[1]["totalMs"], reverse=True)),
+            "spans": [s.to_dict() for s in trace_spans],
+        })
+    return sorted(traces, key=lambda t: t["start"], reverse=True)
@@ -0,0 +1,135 @@
+# backend/services/worker.py
+
+import asyncio
+import os
+import socket
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from services import metrics
+from services.job_queue import QueueBackend, Task, summarize_latencies
+
+TaskHandler = Callable[[Task], Awaitable[None]]
+
+
+class WorkerPool:
+    """
+    Runs `concurrency` asyncio workers that claim tasks from a queue backend,
+    keep their lease alive while the handler runs, and report the outcome.
+    """
+
+    def __init__(self, queue: QueueBackend, handlers: Dict[str, TaskHandler], concurrency: int = 2,
+                 lease_seconds: float = 300.0, poll_interval: float = 1.0):
+        self.queue = queue
+        self.handlers = handlers
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.pool_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = asyncio.Event()
+        self._in_flight = 0
+        self._counters = {"completed": 0, "failed": 0, "lostLeases": 0}
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=500))
+
+    async def start(self):
+        self._stopping.clear()
+        self._tasks = [asyncio.create_task(self._run(f"{self.pool_id}-{i}")) for i in range(self.concurrency)]
+
+    async def stop(self):
+        """Stops claiming new tasks; tasks already running are cancelled and their leases expire for a retry."""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def run_forever(self):
+        await self.start()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _run(self, worker_id: str):
+        while not self._stopping.is_set():
+            try:
+                task = await asyncio.to_thread(self.queue.claim, worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Worker {worker_id} could not claim a task: {e}")
+                task = None
+            if task is None:
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self._execute(worker_id, task)
+
+    async def _heartbeat(self, worker_id: str, task: Task, running: asyncio.Task) -> bool:
+        """
+        Keeps the task's lease alive while `running` runs. An error extending it is
+        retried on the next beat. If the lease was lost (it expired and another worker
+        may hold the task), `running` is cancelled so the task never runs twice at once,
+        and True is returned.
+        """
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                extended = await asyncio.to_thread(self.queue.extend_lease, task.id, worker_id, self.lease_seconds)
+            except Exception as e:
+                print(f"Worker {worker_id} could not extend the lease on task {task.id}: {e}")
+                continue
+            if not extended:
+                print(f"Worker {worker_id} lost the lease on task {task.id}; cancelling it.")
+                running.cancel()
+                return True
+
+    async def _execute(self, worker_id: str, task: Task):
+        handler = self.handlers.get(task.type)
+        if handler is None:
+            await asyncio.to_thread(self.queue.fail, task.id, worker_id, f"No handler for task type {task.type}")
+            return
+
+        self._in_flight += 1
+        metrics.TASKS_IN_FLIGHT.inc(type=task.type)
+        running = asyncio.create_task(handler(task))
+        heartbeat = asyncio.create_task(self._heartbeat(worker_id, task, running))
+        started = time.perf_counter()
+        try:
+            await running
+        except asyncio.CancelledError:
+            if not (heartbeat.done() and not heartbeat.cancelled() and heartbeat.result()):
+                raise  # The pool is stopping.
+            # The task belongs to whichever worker holds the lease now; leave its state alone.
+            self._counters["lostLeases"] += 1
+            metrics.TASK_SECONDS.observe(time.perf_counter() - started, type=task.type, outcome="lease_lost")
+        except Exception as e:
+            self._counters["failed"] += 1
+            metrics.TASK_SECONDS.observe(time.perf_counter() - started, type=task.type, outcome="failed")
+            await asyncio.to_thread(self.queue.fail, task.id, worker_id, repr(e))
+        else:
+            self._counters["completed"] += 1
+            self._latencies[task.type].append(time.perf_counter() - started)
+            metrics.TASK_SECONDS.observe(time.perf_counter() - started, type=task.type, outcome="completed")
+            await asyncio.to_thread(self.queue.complete, task.id, worker_id)
+        finally:
+            heartbeat.cancel()
+            self._in_flight -= 1
+            metrics.TASKS_IN_FLIGHT.dec(type=task.type)
+
+    def stats(self) -> Dict:
+        return {
+            "poolId": self.pool_id,
+            "workers": len(self._tasks),
+            "inFlight": self._in_flight,
+            **self._counters,
+            "taskLatencySeconds": {t: summarize_latencies(list(d)) for t, d in self._latencies.items()},
+        }
+
+
+_pool: Optional[WorkerPool] = None
+
+def get_pool() -> Optional[WorkerPool]:
+    """The worker pool running inside this process, if any."""
+    return _pool
+
+def set_pool(pool: Optional[WorkerPool]):
+    global _pool
+    _pool = pool
@@ -0,0 +1,133 @@
+# backend/services/write_batcher.py
+
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import services.firestore_client as db
+import services.firestore_async as adb
+from services import metrics
+import config
+
+# Firestore rejects batched writes with more than 500 operations.
+FIRESTORE_MAX_BATCH_OPERATIONS = 500
+
+# Process-wide flush metrics, aggregated over every batcher.
+_metrics = {
+    "flushes": 0,
+    "batchesCommitted": 0,
+    "documentsWritten": 0,
+    "retries": 0,
+    "failedBatches": 0,
+    "flushSecondsTotal": 0.0,
+    "lastFlushSeconds": 0.0,
+    "lastFlushDocuments": 0,
+}
+
+
+class CandidateWriteBatcher:
+    """
+    Buffers candidate documents for one job and writes them in batched commits.
+
+    A flush happens when `max_batch_size` documents are buffered or `flush_interval`
+    seconds after the first buffered document, whichever comes first. Each flush is
+    split into chunks within Firestore's per-batch limit; chunks commit concurrently
+    and a failed chunk is retried on its own. `close()` performs the final flush and
+    can carry the job's status update in its last batch.
+    """
+
+    def __init__(self, job_id: str, max_batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_attempts: Optional[int] = None):
+        self.job_id = job_id
+        self.max_batch_size = min(max_batch_size or config.FIRESTORE_WRITE_BATCH_SIZE, FIRESTORE_MAX_BATCH_OPERATIONS)
+        self.flush_interval = config.FIRESTORE_WRITE_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self.max_attempts = max_attempts or config.FIRESTORE_WRITE_MAX_ATTEMPTS
+        self._buffer: List[Tuple[str, Dict[str, Any]]] = []
+        self._flush_lock = asyncio.Lock()
+        self._timer: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def add(self, candidate_data: Dict[str, Any], candidate_id: Optional[str] = None) -> str:
+        """Buffers a candidate and returns its document ID (allocated now if not given)."""
+        if self._closed:
+            raise RuntimeError("Cannot add candidates to a closed batcher.")
+        candidate_id = candidate_id or db.new_candidate_id(self.job_id)
+        self._buffer.append((candidate_id, candidate_data))
+        if len(self._buffer) >= self.max_batch_size:
+            await self.flush()
+        elif self._timer is None and self.flush_interval > 0:
+            self._timer = asyncio.create_task(self._flush_later())
+        return candidate_id
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        try:
+            await self.flush()
+        except Exception as e:
+            # The documents stay buffered and are retried by the next flush.
+            print(f"Timed flush for job {self.job_id} failed: {e}")
+
+    async def flush(self, job_update: Optional[Dict[str, Any]] = None):
+        """Writes everything buffered so far; returns once it is durable in Firestore."""
+        async with self._flush_lock:
+            pending, self._buffer = self._buffer, []
+            if not pending and not job_update:
+                return
+
+            started = time.perf_counter()
+            chunks = [pending[i:i + self.max_batch_size] for i in range(0, len(pending), self.max_batch_size)] or [[]]
+            # The job update rides along in the last chunk, if there is room for it.
+            if job_update and len(chunks[-1]) >= FIRESTORE_MAX_BATCH_OPERATIONS:
+                chunks.append([])
+            results = await asyncio.gather(
+                *(self._commit(chunk, job_update if i == len(chunks) - 1 else None) for i, chunk in enumerate(chunks)),
+                return_exceptions=True
+            )
+
+            failed = [chunk for chunk, result in zip(chunks, results) if isinstance(result, Exception)]
+            elapsed = time.perf_counter() - started
+            _metrics["flushes"] += 1
+            _metrics["flushSecondsTotal"] += elapsed
+            _metrics["lastFlushSeconds"] = elapsed
+            _metrics["lastFlushDocuments"] = len(pending)
+            if failed:
+                # Keep failed documents so a later flush (or the task retry) can write them.
+                self._buffer = [doc for chunk in failed for doc in chunk] + self._buffer
+                errors = [result for result in results if isinstance(result, Exception)]
+                raise RuntimeError(f"{len(failed)} of {len(chunks)} candidate batches failed for job {self.job_id}: {errors[0]}")
+
+    async def _commit(self, chunk: List[Tuple[str, Dict[str, Any]]], job_update: Optional[Dict[str, Any]]):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                with metrics.stage("firestore_write", documents=len(chunk), attempt=attempt):
+                    await adb.commit_candidate_batch(self.job_id, chunk, job_update)
+                _metrics["batchesCommitted"] += 1
+                _metrics["documentsWritten"] += len(chunk)
+                for _, doc in chunk:
+                    metrics.CANDIDATES.inc(status=doc.get("status", "scored"))
+                return
+            except Exception:
+                if attempt == self.max_attempts:
+                    _metrics["failedBatches"] += 1
+                    raise
+                _metrics["retries"] += 1
+                await asyncio.sleep(0.2 * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+    async def close(self, job_update: Optional[Dict[str, Any]] = None):
+        """Final flush; `job_update` (e.g. the job's status) is written in the same batch as the last candidates."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._closed = True
+        await self.flush(job_update)
+
+
+def stats() -> Dict[str, Any]:
+    flushes = _metrics["flushes"]
+    return {
+        **_metrics,
+        "avgFlushSeconds": _metrics["flushSecondsTotal"] / flushes if flushes else 0.0,
+        "avgDocumentsPerBatch": _metrics["documentsWritten"] / _metrics["batchesCommitted"] if _metrics["batchesCommitted"] else 0.0,
+    }
@@ -0,0 +1,56 @@
+# backend/tests/conftest.py
+#
+# Tests run offline from the `backend` directory (`python -m pytest`). Local state
+# (queues, outbox, caches) goes to a scratch directory per test session.
+
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+_scratch = tempfile.mkdtemp(prefix="resumerank-tests-")
+for name, value in {
+    "JOB_QUEUE_PATH": os.path.join(_scratch, "job_queue.sqlite3"),
+    "EMAIL_OUTBOX_PATH": os.path.join(_scratch, "email_outbox.sqlite3"),
+    "DEDUP_INDEX_PATH": os.path.join(_scratch, "dedup_index.sqlite3"),
+    "STAGING_DIR": os.path.join(_scratch, "staging"),
+    "WARM_UP_CLIENTS": "false",
+    "EMAIL_PROVIDER": "fake",
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+
+
+@pytest.fixture
+def fake_firestore():
+    """The app's Firestore client replaced by the in-memory fake used by the benchmarks."""
+    from benchmarks import fakes
+    import services.firestore_client as firestore_client
+
+    client = fakes.FakeFirestore(fakes.Faults())
+    firestore_client.set_client(client)
+    yield client
+    firestore_client.set_client(None)
+
+
+@pytest.fixture
+def fake_llm():
+    """The Gemini gateway replaced by one over the benchmarks' fake model (prompt-driven JSON answers)."""
+    from benchmarks import fakes
+    from services import llm_gateway
+
+    gateway = fakes.fake_gateway(fakes.Faults())
+    llm_gateway.set_gateway(gateway)
+    yield gateway
+    llm_gateway.set_gateway(None)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _extraction_pool():
+    yield
+    from services import text_extraction
+
+    text_extraction.shutdown_pool()
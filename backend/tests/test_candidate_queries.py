@@ -0,0 +1,84 @@
+# backend/tests/test_candidate_queries.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from services import candidate_queries
+import config
+
+
+@pytest.fixture
+def candidates_ref(fake_firestore):
+    ref = fake_firestore.collection("jobs").document("job1").collection("candidates")
+    # Two ties at 70 so the document ID has to break them.
+    for candidate_id, score in [("a", 90), ("b", 70), ("c", 70), ("d", 50), ("e", 10)]:
+        ref.document(candidate_id).set({"candidateName": candidate_id.upper(), "suitabilityScore": score})
+    return ref
+
+
+@pytest.mark.parametrize("score, candidate_id", [(0, "x"), (87.5, "abc"), (-1, "id with spaces/and=padding"), (100, "é")])
+def test_cursor_round_trip(score, candidate_id):
+    cursor = candidate_queries.encode_cursor(score, candidate_id)
+    assert "=" not in cursor
+    assert candidate_queries.decode_cursor(cursor) == (score, candidate_id)
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "e30", candidate_queries.encode_cursor("90", "a")[:-2],
+                                    "WyJhIiwiYiJd",  # ["a","b"]
+                                    "Wzkw"])  # [90
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        candidate_queries.decode_cursor(cursor)
+
+def test_pages_follow_score_order_without_gaps(candidates_ref):
+    seen, cursor, pages = [], None, 0
+    while True:
+        candidates, cursor = candidate_queries.page(candidates_ref, limit=2, cursor=cursor)
+        seen += [c["id"] for c in candidates]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == ["a", "c", "b", "d", "e"]
+    assert pages == 3
+
+def test_last_full_page_has_no_next_cursor(candidates_ref):
+    candidates, cursor = candidate_queries.page(candidates_ref, limit=5)
+    assert len(candidates) == 5 and cursor is None
+
+def test_page_size_is_capped(candidates_ref, monkeypatch):
+    monkeypatch.setattr(config, "CANDIDATE_PAGE_MAX_SIZE", 3)
+    candidates, cursor = candidate_queries.page(candidates_ref, limit=100)
+    assert [c["id"] for c in candidates] == ["a", "c", "b"]
+    assert candidate_queries.decode_cursor(cursor) == (70, "b")
+
+
+# --- main.py's select-candidates ---
+@pytest.fixture
+def main_app(candidates_ref, fake_firestore, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "get_db", lambda: fake_firestore)
+    return main.app
+
+def select(app, count):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/jobs/job1/select-candidates", json={"count": count})
+    return asyncio.run(go())
+
+def statuses(candidates_ref):
+    return {doc.id: doc.to_dict().get("status") for doc in candidates_ref.stream()}
+
+def test_select_promotes_only_scored_unselected_candidates(main_app, candidates_ref):
+    candidates_ref.document("a").update({"status": "scheduled"})
+    candidates_ref.document("d").update({"status": "filtered"})
+    response = select(main_app, 5)
+    assert response.status_code == 200
+    assert [c["id"] for c in response.json()["selected"]] == ["c", "b", "e"]
+    assert statuses(candidates_ref) == {"a": "scheduled", "b": "contacted", "c": "contacted", "d": "filtered", "e": "contacted"}
+
+def test_select_count_is_capped(main_app, monkeypatch):
+    monkeypatch.setattr(config, "CANDIDATE_PAGE_MAX_SIZE", 3)
+    assert select(main_app, 4).status_code == 400
@@ -0,0 +1,66 @@
+# backend/tests/test_credential_manager.py
+
+import asyncio
+
+import httpx
+import pytest
+from google.auth.exceptions import RefreshError, TransportError
+from google.oauth2.credentials import Credentials
+
+from services import credential_manager
+from services.credential_manager import CredentialManager, CredentialsUnavailable, TokenStore
+
+EXPIRED = {
+    "token": "old", "refresh_token": "refresh", "client_id": "id", "client_secret": "secret",
+    "token_uri": "https://oauth2.googleapis.com/token", "expiry": "2000-01-01T00:00:00Z",
+}
+
+
+class MemoryTokenStore(TokenStore):
+    def __init__(self, tokens):
+        self.tokens = dict(tokens)
+
+    def load(self, user_id):
+        return self.tokens.get(user_id)
+
+    def save(self, user_id, tokens):
+        self.tokens[user_id] = tokens
+
+def failing_refresh(error):
+    def refresh(self, request):
+        raise error
+    return refresh
+
+
+def test_transient_refresh_failure_is_retryable(monkeypatch):
+    manager = CredentialManager(MemoryTokenStore({"u": EXPIRED}), refresh_ahead_seconds=0)
+    monkeypatch.setattr(Credentials, "refresh", failing_refresh(TransportError("connection reset")))
+    with pytest.raises(CredentialsUnavailable):
+        manager.get("u")
+    # The cached credentials are kept, so the next call tries the refresh again.
+    assert "u" in manager._entries
+    assert manager.refresh_due() == 0
+    assert manager.stats()["refreshFailures"] == 2
+
+def test_revoked_grant_means_not_connected(monkeypatch):
+    manager = CredentialManager(MemoryTokenStore({"u": EXPIRED}), refresh_ahead_seconds=0)
+    monkeypatch.setattr(Credentials, "refresh", failing_refresh(RefreshError("invalid_grant")))
+    assert manager.get("u") is None
+    assert "u" not in manager._entries
+
+def test_api_answers_503_while_google_is_unreachable(monkeypatch, fake_firestore):
+    import app as api_module
+
+    fake_firestore.collection("jobs").document("job1").set({"title": "Engineer", "jobDescription": "Python"})
+    fake_firestore.collection("jobs").document("job1").collection("candidates").document("c1").set(
+        {"candidateName": "Ada", "candidateEmail": "ada@example.com", "suitabilityScore": 80, "summary": "Strong."})
+    monkeypatch.setattr(credential_manager, "_manager",
+                        CredentialManager(MemoryTokenStore({"placeholder_user_id": EXPIRED})))
+    monkeypatch.setattr(Credentials, "refresh", failing_refresh(TransportError("connection reset")))
+
+    async def send():
+        transport = httpx.ASGITransport(app=api_module.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/emails/send", json={
+                "jobId": "job1", "interviewDatetime": "2030-01-07T10:00:00+00:00", "candidateIds": ["c1"]})
+    assert asyncio.run(send()).status_code == 503
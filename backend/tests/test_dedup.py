@@ -0,0 +1,80 @@
+# backend/tests/test_dedup.py
+
+import asyncio
+import random
+
+import pytest
+
+from benchmarks.suite import job_description, make_resume
+from services import dedup, ingestion
+import config
+
+
+def signature(text: str):
+    return dedup.minhash_signature(text, 128)
+
+def test_find_only_matches_indexed_candidates(tmp_path):
+    index = dedup.DedupIndex(str(tmp_path / "dedup.sqlite3"))
+    resume = make_resume(0, random.Random(0), "t")
+    assert index.find("job", "a", signature(resume)) is None
+    assert index.find("job", "b", signature(resume)) is None  # find() does not index.
+    index.add("job", {"a": signature(resume)})
+    match = index.find("job", "b", signature(resume + " extra"))
+    assert match is not None and match[0] == "a" and match[1] >= config.DEDUP_THRESHOLD
+    assert index.find("job", "a", signature(resume)) is None  # Not a duplicate of itself.
+    assert index.find("other-job", "b", signature(resume)) is None
+
+def test_signature_batch_catches_copies_within_an_upload():
+    batch = dedup.SignatureBatch(16)
+    rng = random.Random(1)
+    first, other = make_resume(0, rng, "t"), make_resume(1, rng, "t")
+    batch.add("a", signature(first))
+    assert batch.find(signature(other)) is None
+    assert batch.find(signature(first))[0] == "a"
+
+
+@pytest.fixture
+def job(fake_firestore, fake_llm, monkeypatch):
+    monkeypatch.setattr(config, "DEDUP_ENABLED", True)
+    job_ref = fake_firestore.collection("jobs").document("dedup-job")
+    job_ref.set({"title": "Engineer", "jobDescription": job_description("t"), "status": "processing"})
+    return job_ref
+
+def upload(tmp_path, name: str, texts):
+    paths = []
+    for i, text in enumerate(texts):
+        path = tmp_path / f"{name}_{i:05d}.txt"
+        path.write_text(text)
+        paths.append(str(path))
+    return paths
+
+def process(paths):
+    asyncio.run(ingestion.process_resumes_task("dedup-job", job_description("t"), paths))
+
+def stored(job_ref, path):
+    return job_ref.collection("candidates").document(ingestion._candidate_id(path)).get().to_dict()
+
+
+def test_reupload_links_to_stored_candidate(job, tmp_path):
+    resume = make_resume(0, random.Random(2), "t")
+    first = upload(tmp_path, "first", [resume, resume])
+    process(first)
+    assert stored(job, first[1])["duplicateOf"] == ingestion._candidate_id(first[0])
+    second = upload(tmp_path, "second", [resume])
+    process(second)
+    assert stored(job, second[0])["duplicateOf"] == ingestion._candidate_id(first[0])
+
+def test_failed_task_leaves_nothing_in_the_index(job, tmp_path, monkeypatch):
+    resume = make_resume(0, random.Random(3), "t")
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("scoring failed")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(ingestion, "_score_and_store_each", fail)
+        with pytest.raises(RuntimeError):
+            process(upload(tmp_path, "failed", [resume]))
+
+    retried = upload(tmp_path, "later", [resume])
+    process(retried)
+    assert stored(job, retried[0]).get("status") != "duplicate"
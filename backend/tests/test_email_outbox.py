@@ -0,0 +1,82 @@
+# backend/tests/test_email_outbox.py
+
+import asyncio
+
+import pytest
+
+from services import email_outbox
+from services.email_providers import FakeProvider
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return email_outbox.EmailOutbox(str(tmp_path / "outbox.sqlite3"), max_attempts=3, retry_backoff_seconds=0)
+
+@pytest.fixture
+def provider():
+    return FakeProvider()
+
+def dispatcher(outbox, provider, lease_seconds=30):
+    return email_outbox.OutboxDispatcher(outbox, provider, batch_size=10, rate_per_second=1000,
+                                         poll_interval=0.01, lease_seconds=lease_seconds)
+
+def messages(count, job_id="job1"):
+    return [{"idempotencyKey": email_outbox.idempotency_key(job_id, f"c{i}", "draft"), "jobId": job_id,
+             "candidateId": f"c{i}", "to": f"c{i}@example.com", "subject": "Interview", "body": "Hi"}
+            for i in range(count)]
+
+def statuses(outbox, tracking_id):
+    return outbox.tracking_status(tracking_id)["counts"]
+
+
+def test_sending_the_same_emails_twice_queues_them_once(outbox, provider):
+    first = outbox.enqueue(messages(3))
+    second = outbox.enqueue(messages(3))
+    assert (first["queued"], first["duplicates"]) == (3, 0)
+    assert (second["queued"], second["duplicates"]) == (0, 3)
+
+    asyncio.run(dispatcher(outbox, provider).dispatch_once())
+    assert len(provider.sent) == 3
+    assert statuses(outbox, first["trackingId"]) == {"sent": 3}
+    assert outbox.tracking_status(second["trackingId"]) is None
+
+def test_batch_resent_after_a_lost_worker_is_delivered_once(outbox, provider, monkeypatch):
+    tracking_id = outbox.enqueue(messages(3))["trackingId"]
+    record_results = outbox.record_results
+
+    def crash(*args):
+        raise RuntimeError("worker died before recording results")
+
+    async def run():
+        # The provider accepts the batch, but its outcome never reaches the outbox.
+        monkeypatch.setattr(outbox, "record_results", crash)
+        with pytest.raises(RuntimeError):
+            await dispatcher(outbox, provider, lease_seconds=0.01).dispatch_once()
+        monkeypatch.setattr(outbox, "record_results", record_results)
+        await asyncio.sleep(0.02)
+        # Another dispatcher re-claims the batch once the lease expires and sends it with the same key.
+        assert await dispatcher(outbox, provider).dispatch_once() == 3
+    asyncio.run(run())
+
+    assert provider.calls == 2
+    assert len(provider.sent) == 3
+    assert statuses(outbox, tracking_id) == {"sent": 3}
+
+def test_failed_batch_is_retried(outbox, provider):
+    tracking_id = outbox.enqueue(messages(2))["trackingId"]
+    provider.fail_next = ConnectionError("provider unavailable")
+    sender = dispatcher(outbox, provider)
+
+    asyncio.run(sender.dispatch_once())
+    assert statuses(outbox, tracking_id) == {"queued": 2}
+    asyncio.run(sender.dispatch_once())
+    assert statuses(outbox, tracking_id) == {"sent": 2}
+    assert len(provider.sent) == 2
+    assert sender.stats()["retried"] == 2 and sender.stats()["batchErrors"] == 1
+
+def test_invalid_recipient_fails_without_retry(outbox, provider):
+    batch = messages(2)
+    batch[1]["to"] = "N/A"
+    tracking_id = outbox.enqueue(batch)["trackingId"]
+    asyncio.run(dispatcher(outbox, provider).dispatch_once())
+    assert statuses(outbox, tracking_id) == {"sent": 1, "failed": 1}
@@ -0,0 +1,70 @@
+# backend/tests/test_email_templates.py
+
+import asyncio
+
+from services import email_templates
+from services.email_templates import INTERVIEW, NEXT_ROUND
+
+
+def generated(body: str):
+    async def generate():
+        return {"subject": "Hello {candidate_name}", "body": body}, True
+    return generate
+
+
+def test_interview_template_must_state_the_time():
+    without_time = {"subject": "Interview", "body": "Hi {candidate_name}, we would like to meet you."}
+    assert not email_templates.is_valid(without_time, INTERVIEW)
+    assert email_templates.is_valid(without_time, NEXT_ROUND)
+    assert email_templates.is_valid(email_templates.default_template(INTERVIEW), INTERVIEW)
+
+def test_template_without_time_falls_back_to_default():
+    template, from_model = asyncio.run(email_templates.get_template(
+        "test-no-time", INTERVIEW, generated("Hi {candidate_name}, let us talk soon.")))
+    assert template == email_templates.default_template(INTERVIEW) and not from_model
+    assert email_templates.get_store().get("test-no-time") is None
+
+def test_valid_template_is_cached():
+    body = "Hi {candidate_name}, see you at {interview_time}."
+    template, from_model = asyncio.run(email_templates.get_template("test-with-time", INTERVIEW, generated(body)))
+    assert template["body"] == body and from_model
+    assert email_templates.get_store().get("test-with-time") == template
+
+def test_template_store_is_separate_from_drafts(tmp_path, monkeypatch):
+    from services import email_drafts
+
+    monkeypatch.setattr(email_templates.config, "EMAIL_DRAFT_STORE_PATH", str(tmp_path / "drafts.sqlite3"))
+    monkeypatch.setattr(email_templates, "_store", None)
+    monkeypatch.setattr(email_drafts, "_store", None)
+    templates, drafts = email_templates.get_store(), email_drafts.get_store()
+    templates.set("key", {"subject": "template"})
+    drafts.set("key", {"subject": "draft"})
+    drafts.clear()
+
+    assert drafts.get("key") is None
+    templates._memory.clear()
+    assert templates.get("key") == {"subject": "template"}
+
+def test_fallback_drafts_are_not_stored(tmp_path, monkeypatch):
+    from services import email_agent, email_drafts
+    import config
+
+    calls = []
+
+    async def unavailable(prompt):
+        calls.append(prompt)
+        raise ConnectionError("model unavailable")
+
+    monkeypatch.setattr(config, "EMAIL_DRAFT_MODE", "template")
+    monkeypatch.setattr(config, "EMAIL_PERSONALIZATION", False)
+    monkeypatch.setattr(email_agent, "_generate_text", unavailable)
+    monkeypatch.setattr(email_drafts, "_store", None)
+    monkeypatch.setattr(email_templates, "_store", None)
+    job = {"title": "Fallback Engineer"}
+    items = [({"id": "c1", "candidateName": "Ada", "candidateEmail": "ada@example.com"}, "2030-01-07T10:00:00+00:00")]
+
+    first = asyncio.run(email_drafts.get_or_draft("job1", job, items))
+    second = asyncio.run(email_drafts.get_or_draft("job1", job, items))
+    assert first[0]["body"] == second[0]["body"]
+    assert not second[0]["reused"]
+    assert len(calls) == 2
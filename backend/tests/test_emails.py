@@ -0,0 +1,69 @@
+# backend/tests/test_emails.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from benchmarks import fakes
+from services import calendar, ingestion
+import config
+
+
+@pytest.fixture
+def api(fake_firestore, fake_llm, monkeypatch):
+    """The app over ASGI with a connected fake calendar and one job with three candidates."""
+    fake_calendar = fakes.FakeCalendar(fakes.Faults())
+    monkeypatch.setattr(calendar, "query_busy", fake_calendar.query_busy)
+    monkeypatch.setattr(calendar, "insert_events", fake_calendar.insert_events)
+    fake_firestore.collection("users").document("placeholder_user_id").set({"google_tokens": {
+        "token": "fake", "refresh_token": "fake", "client_id": "fake", "client_secret": "fake",
+        "token_uri": "https://oauth2.googleapis.com/token", "expiry": "2999-01-01T00:00:00Z",
+    }})
+    job_ref = fake_firestore.collection("jobs").document("job1")
+    job_ref.set({"title": "Engineer", "jobDescription": "Python engineer", "status": "completed"})
+    candidates = job_ref.collection("candidates")
+    candidates.document("ok").set({"candidateName": "Ada", "candidateEmail": "ada@example.com",
+                                   "suitabilityScore": 80, "summary": "Strong."})
+    candidates.document("filtered").set(ingestion._unscored_candidate(ingestion._contact("Bob\nno address here"), "filtered", "Not scored."))
+    candidates.document("error").set({"candidateName": "N/A", "candidateEmail": "N/A",
+                                      "suitabilityScore": 0, "summary": "Not a resume."})
+
+    import app as api_module
+    return api_module.app
+
+def post(app, path, body):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post(path, json=body)
+    return asyncio.run(go())
+
+REQUEST = {"jobId": "job1", "interviewDatetime": "2030-01-07T10:00:00+00:00", "candidateIds": ["ok", "filtered", "error"]}
+
+
+def test_unscored_candidate_without_address_has_no_email():
+    assert ingestion._unscored_candidate(ingestion._contact("Bob\nno address"), "filtered", "")["candidateEmail"] is None
+
+def test_draft_skips_candidates_without_email(api):
+    response = post(api, "/api/emails/draft", REQUEST)
+    assert response.status_code == 200
+    assert [d["candidateId"] for d in response.json()] == ["ok"]
+    assert set(response.headers["X-Skipped-Candidates"].split(",")) == {"filtered", "error"}
+
+def test_send_skips_and_reports_candidates_without_email(api):
+    response = post(api, "/api/emails/send", REQUEST)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["emailsQueued"] == 1
+    assert {s["candidateId"] for s in body["skippedCandidates"]} == {"filtered", "error"}
+
+def test_no_reachable_candidates_is_rejected(api):
+    response = post(api, "/api/emails/send", dict(REQUEST, candidateIds=["filtered", "error"]))
+    assert response.status_code == 422
+
+def test_misconfigured_working_hours_are_a_conflict(api, monkeypatch):
+    monkeypatch.setattr(config, "INTERVIEW_WORKDAY_END", "08:00")
+    response = post(api, "/api/emails/send", REQUEST)
+    assert response.status_code == 409
+    assert "misconfigured" in response.json()["detail"]
@@ -0,0 +1,81 @@
+# backend/tests/test_ingestion.py
+
+import asyncio
+import random
+
+import pytest
+
+from benchmarks.suite import job_description, make_resume
+from services import ingestion
+import config
+
+DAMAGED_PDF = b"%PDF-1.4\n1 0 obj << /Type /Catalog >>\n\xff\xfe garbage stream \x89 endobj"
+
+
+@pytest.fixture
+def job(fake_firestore, fake_llm):
+    job_ref = fake_firestore.collection("jobs").document("job1")
+    job_ref.set({"title": "Engineer", "jobDescription": job_description("t"), "status": "processing"})
+    return job_ref
+
+def stage(tmp_path, count: int):
+    rng = random.Random(0)
+    paths = []
+    for i in range(count):
+        path = tmp_path / f"{i:05d}_resume.txt"
+        path.write_text(make_resume(i, rng, "t"))
+        paths.append(str(path))
+    damaged = tmp_path / f"{count:05d}_resume.pdf"
+    damaged.write_bytes(DAMAGED_PDF)
+    return paths, str(damaged)
+
+def stored(job_ref):
+    return {doc.id: doc.to_dict() for doc in job_ref.collection("candidates").stream()}
+
+
+@pytest.mark.parametrize("prefilter", [False, True])
+def test_damaged_file_is_stored_unscored(job, tmp_path, monkeypatch, prefilter):
+    monkeypatch.setattr(config, "PREFILTER_ENABLED", prefilter)
+    monkeypatch.setattr(config, "PREFILTER_TOP_K", 10)
+    paths, damaged = stage(tmp_path, 3)
+    asyncio.run(ingestion.process_resumes_task("job1", job_description("t"), paths + [damaged]))
+
+    candidates = stored(job)
+    assert len(candidates) == 4
+    failed = candidates[ingestion._candidate_id(damaged)]
+    assert failed["status"] == "extraction_failed" and failed["suitabilityScore"] == 0
+    assert "garbage" not in failed["summary"]
+    assert all(candidates[ingestion._candidate_id(p)].get("status") != "extraction_failed" for p in paths)
+    assert job.get().to_dict()["status"] == "completed"
+
+def test_extraction_is_bounded(job, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PREFILTER_ENABLED", True)
+    monkeypatch.setattr(config, "PREFILTER_TOP_K", 10)
+    monkeypatch.setattr(config, "EXTRACTION_PROCESSES", 1)
+    monkeypatch.setattr(config, "RESUME_PROCESSING_CONCURRENCY", 1)
+    extract_text = ingestion._extract_text
+    in_flight, peak = 0, 0
+
+    async def counting(path, content_hashes=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            await asyncio.sleep(0)
+            return await extract_text(path, content_hashes)
+        finally:
+            in_flight -= 1
+
+    monkeypatch.setattr(ingestion, "_extract_text", counting)
+    paths, _ = stage(tmp_path, 12)
+    asyncio.run(ingestion.process_resumes_task("job1", job_description("t"), paths))
+    assert peak == 2
+    assert len(stored(job)) == 12
+
+def test_prefilter_ranks_term_counts_like_texts():
+    from services import prefilter
+    rng = random.Random(1)
+    texts = [make_resume(i, rng, "t") for i in range(20)] + [""]
+    from_texts = prefilter.BM25Index(texts).score(job_description("t"))
+    from_counts = prefilter.BM25Index([prefilter.term_counts(t) for t in texts]).score(job_description("t"))
+    assert from_counts.tolist() == pytest.approx(from_texts.tolist())
@@ -0,0 +1,63 @@
+# backend/tests/test_job_queue.py
+
+import time
+
+from services.job_queue import SQLiteQueueBackend
+
+
+def make_queue(tmp_path, **kwargs) -> SQLiteQueueBackend:
+    return SQLiteQueueBackend(str(tmp_path / "queue.sqlite3"), **kwargs)
+
+
+def test_claim_complete(tmp_path):
+    queue = make_queue(tmp_path)
+    task_id = queue.enqueue("noop", {"n": 1})
+    task = queue.claim("w1", lease_seconds=60)
+    assert task.id == task_id and task.payload == {"n": 1} and task.attempts == 1
+    assert queue.claim("w2", lease_seconds=60) is None
+    queue.complete(task.id, "w1")
+    assert queue.get_task(task_id)["status"] == "done"
+
+def test_failed_task_is_retried_with_backoff_then_failed(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2, retry_backoff_seconds=0)
+    task_id = queue.enqueue("noop", {})
+    first = queue.claim("w1", lease_seconds=60)
+    queue.fail(first.id, "w1", "boom")
+    assert queue.get_task(task_id)["status"] == "queued"
+    second = queue.claim("w1", lease_seconds=60)
+    assert second.attempts == 2 and second.is_last_attempt
+    queue.fail(second.id, "w1", "boom again")
+    task = queue.get_task(task_id)
+    assert task["status"] == "failed" and task["lastError"] == "boom again"
+    assert queue.claim("w1", lease_seconds=60) is None
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=3)
+    queue.enqueue("noop", {})
+    first = queue.claim("w1", lease_seconds=0.01)
+    time.sleep(0.05)
+    second = queue.claim("w2", lease_seconds=60)
+    assert second.id == first.id and second.attempts == 2 and second.lease_owner == "w2"
+    # The first worker lost its lease: it can neither extend nor complete the task.
+    assert not queue.extend_lease(first.id, "w1", 60)
+    queue.complete(first.id, "w1")
+    assert queue.get_task(first.id)["status"] == "running"
+
+def test_expired_lease_on_last_attempt_fails_the_task(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    task_id = queue.enqueue("crashes_its_worker", {})
+    for attempt in (1, 2):
+        task = queue.claim(f"w{attempt}", lease_seconds=0.01)
+        assert task is not None and task.attempts == attempt
+        time.sleep(0.05)
+    assert queue.claim("w3", lease_seconds=60) is None
+    task = queue.get_task(task_id)
+    assert task["status"] == "failed" and task["lastError"] == "lease expired" and task["attempts"] == 2
+
+def test_extend_lease_keeps_task_from_being_reclaimed(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue("noop", {})
+    task = queue.claim("w1", lease_seconds=0.05)
+    assert queue.extend_lease(task.id, "w1", 60)
+    time.sleep(0.1)
+    assert queue.claim("w2", lease_seconds=60) is None
@@ -0,0 +1,48 @@
+# backend/tests/test_jobs.py
+
+import asyncio
+
+import httpx
+import pytest
+
+from services import job_queue
+import config
+
+
+@pytest.fixture
+def app(fake_firestore):
+    job_ref = fake_firestore.collection("jobs").document("job1")
+    job_ref.set({"title": "Engineer", "jobDescription": "Python engineer", "status": "completed"})
+    for i in range(3):
+        job_ref.collection("candidates").document(f"c{i}").set({"candidateName": f"C{i}", "suitabilityScore": i})
+
+    import app as api_module
+    return api_module.app
+
+def delete(app, path):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.delete(path)
+    return asyncio.run(go())
+
+
+def test_small_job_is_deleted_inline(app, fake_firestore):
+    response = delete(app, "/api/jobs/job1")
+    assert response.status_code == 204
+    assert not fake_firestore.collection("jobs").document("job1").get().exists
+
+def test_large_job_is_deleted_in_the_background(app, fake_firestore, monkeypatch):
+    monkeypatch.setattr(config, "BULK_DELETE_ASYNC_THRESHOLD", 2)
+    response = delete(app, "/api/jobs/job1")
+    assert response.status_code == 202
+    body = response.json()
+    assert body["candidateCount"] == 3
+    assert job_queue.get_queue().get_task(body["taskId"])["type"] == "delete_job"
+    assert fake_firestore.collection("jobs").document("job1").get().to_dict()["status"] == "deleting"
+
+def test_delete_documents_both_responses(app):
+    responses = app.openapi()["paths"]["/api/jobs/{job_id}"]["delete"]["responses"]
+    assert set(responses) >= {"202", "204"}
+    schema = responses["202"]["content"]["application/json"]["schema"]["$ref"].rsplit("/", 1)[-1]
+    assert set(app.openapi()["components"]["schemas"][schema]["properties"]) == {"taskId", "candidateCount"}
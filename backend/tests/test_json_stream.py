@@ -0,0 +1,55 @@
+# backend/tests/test_json_stream.py
+
+import json
+
+import pytest
+
+from services.json_stream import JsonObjectStream
+
+RANKINGS = [
+    {"candidateIndex": 0, "summary": "Led a {platform} team; \"hands-on\" with C:\\tools\\", "score": 91},
+    {"candidateIndex": 1, "summary": "Closing brace } and bracket ] in text", "score": 78},
+]
+RESPONSE = json.dumps({"rankings": RANKINGS})
+
+
+def feed_in(parser: JsonObjectStream, chunks):
+    return [obj for chunk in chunks for obj in parser.feed(chunk)]
+
+def split_at(text: str, position: int):
+    return [text[:position], text[position:]]
+
+
+@pytest.mark.parametrize("emit_depth,expected", [(2, RANKINGS), (0, [{"rankings": RANKINGS}])])
+def test_any_chunk_boundary(emit_depth, expected):
+    for position in range(len(RESPONSE) + 1):
+        assert feed_in(JsonObjectStream(emit_depth), split_at(RESPONSE, position)) == expected, position
+
+def test_boundary_after_escape():
+    escape = RESPONSE.index('\\"')
+    assert feed_in(JsonObjectStream(emit_depth=2), split_at(RESPONSE, escape + 1)) == RANKINGS
+    backslashes = RESPONSE.index('\\\\')
+    assert feed_in(JsonObjectStream(emit_depth=2), split_at(RESPONSE, backslashes + 1)) == RANKINGS
+
+def test_one_character_at_a_time():
+    assert feed_in(JsonObjectStream(emit_depth=2), RESPONSE) == RANKINGS
+
+def test_braces_in_strings_are_not_structure():
+    parser = JsonObjectStream(emit_depth=0)
+    assert parser.feed('{"summary": "} ] { [", "score": 5') == []
+    assert parser.feed('}') == [{"summary": "} ] { [", "score": 5}]
+
+def test_objects_are_emitted_as_they_close():
+    parser = JsonObjectStream(emit_depth=2)
+    first_end = RESPONSE.index('}', RESPONSE.index('"score"')) + 1
+    assert parser.feed(RESPONSE[:first_end]) == RANKINGS[:1]
+    assert parser.feed(RESPONSE[first_end:]) == RANKINGS[1:]
+
+def test_markdown_fence_is_ignored():
+    fenced = "```json\n" + RESPONSE + "\n```\n"
+    assert feed_in(JsonObjectStream(emit_depth=2), [fenced[:5], fenced[5:40], fenced[40:]]) == RANKINGS
+    assert feed_in(JsonObjectStream(emit_depth=0), [fenced]) == [{"rankings": RANKINGS}]
+
+def test_nested_objects_stay_inside_their_parent():
+    text = '{"rankings": [{"candidateIndex": 0, "profile": {"skills": ["go"]}}]}'
+    assert JsonObjectStream(emit_depth=2).feed(text) == [{"candidateIndex": 0, "profile": {"skills": ["go"]}}]
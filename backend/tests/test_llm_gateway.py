@@ -0,0 +1,70 @@
+# backend/tests/test_llm_gateway.py
+
+import asyncio
+
+import pytest
+
+from services.llm_gateway import AdaptiveConcurrency
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_success_adds_one_slot_per_window():
+    limiter = AdaptiveConcurrency(4, maximum=64, clock=Clock())
+    for _ in range(4):
+        limiter.release(limiter.acquire_sync())
+    assert limiter.limit == pytest.approx(4.9, abs=0.05)
+    assert int(limiter.limit) == 4
+    for _ in range(2):
+        limiter.release(limiter.acquire_sync())
+    assert int(limiter.limit) == 5
+
+def test_throttle_halves_once_per_burst():
+    clock = Clock()
+    limiter = AdaptiveConcurrency(16, clock=clock)
+    admitted = [limiter.acquire_sync() for _ in range(4)]
+    clock.now += 1
+    for time in admitted:
+        limiter.release(time, throttled=True, succeeded=False)
+    # All four were admitted before the first decrease, so only it counts.
+    assert limiter.limit == 8 and limiter.decreases == 1
+
+    clock.now += 1
+    limiter.release(limiter.acquire_sync(), throttled=True, succeeded=False)
+    assert limiter.limit == 4 and limiter.decreases == 2
+
+def test_limit_stays_within_bounds():
+    clock = Clock()
+    limiter = AdaptiveConcurrency(2, minimum=2, maximum=3, clock=clock)
+    for _ in range(3):
+        clock.now += 1
+        limiter.release(limiter.acquire_sync(), throttled=True, succeeded=False)
+    assert limiter.limit == 2
+    for _ in range(50):
+        limiter.release(limiter.acquire_sync())
+    assert limiter.limit == 3
+
+def test_failures_that_are_not_throttles_leave_the_limit():
+    limiter = AdaptiveConcurrency(4, clock=Clock())
+    limiter.release(limiter.acquire_sync(), succeeded=False)
+    assert limiter.limit == 4
+
+def test_waiters_are_admitted_as_slots_free():
+    limiter = AdaptiveConcurrency(1, maximum=1, clock=Clock())
+
+    async def go():
+        first = await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done() and limiter.in_flight == 1
+        limiter.release(first)
+        await asyncio.wait_for(waiter, 1)
+        assert limiter.in_flight == 1
+
+    asyncio.run(go())
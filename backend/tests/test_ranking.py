@@ -0,0 +1,84 @@
+# backend/tests/test_ranking.py
+
+import asyncio
+
+import pytest
+
+import ai_logic
+import config
+from services import scoring_cache
+
+
+@pytest.mark.parametrize("tokens,budget,max_candidates,base,expected", [
+    ([10, 10, 10, 10], 25, 10, 0, [[0, 1], [2, 3]]),
+    ([10, 10, 10, 10], 100, 3, 0, [[0, 1, 2], [3]]),
+    ([10, 50, 10], 30, 10, 0, [[0], [1], [2]]),  # Oversized resume alone.
+    ([10, 10, 10], 35, 10, 10, [[0, 1], [2]]),  # Base prompt counts against each shard.
+    ([], 100, 10, 0, []),
+])
+def test_plan_shards(tokens, budget, max_candidates, base, expected):
+    assert ai_logic.plan_shards(tokens, budget, max_candidates, base) == expected
+
+def test_plan_shards_keeps_every_index_once_in_order():
+    tokens = [(i * 37) % 90 + 5 for i in range(200)]
+    shards = ai_logic.plan_shards(tokens, 300, 7, base_tokens=40)
+    assert [i for shard in shards for i in shard] == list(range(200))
+    assert all(len(shard) <= 7 for shard in shards)
+    assert all(len(shard) == 1 or 40 + sum(tokens[i] for i in shard) <= 300 for shard in shards)
+
+
+def ranking(index: int, score: float = 0.5) -> dict:
+    return {"candidateIndex": index, "candidateName": f"C{index}", "suitabilityScore": score, "summary": "ok"}
+
+@pytest.fixture
+def model(monkeypatch):
+    """A scripted ranking model: each call plays the next entry of `answers`, a list of rankings or an exception."""
+    monkeypatch.setattr(config, "RANK_SHARD_RETRY_BACKOFF_SECONDS", 0)
+    monkeypatch.setattr(config, "RANK_SHARD_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(config, "RANK_SHARD_MAX_CANDIDATES", 2)
+    monkeypatch.setattr(scoring_cache, "_cache", scoring_cache.ScoringCache(max_entries=100))
+    answers, calls = [], []
+
+    async def respond(prompt_parts, stream):
+        calls.append(prompt_parts)
+        answer = answers.pop(0)
+        for item in answer:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    monkeypatch.setattr(ai_logic, "_response_rankings", respond)
+    return answers, calls
+
+def rank(resumes):
+    return asyncio.run(ai_logic.rank_candidates_from_files("Python engineer", resumes)).rankings
+
+def test_failed_shard_is_retried_on_its_own(model):
+    answers, calls = model
+    answers.extend([[ranking(0, 0.9), ranking(1, 0.8)], [RuntimeError("unavailable")], [ranking(0, 0.7), ranking(1, 0.6)]])
+    rankings = rank(["a", "b", "c", "d"])
+    assert len(calls) == 3
+    assert {r.candidateIndex: r.suitabilityScore for r in rankings} == {0: 0.9, 1: 0.8, 2: 0.7, 3: 0.6}
+
+def test_partial_answer_is_completed_without_duplicates(model):
+    answers, calls = model
+    answers.extend([[ranking(0, 0.9), RuntimeError("stream cut")], [ranking(0, 0.1), ranking(1, 0.4)]])
+    rankings = rank(["a", "b"])
+    assert len(calls) == 2
+    assert sorted((r.candidateIndex, r.suitabilityScore) for r in rankings) == [(0, 0.9), (1, 0.4)]
+
+def test_shard_that_keeps_failing_falls_back(model):
+    answers, calls = model
+    answers.extend([[ranking(1, 0.9)], [RuntimeError("unavailable")], [RuntimeError("unavailable")]])
+    rankings = rank(["a", "b"])
+    assert len(calls) == 3
+    by_index = {r.candidateIndex: r for r in rankings}
+    assert by_index[1].suitabilityScore == 0.9
+    assert by_index[0].candidateName == "N/A" and by_index[0].suitabilityScore == 0
+
+def test_complete_shard_is_cached(model):
+    answers, calls = model
+    answers.append([ranking(0), ranking(1)])
+    rank(["a", "b"])
+    assert [r.candidateIndex for r in rank(["a", "b"])] == [0, 1]
+    assert len(calls) == 1
@@ -0,0 +1,44 @@
+# backend/tests/test_rate_limit.py
+
+import pytest
+
+from services.rate_limit import TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_waits_in_order():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    assert [bucket._reserve(1) for _ in range(3)] == [0, 0, 0]
+    # Each further reservation waits for the units reserved before it.
+    assert [bucket._reserve(1) for _ in range(3)] == [0.5, 1.0, 1.5]
+    assert bucket.available == -3
+
+def test_refill_is_capped_at_capacity():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=3, clock=clock)
+    bucket._reserve(3)
+    clock.now += 1
+    assert bucket.available == 2
+    clock.now += 60
+    assert bucket.available == 3
+    assert bucket._reserve(3) == 0
+    assert bucket._reserve(1) == 0.5
+
+def test_oversized_request_waits_for_a_full_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=10, capacity=5, clock=clock)
+    assert bucket._reserve(50) == 0
+    assert bucket._reserve(1) == pytest.approx(0.1)
+
+def test_zero_rate_never_waits():
+    bucket = TokenBucket(rate=0, capacity=1, clock=Clock())
+    assert all(bucket._reserve(100) == 0 for _ in range(10))
+    assert bucket.available == 1
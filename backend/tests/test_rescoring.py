@@ -0,0 +1,98 @@
+# backend/tests/test_rescoring.py
+
+import asyncio
+
+import pytest
+
+from services import profiles, rescoring
+import services.firestore_async as adb
+import config
+
+A = "Python developer"
+B = "Python developer with kubernetes"
+C = "Python developer with kubernetes and terraform, 5 years"
+PROFILES = {
+    "c1": {"skills": ["python", "kubernetes"], "yearsExperience": 6, "titles": []},
+    "c2": {"skills": ["python", "terraform"], "yearsExperience": 2, "titles": []},
+}
+
+
+@pytest.fixture
+def job(fake_firestore, monkeypatch):
+    monkeypatch.setattr(config, "RESCORE_MODE", "local")
+    monkeypatch.setattr(config, "RESCORE_MIN_DELTA", 0.0)
+    job_ref = fake_firestore.collection("jobs").document("job1")
+    job_ref.set({"title": "Engineer", "jobDescription": A})
+    for candidate_id, profile in PROFILES.items():
+        job_ref.collection("candidates").document(candidate_id).set(
+            {"candidateName": candidate_id, "suitabilityScore": 0.5, "summary": "", "profile": profile})
+    return job_ref
+
+def edit(job_ref, description: str) -> dict:
+    """What PUT /api/jobs/{id} does: write the description and return the rescore task payload."""
+    job = job_ref.get().to_dict()
+    update = {"jobDescription": description}
+    if "scoredDescription" not in job:
+        update["scoredDescription"] = job["jobDescription"]
+    job_ref.update(update)
+    import services.firestore_client as db
+    db.invalidate_job("job1")
+    return {"previousDescription": job["jobDescription"], "descriptionHash": profiles.description_hash(description)}
+
+def run(payload: dict) -> dict:
+    return asyncio.run(rescoring.rescore_job("job1", payload["previousDescription"], payload["descriptionHash"]))
+
+def scores(job_ref) -> dict:
+    return {doc.id: doc.to_dict() for doc in job_ref.collection("candidates").stream()}
+
+def expected_local(old: str, new: str) -> dict:
+    before, after = profiles.DescriptionRequirements(old), profiles.DescriptionRequirements(new)
+    return {cid: min(1.0, max(0.0, 0.5 + after.match_score(p) - before.match_score(p))) for cid, p in PROFILES.items()}
+
+
+def test_quick_edits_apply_the_change_once(job):
+    first, second = edit(job, B), edit(job, C)
+    assert run(first) == {"skipped": "superseded by a later edit"}
+    result = run(second)
+    assert result["rescored"] == 2
+    stored = scores(job)
+    for candidate_id, score in expected_local(A, C).items():
+        assert stored[candidate_id]["suitabilityScore"] == pytest.approx(score)
+        assert stored[candidate_id]["previousSuitabilityScore"] == 0.5
+    assert job.get().to_dict()["scoredDescription"] == C
+
+def test_rerun_does_not_apply_the_change_again(job):
+    payload = edit(job, C)
+    run(payload)
+    once = scores(job)
+    assert run(payload)["rescored"] == 0
+    assert scores(job) == once
+
+def test_retry_after_a_failed_chunk_keeps_scores_and_previous_scores(job, monkeypatch):
+    monkeypatch.setattr(config, "FIRESTORE_WRITE_BATCH_SIZE", 1)
+    real_update = adb.update_candidate_batch
+    calls = []
+
+    async def fail_second_chunk(job_id, updates, job_update=None):
+        calls.append(updates)
+        if len(calls) == 2:
+            raise RuntimeError("commit failed")
+        await real_update(job_id, updates, job_update)
+
+    monkeypatch.setattr(adb, "update_candidate_batch", fail_second_chunk)
+    payload = edit(job, C)
+    with pytest.raises(RuntimeError):
+        run(payload)
+    run(payload)
+    stored = scores(job)
+    for candidate_id, score in expected_local(A, C).items():
+        assert stored[candidate_id]["suitabilityScore"] == pytest.approx(score)
+        assert stored[candidate_id]["previousSuitabilityScore"] == 0.5
+
+def test_reverted_edit_restores_a_clamped_score(job):
+    job.collection("candidates").document("c1").update({"suitabilityScore": 0.95})
+    run(edit(job, "Python developer kubernetes"))
+    assert scores(job)["c1"]["suitabilityScore"] == 1.0
+    # Shifting the clamped 1.0 back down would lose 0.05; the base score does not.
+    run(edit(job, A))
+    assert scores(job)["c1"]["suitabilityScore"] == pytest.approx(0.95)
@@ -0,0 +1,24 @@
+# backend/tests/test_scoring_cache.py
+
+from services import email_drafts, email_outbox, email_templates
+from services.scoring_cache import content_key, make_key
+
+
+def test_content_key_parts_cannot_be_resplit():
+    assert content_key("ab", "c") != content_key("a", "bc")
+    assert content_key("ab", "") != content_key("ab")
+    assert content_key("café") == content_key("café".encode('utf-8'))
+
+def test_make_key_ignores_whitespace_in_the_description():
+    assert make_key("Python  engineer\n", "resume", "m", "1") == make_key("Python engineer", b"resume", "m", "1")
+    assert make_key("Python engineer", "resume", "m", "1") != make_key("Python engineer", "resume", "m", "2")
+
+def test_keys_are_namespaced_by_their_parts():
+    job, candidate = {"title": "Engineer"}, {"candidateName": "Ada", "candidateEmail": "ada@example.com"}
+    keys = {
+        email_outbox.idempotency_key("job1", "ok", "first"),
+        email_templates.template_key("Engineer", "first", "warm", "m", "1"),
+        email_drafts.draft_key("job1", job, "ok", candidate, "2030-01-07T10:00:00+00:00"),
+        email_drafts.draft_key("job1", job, "ok", candidate, "2030-01-07T11:00:00+00:00"),
+    }
+    assert len(keys) == 4
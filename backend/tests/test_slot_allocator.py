@@ -0,0 +1,93 @@
+# backend/tests/test_slot_allocator.py
+
+import asyncio
+from datetime import datetime, time, timedelta, timezone
+
+import httpx
+import pytest
+
+from services.slot_allocator import SlotPolicy, allocate_slots
+import config
+
+
+def utc(day: int, hour: int, minute: int = 0, month: int = 1) -> datetime:
+    return datetime(2030, month, day, hour, minute, tzinfo=timezone.utc)
+
+def starts(slots):
+    return [start for start, _ in slots]
+
+POLICY = SlotPolicy()  # 30 minutes, 10 minute buffer, 09:00-17:00 UTC, Monday-Friday, 15 minute grid
+MONDAY = 7  # 2030-01-07
+
+
+def test_slots_keep_the_buffer_around_meetings_and_each_other():
+    busy = [(utc(MONDAY, 10), utc(MONDAY, 11))]
+    slots = allocate_slots(2, utc(MONDAY, 9, 30), busy, POLICY)
+    # 09:30-10:00 would end inside the 10 minutes before the meeting.
+    assert starts(slots) == [utc(MONDAY, 11, 15), utc(MONDAY, 12)]
+    assert all(end - start == POLICY.duration for start, end in slots)
+
+def test_overlapping_meetings_are_merged():
+    busy = [(utc(MONDAY, 9), utc(MONDAY, 10)), (utc(MONDAY, 9, 45), utc(MONDAY, 12)), (utc(MONDAY, 12, 5), utc(MONDAY, 13))]
+    assert starts(allocate_slots(1, utc(MONDAY, 9), busy, POLICY)) == [utc(MONDAY, 13, 15)]
+
+def test_slot_may_end_exactly_at_close_of_business():
+    assert starts(allocate_slots(1, utc(MONDAY, 16, 30), [], POLICY)) == [utc(MONDAY, 16, 30)]
+
+def test_slot_that_does_not_fit_moves_past_the_weekend():
+    friday = MONDAY + 4
+    assert starts(allocate_slots(1, utc(friday, 16, 40), [], POLICY)) == [utc(MONDAY + 7, 9)]
+
+def test_start_before_opening_hours_waits_for_them():
+    assert starts(allocate_slots(1, utc(MONDAY, 6, 7), [], POLICY)) == [utc(MONDAY, 9)]
+
+def test_fewer_slots_when_the_window_runs_out():
+    slots = allocate_slots(5, utc(MONDAY, 9), [], POLICY, window_end=utc(MONDAY, 10, 30))
+    assert starts(slots) == [utc(MONDAY, 9), utc(MONDAY, 9, 45)]
+
+def test_busy_window_leaves_no_slots():
+    busy = [(utc(MONDAY, 0), utc(MONDAY + 5, 0))]
+    assert allocate_slots(1, utc(MONDAY, 9), busy, POLICY, window_end=utc(MONDAY + 4, 17)) == []
+
+def test_working_hours_follow_the_policy_time_zone():
+    policy = SlotPolicy(time_zone="America/New_York")
+    # 07:00 in New York (EST, UTC-5): the first slot is 09:00 local.
+    assert starts(allocate_slots(1, utc(MONDAY, 12), [], policy)) == [utc(MONDAY, 14)]
+    # Daylight saving starts on Sunday 2030-03-10, so Monday's 09:00 is 13:00 UTC.
+    assert starts(allocate_slots(1, utc(8, 21, 50, month=3), [], policy)) == [utc(11, 13, month=3)]
+
+def test_naive_start_is_utc_and_results_are_utc():
+    slots = allocate_slots(1, datetime(2030, 1, MONDAY, 9), [], SlotPolicy(time_zone="Europe/Berlin",
+                                                                           work_start=time(8), work_end=time(18)))
+    assert slots == [(utc(MONDAY, 9), utc(MONDAY, 9) + timedelta(minutes=30))]
+    assert slots[0][0].tzinfo == timezone.utc
+
+@pytest.mark.parametrize("changes", [
+    {"work_start": time(17), "work_end": time(9)},
+    {"work_start": time(9), "work_end": time(9, 20)},
+    {"workdays": ()},
+    {"workdays": (5, 7)},
+    {"time_zone": "Nowhere/Atlantis"},
+    {"duration": timedelta(0)},
+])
+def test_policy_without_usable_hours_is_rejected(changes):
+    with pytest.raises(ValueError):
+        SlotPolicy(**changes)
+
+def test_main_schedule_reports_misconfigured_hours_as_conflict(fake_firestore, monkeypatch):
+    import main
+
+    async def connected(user_id):
+        return object()
+
+    monkeypatch.setattr(main, "get_db", lambda: fake_firestore)
+    monkeypatch.setattr(main._credentials, "get_async", connected)
+    monkeypatch.setattr(config, "INTERVIEW_WORKDAY_END", "08:00")
+
+    async def schedule():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/jobs/job1/schedule-interviews")
+    response = asyncio.run(schedule())
+    assert response.status_code == 409
+    assert "misconfigured" in response.json()["detail"]
@@ -0,0 +1,59 @@
+# backend/tests/test_text_extraction.py
+
+import pytest
+
+from services import text_extraction
+
+TRUNCATED_PDF = b"%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >>\n\xff\xfe garbage stream \x89 endobj"
+
+
+def test_plain_text():
+    result = text_extraction.extract_text("Ada Lovelace\n\n\n\nEngineer".encode("utf-8"), "cv.txt")
+    assert result["format"] == text_extraction.TEXT
+    assert result["text"] == "Ada Lovelace\n\nEngineer"
+    assert result["error"] is None
+
+def test_html_drops_hidden_content():
+    html = b"<html><head><style>p {}</style></head><body><p>Ada</p><script>x()</script><p>Engineer</p></body></html>"
+    result = text_extraction.extract_text(html, "cv.html")
+    assert result["format"] == text_extraction.HTML
+    assert "Ada" in result["text"] and "Engineer" in result["text"] and "x()" not in result["text"]
+
+def test_damaged_pdf_reports_an_error_instead_of_byte_soup():
+    result = text_extraction.extract_text(TRUNCATED_PDF, "cv.pdf")
+    assert result["format"] == text_extraction.PDF
+    assert result["text"] == ""
+    assert result["error"]
+
+def test_damaged_docx_reports_an_error():
+    result = text_extraction.extract_text(b"PK\x03\x04 not really a zip", "cv.docx")
+    assert result["text"] == "" and result["error"]
+
+RTF = (rb"{\rtf1\ansi{\fonttbl{\f0 Arial;}}{\*\generator Writer;}\f0 Ad\'e9le L\u243?pez\par "
+       rb"Senior {\b Python} engineer\tab 10 years\page Caf\'e9 \{team\} lead\line end}")
+HTML = "<html><body><h1>Zoë Ångström</h1><p>Backend &amp; data</p><script>var x = '<p>';</script><p>Tokyo</p></body></html>"
+
+
+@pytest.mark.parametrize("chunk_bytes", [1, 3, 7, 64])
+def test_chunked_decoding_matches_whole_file(chunk_bytes, monkeypatch, tmp_path):
+    documents = {
+        "cv.rtf": RTF,
+        "cv.html": HTML.encode("utf-8"),
+        "cv.txt": "Zoë – naïve café résumé ✓\nline two".encode("utf-8"),
+        "cv16.txt": "﻿Zoë naïve".encode("utf-16-le"),
+        "latin1.txt": "Zoë naïve café".encode("latin-1"),
+    }
+    whole = {name: text_extraction.extract_text(data, name)["text"] for name, data in documents.items()}
+    monkeypatch.setattr(text_extraction, "DECODE_CHUNK_BYTES", chunk_bytes)
+    for name, data in documents.items():
+        path = tmp_path / name
+        path.write_bytes(data)
+        # Through the memory map, as the extraction pool reads staged files.
+        assert text_extraction.extract_file(str(path))["text"] == whole[name], name
+
+def test_decoding():
+    text = text_extraction.extract_text(RTF, "cv.rtf")["text"]
+    assert text.startswith("Adéle López\nSenior Python engineer\t10 years\nCafé {team} lead\nend")
+    assert "Arial" not in text and "Writer" not in text
+    assert text_extraction.extract_text("Zoë naïve café".encode("latin-1"), "cv.txt")["text"] == "Zoë naïve café"
+    assert text_extraction.extract_text("﻿Zoë".encode("utf-16-le"), "cv.txt")["text"] == "Zoë"
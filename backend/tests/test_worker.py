@@ -0,0 +1,69 @@
+# backend/tests/test_worker.py
+
+import asyncio
+import sqlite3
+
+from services.job_queue import SQLiteQueueBackend
+from services.worker import WorkerPool
+
+
+class FlakyLeaseQueue(SQLiteQueueBackend):
+    """Queue whose lease extensions fail a set number of times, or report the lease as lost."""
+
+    def __init__(self, path: str, lock_errors: int = 0, lose_lease: bool = False):
+        super().__init__(path)
+        self.lock_errors = lock_errors
+        self.lose_lease = lose_lease
+        self.extensions = 0
+
+    def extend_lease(self, task_id, worker_id, lease_seconds):
+        self.extensions += 1
+        if self.lock_errors:
+            self.lock_errors -= 1
+            raise sqlite3.OperationalError("database is locked")
+        if self.lose_lease:
+            return False
+        return super().extend_lease(task_id, worker_id, lease_seconds)
+
+
+async def run_one(queue: SQLiteQueueBackend, handler, lease_seconds: float = 0.15):
+    pool = WorkerPool(queue, {"work": handler}, lease_seconds=lease_seconds)
+    task_id = queue.enqueue("work", {})
+    task = queue.claim("w1", lease_seconds)
+    await pool._execute("w1", task)
+    return pool, queue.get_task(task_id)
+
+
+def test_heartbeat_survives_extend_lease_errors(tmp_path):
+    queue = FlakyLeaseQueue(str(tmp_path / "queue.sqlite3"), lock_errors=2)
+
+    async def slow_handler(task):
+        await asyncio.sleep(0.4)
+
+    pool, task = asyncio.run(run_one(queue, slow_handler))
+    assert queue.extensions >= 3  # Kept beating after the errors.
+    assert task["status"] == "done"
+    assert pool.stats()["completed"] == 1
+
+def test_lost_lease_cancels_the_handler(tmp_path):
+    queue = FlakyLeaseQueue(str(tmp_path / "queue.sqlite3"), lose_lease=True)
+    finished = []
+
+    async def slow_handler(task):
+        await asyncio.sleep(1)
+        finished.append(task.id)
+
+    pool, task = asyncio.run(run_one(queue, slow_handler))
+    assert finished == []
+    assert task["status"] == "running"  # Left for whichever worker holds the lease.
+    assert pool.stats()["lostLeases"] == 1 and pool.stats()["completed"] == 0
+
+def test_failing_handler_marks_task_for_retry(tmp_path):
+    queue = SQLiteQueueBackend(str(tmp_path / "queue.sqlite3"), retry_backoff_seconds=60)
+
+    async def failing_handler(task):
+        raise ValueError("bad input")
+
+    pool, task = asyncio.run(run_one(queue, failing_handler))
+    assert task["status"] == "queued" and "bad input" in task["lastError"]
+    assert pool.stats()["failed"] == 1
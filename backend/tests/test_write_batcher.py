@@ -0,0 +1,85 @@
+# backend/tests/test_write_batcher.py
+
+import asyncio
+
+import pytest
+
+from services import write_batcher
+import services.firestore_async as adb
+
+
+class Commits(list):
+    """Each committed (candidate IDs, job update); commit calls numbered in `fail` raise instead."""
+
+    def __init__(self):
+        super().__init__()
+        self.fail = set()
+        self.calls = 0
+
+    async def commit_candidate_batch(self, job_id, chunk, job_update):
+        self.calls += 1
+        if self.calls in self.fail:
+            raise RuntimeError("deadline exceeded")
+        self.append(([candidate_id for candidate_id, _ in chunk], job_update))
+
+
+@pytest.fixture
+def commits(monkeypatch):
+    recorded = Commits()
+    monkeypatch.setattr(adb, "commit_candidate_batch", recorded.commit_candidate_batch)
+    return recorded
+
+async def add_all(batcher, ids):
+    for candidate_id in ids:
+        await batcher.add({"suitabilityScore": 1}, candidate_id)
+
+def ids(count, start=0):
+    return [f"c{i}" for i in range(start, start + count)]
+
+
+def test_batches_stay_within_firestore_limit(commits):
+    async def run():
+        batcher = write_batcher.CandidateWriteBatcher("job1", max_batch_size=2000, flush_interval=0, max_attempts=1)
+        assert batcher.max_batch_size == write_batcher.FIRESTORE_MAX_BATCH_OPERATIONS
+        await add_all(batcher, ids(1200))
+        await batcher.close(job_update={"status": "completed"})
+    asyncio.run(run())
+
+    assert [len(chunk) for chunk, _ in commits] == [500, 500, 200]
+    assert [update for _, update in commits] == [None, None, {"status": "completed"}]
+
+def test_job_update_gets_its_own_batch_when_the_last_is_full(commits):
+    async def run():
+        batcher = write_batcher.CandidateWriteBatcher("job1", max_batch_size=500, flush_interval=0, max_attempts=1)
+        batcher._buffer = [(i, {}) for i in ids(500)]
+        await batcher.close(job_update={"status": "completed"})
+    asyncio.run(run())
+
+    assert [(len(chunk), update) for chunk, update in commits] == [(500, None), (0, {"status": "completed"})]
+
+def test_failed_chunk_is_buffered_again(commits):
+    commits.fail = {1}
+
+    async def run():
+        batcher = write_batcher.CandidateWriteBatcher("job1", max_batch_size=3, flush_interval=0, max_attempts=1)
+        with pytest.raises(RuntimeError, match="1 of 1 candidate batches failed"):
+            await add_all(batcher, ids(3))
+        assert [candidate_id for candidate_id, _ in batcher._buffer] == ids(3)
+        # The retried documents are written ahead of later ones, split at the batch size.
+        await add_all(batcher, ids(1, start=3))
+        await batcher.close(job_update={"status": "completed"})
+    asyncio.run(run())
+
+    assert commits == [(ids(3), None), (ids(1, start=3), None), ([], {"status": "completed"})]
+
+def test_chunk_retried_within_its_attempts(commits, monkeypatch):
+    commits.fail = {1}
+    monkeypatch.setattr(write_batcher.random, "random", lambda: 0.0)
+
+    async def run():
+        batcher = write_batcher.CandidateWriteBatcher("job1", max_batch_size=10, flush_interval=0, max_attempts=2)
+        await add_all(batcher, ids(2))
+        await batcher.close(job_update={"status": "completed"})
+    asyncio.run(run())
+
+    assert commits == [(ids(2), {"status": "completed"})]
@@ -0,0 +1,54 @@
+# backend/worker.py
+"""
+Standalone worker process that drains the job queue.
+
+    python worker.py --workers 4 [--dispatch-email] [--metrics-port 9101]
+
+Run as many of these as needed; they coordinate through the queue's leases.
+With --dispatch-email the process also drains the email outbox (set
+EMAIL_DISPATCHER_EMBEDDED=false on the API to leave that to workers).
+With --metrics-port the process serves its own GET /metrics for Prometheus.
+"""
+import argparse
+import asyncio
+
+from services import clients, email_outbox, email_providers, job_queue, metrics, text_extraction
+from services.tasks import TASK_HANDLERS
+from services.worker import WorkerPool, set_pool
+import config
+
+
+async def main(concurrency: int, dispatch_email: bool = False, metrics_port: int = 0):
+    metrics_server = metrics.start_http_server(metrics_port) if metrics_port else None
+    await clients.start()
+    pool = WorkerPool(
+        job_queue.get_queue(), TASK_HANDLERS, concurrency=concurrency,
+        lease_seconds=config.WORKER_LEASE_SECONDS,
+        poll_interval=config.WORKER_POLL_INTERVAL_SECONDS,
+    )
+    set_pool(pool)
+    dispatcher = None
+    if dispatch_email:
+        dispatcher = email_outbox.OutboxDispatcher(email_outbox.get_outbox(), email_providers.get_provider())
+        email_outbox.set_dispatcher(dispatcher)
+        await dispatcher.start()
+    print(f"Worker pool {pool.pool_id} started with {concurrency} workers.")
+    try:
+        await pool.run_forever()
+    finally:
+        if dispatcher:
+            await dispatcher.stop()
+        await pool.stop()
+        text_extraction.shutdown_pool()
+        await clients.stop()
+        if metrics_server:
+            metrics_server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ResumeRank background worker")
+    parser.add_argument("--workers", type=int, default=4, help="Number of concurrent workers in this process.")
+    parser.add_argument("--dispatch-email", action="store_true", help="Also deliver queued emails from the outbox.")
+    parser.add_argument("--metrics-port", type=int, default=0, help="Serve GET /metrics on this port (0: off).")
+    args = parser.parse_args()
+    asyncio.run(main(args.workers, args.dispatch_email, args.metrics_port))
@@ -8,7 +8,7 @@ export type ClientCandidate = {
   id: string;
   selected: boolean; 
   candidateName: string;
-  candidateEmail: string;
+  candidateEmail: string | null;
   summary: string;
   suitabilityScore: number;
   status?: 'pending' | 'selected' | 'contacted' | 'scheduled';